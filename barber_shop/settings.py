@@ -32,7 +32,9 @@ ALLOWED_HOSTS = []
 # Application definition
 
 INSTALLED_APPS = [
-    'django.contrib.admin',
+    # Без автоматического поиска admin.py при django.setup(): админку регистрирует barber_shop/urls.py,
+    # поэтому management-команды и фоновые задачи не импортируют модули админки
+    'django.contrib.admin.apps.SimpleAdminConfig',
     'django.contrib.auth',
     'django.contrib.contenttypes',
     'django.contrib.sessions',
@@ -52,6 +54,9 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'landing.middleware.QueryLogMiddleware',
+    'landing.middleware.MemoryProfileMiddleware',
+    'landing.middleware.MemoryBudgetMiddleware',
 ]
 
 ROOT_URLCONF = 'barber_shop.urls'
@@ -60,6 +65,11 @@ REST_FRAMEWORK = {
     'DEFAULT_FILTER_BACKENDS': ['django_filters.rest_framework.DjangoFilterBackend'],
 }
 
+# Публичное API (/api/, landing/api.py): ответы кешируются по версиям моделей
+# на LANDING_API_CACHE_TIMEOUT секунд, клиентам и прокси разрешено хранить их LANDING_API_MAX_AGE секунд
+LANDING_API_CACHE_TIMEOUT = 60 * 60 * 24
+LANDING_API_MAX_AGE = 60
+
 TEMPLATES = [
     {
         'BACKEND': 'django.template.backends.django.DjangoTemplates',
@@ -130,11 +140,160 @@ STATICFILES_DIRS = [
 ]
 
 STATIC_ROOT = BASE_DIR / "staticfiles"
-print("STATIC_ROOT", STATIC_ROOT)
-print("STATICFILES_DIRS", STATICFILES_DIRS)
+
+# Статика с хешем содержимого в именах (после collectstatic кешируется навсегда) и списком precache
+# для service worker. До collectstatic {% static %} отдаёт исходные имена.
+STORAGES = {
+    'default': {'BACKEND': 'django.core.files.storage.FileSystemStorage'},
+    'staticfiles': {'BACKEND': 'landing.storage.LandingStaticFilesStorage'},
+}
+
 MEDIA_URL = '/media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
 
+# Сборка мусора в media (manage.py gc_media): файлы без ссылок из БД
+# сначала попадают в карантин и удаляются после grace-периода
+LANDING_MEDIA_QUARANTINE_ROOT = os.path.join(BASE_DIR, 'media_quarantine')
+LANDING_MEDIA_GC_GRACE_HOURS = 72
+
+# Отдача media (landing/media.py): 'nginx' — ответ с X-Accel-Redirect на internal-location
+# LANDING_MEDIA_ACCEL_PREFIX, 'sendfile' — X-Sendfile с абсолютным путём (Apache mod_xsendfile, lighttpd),
+# None — FileResponse с поддержкой Range и 304 (под gunicorn файл уходит через sendfile).
+# Файлы с именем по хешу кешируются на год (immutable), остальные — на LANDING_MEDIA_MAX_AGE секунд.
+LANDING_MEDIA_ACCEL = None
+LANDING_MEDIA_ACCEL_PREFIX = '/protected-media/'
+LANDING_MEDIA_MAX_AGE = 60 * 60
+
+# Обработка загружаемых изображений: длинная сторона уменьшается до LANDING_IMAGE_MAX_EDGE,
+# файлы больше LANDING_IMAGE_MAX_BYTES или LANDING_IMAGE_MAX_PIXELS отклоняются
+LANDING_IMAGE_MAX_EDGE = 2048
+LANDING_IMAGE_QUALITY = 85
+LANDING_IMAGE_MAX_BYTES = 20 * 1024 * 1024
+LANDING_IMAGE_MAX_PIXELS = 40_000_000
+
+# Время жизни кеша фрагментов секций лендинга (секунды).
+# Ключи фрагментов содержат версии моделей, поэтому изменения в админке видны сразу.
+LANDING_SECTION_CACHE_TIMEOUT = 60 * 60 * 24
+# Версия релиза в ключах секций и ответов API: после деплоя кеш, общий для процессов, не отдаёт
+# фрагменты по старым шаблонам. None — хеш шаблонов и кода приложения landing; можно задать, например, коммит.
+LANDING_RELEASE = None
+
+# Главная страница отдаётся потоком (landing/streaming.py): <head> и шапка уходят сразу
+# вместе с заголовком Link rel=preload для CSS и картинок первого экрана, секции — по мере рендера.
+# Включается явно: у потокового ответа нет Content-Length и ETag, условные запросы к главной получают 200
+LANDING_STREAM_INDEX = False
+
+# Service worker (/sw.js, landing/service_worker.py): статика из collectstatic загружается заранее,
+# повторный заход на главную открывается из кеша, в том числе без сети.
+# В precache не попадают файлы крупнее LANDING_SW_PRECACHE_MAX_SIZE байт — они кешируются при первой загрузке.
+LANDING_SERVICE_WORKER = True
+LANDING_SW_PRECACHE_MAX_SIZE = 1024 * 1024
+
+# Каталог статической (пререндеренной) главной страницы: index.html и JSON секций.
+# Если задан, файлы перегенерируются при каждом изменении моделей лендинга
+# и могут отдаваться nginx напрямую. None — пререндер выключен.
+LANDING_PRERENDER_ROOT = None
+
+# Очередь фоновых задач (таблица landing.Task, воркер: manage.py run_tasks).
+# LANDING_TASKS_EAGER = True выполняет задачи сразу после коммита, без воркера.
+LANDING_TASKS_EAGER = False
+LANDING_TASKS_CONCURRENCY = 2
+LANDING_TASKS_POLL_INTERVAL = 1.0  # секунды между опросами таблицы задач
+LANDING_TASKS_BACKOFF = 10  # базовая задержка повтора, секунды (удваивается с каждой попыткой)
+LANDING_TASKS_LOCK_TIMEOUT = 10 * 60  # через сколько секунд «зависшая» задача возвращается в очередь
+LANDING_TASKS_KEEP_DONE_HOURS = 24
+
+# Хранение отзывов (landing/retention.py, manage.py archive_reviews по cron): отзывы старше стольких дней
+# переносятся пачками в сжатый архив ArchivedReviewBatch и возвращаются командой restore_reviews.
+# REJECTED — проверенные и не опубликованные (спам), PUBLIC — опубликованные; None — хранить в Review всегда.
+# Непроверенные отзывы из очереди модерации не архивируются.
+LANDING_REVIEW_ARCHIVE_REJECTED_DAYS = 90
+LANDING_REVIEW_ARCHIVE_PUBLIC_DAYS = 3 * 365
+LANDING_REVIEW_ARCHIVE_BATCH_SIZE = 500
+
+# Спам-фильтр отзывов (landing/spam.py). Модель обучается командой train_spam_model.
+LANDING_SPAM_MODEL_PATH = os.path.join(BASE_DIR, 'spam_model.json')
+# Отзывы с вероятностью спама не ниже порога отклоняются автоматически (None — не отклонять).
+# Действует только после обучения модели: без неё оценка строится на одних эвристиках
+LANDING_SPAM_AUTO_REJECT = 0.98
+
+# Кеши в файлах SQLite (landing/sqlite_cache.py), общие для всех процессов: версии моделей, секции, API, поиск
+# и лимиты формы отзывов видят все воркеры, а сброс по версии сразу действует во всех процессах.
+# default вытесняет давно не читанные записи сверх MAX_ENTRIES / MAX_SIZE (байт); устаревшие секции
+# и ответы API ещё STALE_TIMEOUT секунд отдаются, пока один процесс считает новую версию.
+# ratelimit — отдельный файл, чтобы данные лендинга не вытесняли счётчики лимитов.
+CACHES = {
+    'default': {
+        'BACKEND': 'landing.sqlite_cache.SQLiteCache',
+        'LOCATION': os.path.join(BASE_DIR, 'cache', 'landing.sqlite3'),
+        'OPTIONS': {'MAX_ENTRIES': 5000, 'MAX_SIZE': 64 * 1024 * 1024, 'STALE_TIMEOUT': 24 * 60 * 60},
+    },
+    'ratelimit': {
+        'BACKEND': 'landing.sqlite_cache.SQLiteCache',
+        'LOCATION': os.path.join(BASE_DIR, 'cache', 'ratelimit.sqlite3'),
+        'OPTIONS': {'MAX_ENTRIES': 10000},
+    },
+}
+
+# Защита формы отзывов (landing/ratelimit.py): ведро токенов на IP и на email —
+# (сколько отзывов подряд, через сколько секунд восстанавливается один), окно поиска дубликатов в секундах
+LANDING_REVIEW_RATE_CACHE = 'ratelimit'
+LANDING_REVIEW_RATE_IP = (5, 10 * 60)
+LANDING_REVIEW_RATE_EMAIL = (2, 60 * 60)
+LANDING_REVIEW_DUPLICATE_WINDOW = 24 * 60 * 60
+# Сколько своих прокси (nginx, балансировщик) стоит перед Django: IP клиента для лимитов и Review.ip_address
+# берётся из X-Forwarded-For на столько записей от конца. 0 — прокси нет, используется REMOTE_ADDR
+LANDING_TRUSTED_PROXY_HOPS = 0
+
+# Живая лента отзывов (SSE, landing/live.py; нужен ASGI-сервер): журнал событий, общий для всех процессов,
+# как часто его опрашивать и интервал пустых сообщений, не дающих прокси закрыть соединение (секунды)
+LANDING_LIVE_EVENTS_PATH = os.path.join(BASE_DIR, 'cache', 'review-events.log')
+LANDING_LIVE_POLL_INTERVAL = 0.5
+LANDING_LIVE_HEARTBEAT = 20
+
+# Журнал запросов к БД (landing/querylog.py, логгер landing.queries): запросы дольше LANDING_SLOW_QUERY_MS
+# пишутся с вьюхой, местом вызова и планом (EXPLAIN строится в фоновом потоке); None — отключить.
+# Формы запросов, повторившиеся в одном HTTP-запросе не меньше LANDING_QUERY_REPEAT_THRESHOLD раз (N+1),
+# выводятся сводкой раз в LANDING_QUERY_REPORT_INTERVAL секунд
+LANDING_SLOW_QUERY_MS = 100
+LANDING_SLOW_QUERY_EXPLAIN = True
+LANDING_QUERY_REPEAT_THRESHOLD = 5
+LANDING_QUERY_REPORT_INTERVAL = 5 * 60
+
+# Память (landing/memory.py, логгер landing.memory). LANDING_TRACEMALLOC = True: каждый
+# LANDING_TRACEMALLOC_EVERY-й запрос к вьюхе выполняется под tracemalloc (стек до LANDING_TRACEMALLOC_FRAMES
+# кадров) — пик памяти по вьюхам и места выделений; сводка раз в LANDING_MEMORY_REPORT_INTERVAL секунд.
+# Стек рендера шаблонов глубокий: с меньшим числом кадров места выделений не доходят до кода проекта.
+LANDING_TRACEMALLOC = False
+LANDING_TRACEMALLOC_FRAMES = 25
+LANDING_TRACEMALLOC_EVERY = 20
+LANDING_MEMORY_REPORT_INTERVAL = 5 * 60
+# Бюджет резидентной памяти воркера, МБ: после запроса, на котором он превышен, воркер перезапускается
+# (хук post_request в gunicorn.conf.py, для других серверов — MemoryBudgetMiddleware). None — без ограничения.
+LANDING_WORKER_MAX_RSS_MB = None
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {
+            'class': 'logging.StreamHandler',
+        },
+    },
+    'loggers': {
+        'landing.queries': {
+            'handlers': ['console'],
+            'level': 'INFO',
+            'propagate': False,
+        },
+        'landing.memory': {
+            'handlers': ['console'],
+            'level': 'INFO',
+            'propagate': False,
+        },
+    },
+}
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.2/ref/settings/#default-auto-field
 
@@ -16,15 +16,23 @@ Including another URLconf
 """
 from django.contrib import admin
 from django.urls import include, path
-from landing.views import index
+from landing.media import serve_media
+from landing.service_worker import service_worker
+from landing.views import index, nearest_branch, search_services, section_payload
 from django.conf import settings
-from django.conf.urls.static import static
+
+# Модули admin.py подключаются здесь, при первой загрузке URL-ов, а не в django.setup()
+admin.autodiscover()
 
 urlpatterns = [
     path('admin/', admin.site.urls),
     path('', index, name='home'),
+    path('search/', search_services, name='search'),
+    path('branches/nearest/', nearest_branch, name='nearest-branch'),
+    path('data/<slug:name>.<slug:version>.json', section_payload, name='payload'),
+    path('sw.js', service_worker, name='service-worker'),
     path('reviews/', include('landing.urls', namespace='reviews')),
+    path('api/', include('landing.api_urls', namespace='api')),
+    # media отдаётся и без DEBUG: через X-Accel-Redirect / X-Sendfile или FileResponse (landing/media.py)
+    path(f"{settings.MEDIA_URL.lstrip('/')}<path:path>", serve_media, name='media'),
 ]
-
-if settings.DEBUG:
-    urlpatterns += static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
@@ -0,0 +1,189 @@
+"""
+Кеш лендинга: задержка чтения попадания у разных бэкендов и «набег» воркеров на значение,
+которое только что стало неактуальным после правки в админке.
+
+1. Попадание: get() фрагмента секции (~40 КБ HTML) и get_many() версий моделей (как в section_versions)
+   у LocMemCache, FileBasedCache и landing.sqlite_cache.SQLiteCache; медиана и 99-й перцентиль.
+2. Набег: --workers процессов (как воркеры gunicorn) одновременно запрашивают значение сразу после смены
+   версии. Пересчёт стоит --compute-ms. Сравниваются: версия в ключе без защиты (каждый промах считается
+   заново), single-flight без прежнего значения (холодный кеш) и single-flight со stale-while-revalidate.
+3. То же на главной странице: после bump_model_version(Review) воркеры одновременно запрашивают GET /;
+   считается, сколько раз секция отзывов рендерилась заново (запросы к landing_review).
+
+Запуск из корня проекта (нужна БД с данными):
+    python benchmarks/cache.py --workers 16
+"""
+import argparse
+import io
+import multiprocessing
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'barber_shop.settings')
+
+import django  # noqa: E402
+
+django.setup()
+
+from django.core.cache.backends.filebased import FileBasedCache  # noqa: E402
+from django.core.cache.backends.locmem import LocMemCache  # noqa: E402
+
+from landing.sqlite_cache import SQLiteCache  # noqa: E402
+
+FRAGMENT = '<div class="slide">Отзыв клиента о стрижке и бритье.</div>\n' * 600
+VERSION_KEYS = [f'landing:version:landing.model{n}' for n in range(7)]
+
+
+def percentiles(timings):
+    timings = sorted(timings)
+    return statistics.median(timings) * 1e6, timings[int(len(timings) * 0.99)] * 1e6
+
+
+def bench_hits(backends, runs):
+    print(f"Попадание, {runs} чтений, мкс:")
+    for name, backend in backends.items():
+        backend.set('fragment', FRAGMENT, timeout=None)
+        backend.set_many({key: 1 for key in VERSION_KEYS}, timeout=None)
+        results = []
+        for label, read in (
+            ('get() фрагмента', lambda: backend.get('fragment')),
+            ('get_many() версий', lambda: backend.get_many(VERSION_KEYS)),
+        ):
+            timings = []
+            for _ in range(runs):
+                started = time.perf_counter()
+                read()
+                timings.append(time.perf_counter() - started)
+            results.append(f"{label}: медиана {percentiles(timings)[0]:6.1f}, p99 {percentiles(timings)[1]:6.1f}")
+        print(f"  {name:<16} " + ';  '.join(results))
+
+
+def plain_get_or_compute(backend, key, stamp, compute):
+    """ Версия в ключе, как у {% cache %}: каждый промах считается заново. """
+    versioned_key = f"{key}:{stamp}"
+    value = backend.get(versioned_key)
+    if value is None:
+        value = compute()
+        backend.set(versioned_key, value, timeout=None)
+    return value
+
+
+def herd_worker(location, mode, stamp, compute_seconds, barrier, results):
+    backend = SQLiteCache(location, {})
+
+    def compute():
+        backend.incr('computes')
+        time.sleep(compute_seconds)
+        return FRAGMENT
+
+    barrier.wait()
+    started = time.perf_counter()
+    if mode == 'plain':
+        plain_get_or_compute(backend, 'section', stamp, compute)
+    else:
+        backend.get_or_compute('section', compute, timeout=None, stamp=stamp)
+    results.put(time.perf_counter() - started)
+
+
+def bench_herd(workers, compute_ms):
+    print(f"\nНабег {workers} процессов после смены версии, пересчёт {compute_ms} мс:")
+    context = multiprocessing.get_context('fork')
+    cases = (
+        ('версия в ключе, без защиты', 'plain', True),
+        ('single-flight, холодный кеш', 'single-flight', False),
+        ('single-flight + stale', 'single-flight', True),
+    )
+    for label, mode, warm in cases:
+        with tempfile.TemporaryDirectory() as directory:
+            location = os.path.join(directory, 'cache.sqlite3')
+            backend = SQLiteCache(location, {})
+            if warm:
+                # значение для прежней версии данных, как до правки в админке
+                if mode == 'plain':
+                    backend.set('section:1', FRAGMENT, timeout=None)
+                else:
+                    backend.get_or_compute('section', lambda: FRAGMENT, timeout=None, stamp='1')
+            backend.set('computes', 0, timeout=None)
+            barrier, results = context.Barrier(workers), context.Queue()
+            processes = [
+                context.Process(target=herd_worker, args=(location, mode, '2', compute_ms / 1000, barrier, results))
+                for _ in range(workers)
+            ]
+            for process in processes:
+                process.start()
+            timings = sorted(results.get() for _ in processes)
+            for process in processes:
+                process.join()
+            print(f"  {label:<30} пересчётов: {backend.get('computes'):>3};  ответ: медиана "
+                  f"{statistics.median(timings) * 1000:6.1f} мс, макс {timings[-1] * 1000:6.1f} мс")
+
+
+def index_worker(barrier, results):
+    from django.db import connection
+    from django.test.utils import CaptureQueriesContext
+
+    from barber_shop.wsgi import application
+    environ = {
+        'REQUEST_METHOD': 'GET', 'PATH_INFO': '/', 'QUERY_STRING': '', 'SERVER_NAME': 'localhost',
+        'SERVER_PORT': '80', 'HTTP_HOST': 'localhost', 'wsgi.url_scheme': 'http', 'wsgi.input': io.BytesIO(),
+        'wsgi.errors': sys.stderr, 'wsgi.version': (1, 0), 'wsgi.multithread': False,
+        'wsgi.multiprocess': True, 'wsgi.run_once': False,
+    }
+    connection.close()
+    barrier.wait()
+    with CaptureQueriesContext(connection) as queries:
+        started = time.perf_counter()
+        b''.join(application(environ, lambda status, headers, exc_info=None: None))
+        elapsed = time.perf_counter() - started
+    renders = sum('FROM "landing_review"' in query['sql'] for query in queries)
+    results.put((elapsed, renders))
+
+
+def bench_index(workers):
+    from django.conf import settings
+    from django.test import Client
+
+    from landing.cache import bump_model_version
+    from landing.models import Review
+
+    settings.ALLOWED_HOSTS = ['*']
+    print(f"\nGET / в {workers} процессах сразу после правки отзыва (общий кеш {settings.CACHES['default']['BACKEND']}):")
+    Client().get('/')
+    bump_model_version(Review)
+    context = multiprocessing.get_context('fork')
+    barrier, results = context.Barrier(workers), context.Queue()
+    processes = [context.Process(target=index_worker, args=(barrier, results)) for _ in range(workers)]
+    for process in processes:
+        process.start()
+    rows = [results.get() for _ in processes]
+    for process in processes:
+        process.join()
+    timings = sorted(elapsed for elapsed, _ in rows)
+    print(f"  рендеров секции отзывов: {sum(renders > 0 for _, renders in rows)} из {workers};  ответ: медиана "
+          f"{statistics.median(timings) * 1000:.1f} мс, макс {timings[-1] * 1000:.1f} мс")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--runs', type=int, default=20000)
+    parser.add_argument('--workers', type=int, default=16)
+    parser.add_argument('--compute-ms', type=int, default=50)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        bench_hits({
+            'LocMemCache': LocMemCache('bench', {}),
+            'FileBasedCache': FileBasedCache(os.path.join(directory, 'files'), {}),
+            'SQLiteCache': SQLiteCache(os.path.join(directory, 'cache.sqlite3'), {}),
+        }, args.runs)
+    bench_herd(args.workers, args.compute_ms)
+    bench_index(args.workers)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,162 @@
+"""
+Память рендера главной страницы в зависимости от объёма данных: мастеров, услуг и отзывов.
+
+Для каждого размера запускается отдельный процесс с базой в памяти (миграции + bulk_create) и кешем
+LocMemCache, чтобы замеры не зависели от рабочей БД и общего кеша. В процессе замеряется GET /:
+- пик памяти Python (tracemalloc) при холодном кеше — версии всех моделей лендинга увеличены,
+  секции рендерятся заново с запросами к БД — и при тёплом, когда секции берутся из кеша;
+- прирост RSS процесса после холодного рендера (без tracemalloc) — что остаётся в памяти воркера;
+- места в коде, выделившие то, что занято к концу холодного ответа (см. landing/memory.py).
+
+Каждому мастеру создаются 3 соцсети, каждой услуге — 2 подраздела по 3 позиции прайса.
+
+Запуск из корня проекта:
+    python benchmarks/memory.py --sizes 10 100 1000
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+WORKER = """
+import gc
+import json
+import sys
+import tracemalloc
+from decimal import Decimal
+
+import django
+django.setup()
+from django.conf import settings
+from django.db import connection
+from django.test import Client
+from django.test.utils import override_settings
+
+SIZE = int(sys.argv[1])
+TOP = int(sys.argv[2])
+
+override_settings(
+    CACHES={name: {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': f'memory-{name}'}
+            for name in settings.CACHES},
+    ALLOWED_HOSTS=['*'],
+    LANDING_TRACEMALLOC=False,
+    LANDING_WORKER_MAX_RSS_MB=None,
+).enable()
+connection.creation.create_test_db(verbosity=0)
+
+from landing.cache import SECTION_DEPENDENCIES, bump_model_version
+from landing.memory import held_sites, rss_bytes
+from landing.models import Master, PriceItem, Review, Service, ServiceSubsection, Social
+
+masters = Master.objects.bulk_create([
+    # размеры, как их записал бы сигнал после загрузки фото (bulk_create сигналов не вызывает)
+    Master(name=f'Мастер {i}', photo=f'photos/master-{i}.jpg', photo_width=600, photo_height=800,
+           specialty='Барбер', description='Стрижки, бороды и укладки. ' * 5)
+    for i in range(SIZE)
+])
+Social.objects.bulk_create([
+    Social(master=master, href=f'https://example.com/{master.pk}/{n}', icon='fa-brands fa-vk', sort_order=n)
+    for master in masters for n in range(3)
+])
+services = Service.objects.bulk_create([
+    Service(name=f'Услуга {i}', description='Описание услуги. ' * 5) for i in range(SIZE)
+])
+subsections = ServiceSubsection.objects.bulk_create([
+    ServiceSubsection(service=service, name=f'Подраздел {n}') for service in services for n in range(2)
+])
+PriceItem.objects.bulk_create([
+    PriceItem(service=subsection.service, subsection=subsection, operation_name=f'Операция {n}',
+              price=Decimal('1500.00'), duration_minutes=45)
+    for subsection in subsections for n in range(3)
+])
+Review.objects.bulk_create([
+    Review(name=f'Клиент {i}', email=f'client{i}@example.com', review='Отличная стрижка! ' * 10, rating=5,
+           is_public=True)
+    for i in range(SIZE)
+])
+del masters, services, subsections
+
+client = Client()
+labels = {label for labels in SECTION_DEPENDENCIES.values() for label in labels}
+
+
+def get():
+    response = client.get('/')
+    assert response.status_code == 200, response.status_code
+    body = b''.join(response.streaming_content) if response.streaming else response.content
+    return response, len(body)
+
+
+# первый запрос — импорты, шаблоны и кеши процесса, которые у рабочего воркера уже прогреты
+get()
+bump_model_version(*labels)
+get()
+
+gc.collect()
+bump_model_version(*labels)
+rss_before = rss_bytes()
+get()
+gc.collect()
+rss_growth = rss_bytes() - rss_before
+
+bump_model_version(*labels)
+gc.collect()
+tracemalloc.start(25)
+response, size = get()
+cold_held, cold_peak = tracemalloc.get_traced_memory()
+sites = held_sites(tracemalloc.take_snapshot())
+tracemalloc.stop()
+del response
+
+gc.collect()
+tracemalloc.start(25)
+get()
+warm_peak = tracemalloc.get_traced_memory()[1]
+tracemalloc.stop()
+
+print(json.dumps({
+    'size': SIZE, 'html': size, 'cold_peak': cold_peak, 'cold_held': cold_held, 'warm_peak': warm_peak,
+    'rss_growth': rss_growth, 'sites': sites.most_common(TOP),
+}))
+"""
+
+
+def measure(size, top):
+    env = dict(os.environ, DJANGO_SETTINGS_MODULE='barber_shop.settings', PYTHONPATH=ROOT)
+    output = subprocess.run(
+        [sys.executable, '-c', WORKER, str(size), str(top)],
+        cwd=ROOT, env=env, stdout=subprocess.PIPE, text=True, check=True,
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def kb(value):
+    return f"{value / 1024:.0f}"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10, 100, 1000],
+                        help='число мастеров, услуг и отзывов (каждого)')
+    parser.add_argument('--top', type=int, default=5, help='сколько мест выделения показать')
+    args = parser.parse_args()
+
+    results = [measure(size, args.top) for size in args.sizes]
+
+    print(f"{'размер':>7}{'HTML, КБ':>10}{'пик, холодный':>15}{'занято':>9}{'пик, тёплый':>13}{'прирост RSS':>13}   (КБ)")
+    for result in results:
+        print(
+            f"{result['size']:>7}{kb(result['html']):>10}{kb(result['cold_peak']):>15}{kb(result['cold_held']):>9}"
+            f"{kb(result['warm_peak']):>13}{kb(result['rss_growth']):>13}"
+        )
+    for result in results:
+        print(f"\nЗанято к концу холодного ответа, размер {result['size']}:")
+        for site, size in result['sites']:
+            print(f"  {size / 1024:8.1f} КБ  {site}")
+
+
+if __name__ == '__main__':
+    main()
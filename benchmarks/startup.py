@@ -0,0 +1,132 @@
+"""
+Время запуска процесса: django.setup(), management-команда, холодный старт до первого ответа
+и первый ответ воркера после fork — без предзагрузки в мастере и с ней (gunicorn preload_app).
+
+Каждый замер — отдельный свежий процесс интерпретатора (как у нового воркера или задачи cron),
+результат — медиана из --runs запусков. С --importtime дополнительно сохраняется разбор
+`python -X importtime` для django.setup(): самые дорогие модули верхнего уровня.
+
+Запуск из корня проекта:
+    python benchmarks/startup.py --runs 7 --importtime benchmarks/importtime-setup.txt
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+SETUP = "import django; django.setup()"
+
+# Первый запрос к главной странице через WSGI-приложение, без сети и сервера
+REQUEST = """
+import io, sys
+environ = {
+    'REQUEST_METHOD': 'GET', 'PATH_INFO': '/', 'QUERY_STRING': '', 'SERVER_NAME': 'localhost',
+    'SERVER_PORT': '80', 'HTTP_HOST': 'localhost', 'wsgi.url_scheme': 'http', 'wsgi.input': io.BytesIO(),
+    'wsgi.errors': sys.stderr, 'wsgi.version': (1, 0), 'wsgi.multithread': False,
+    'wsgi.multiprocess': True, 'wsgi.run_once': False,
+}
+def first_request():
+    statuses = []
+    b''.join(application(environ, lambda status, headers, exc_info=None: statuses.append(status)))
+    assert statuses[0].startswith('200'), statuses
+"""
+
+FIRST_REQUEST = REQUEST + """
+from barber_shop.wsgi import application
+first_request()
+"""
+
+# Воркер gunicorn: мастер загрузил приложение (и с preload — всё остальное), воркер после fork
+# обслуживает первый запрос. Процесс сам печатает время от fork до ответа.
+FORKED_REQUEST = REQUEST + """
+import os, time
+from barber_shop.wsgi import application
+if PRELOAD:
+    from landing.warmup import preload_application
+    preload_application()
+read_fd, write_fd = os.pipe()
+started = time.perf_counter()
+pid = os.fork()
+if pid == 0:
+    first_request()
+    os.write(write_fd, str(time.perf_counter() - started).encode())
+    os._exit(0)
+os.waitpid(pid, 0)
+print(os.read(read_fd, 64).decode())
+"""
+
+CASES = {
+    # нижняя граница: запуск интерпретатора и site-packages без Django
+    'python -c pass': [sys.executable, '-c', 'pass'],
+    'django.setup()': [sys.executable, '-c', SETUP],
+    'manage.py export_prices': [sys.executable, 'manage.py', 'export_prices', '-o', os.devnull],
+    'первый запрос GET /': [sys.executable, '-c', FIRST_REQUEST],
+}
+
+# Замеры, время которых печатает сам процесс
+FORK_CASES = {
+    'воркер: fork -> первый ответ': [sys.executable, '-c', FORKED_REQUEST.replace("PRELOAD", "False")],
+    'то же с preload_application': [sys.executable, '-c', FORKED_REQUEST.replace("PRELOAD", "True")],
+}
+
+
+def measure(command, runs, reported=False):
+    env = dict(os.environ, DJANGO_SETTINGS_MODULE='barber_shop.settings', PYTHONPATH=ROOT)
+    timings = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        result = subprocess.run(
+            command, cwd=ROOT, env=env, check=True, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True,
+        )
+        timings.append(float(result.stdout.split()[-1]) if reported else time.perf_counter() - started)
+    return timings
+
+
+def importtime_report(path, top=40):
+    """ Пишет в path самые дорогие импорты django.setup() (накопительное время, мкс). """
+    env = dict(os.environ, DJANGO_SETTINGS_MODULE='barber_shop.settings', PYTHONPATH=ROOT)
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', SETUP],
+        cwd=ROOT, env=env, check=True, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True,
+    )
+    rows = []
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        prefix, cumulative_us, name = line.split('|')
+        self_us = prefix.split(':')[1]
+        rows.append((int(cumulative_us), int(self_us), name.rstrip()))
+    total = sum(cumulative for cumulative, _, name in rows if not name.startswith('  '))
+    top_level = sorted((row for row in rows if not row[2].startswith('  ')), reverse=True)[:top]
+    with open(path, 'w', encoding='utf-8') as fh:
+        fh.write(f"# python -X importtime -c '{SETUP}'\n")
+        fh.write(f"# модулей: {len(rows)}, суммарно верхний уровень: {total / 1000:.1f} мс\n")
+        fh.write(f"# {'накоп., мкс':>12} | {'собств., мкс':>12} | модуль\n")
+        for cumulative, self_us, name in top_level:
+            fh.write(f"{cumulative:>14} | {self_us:>12} | {name.strip()}\n")
+    return total, len(rows)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--importtime', metavar='PATH', help="куда сохранить разбор -X importtime")
+    args = parser.parse_args()
+
+    cases = [(name, command, False) for name, command in CASES.items()]
+    cases += [(name, command, True) for name, command in FORK_CASES.items()]
+    for name, command, reported in cases:
+        timings = measure(command, args.runs, reported)
+        print(f"{name:<28} медиана {statistics.median(timings) * 1000:7.1f} мс  "
+              f"(мин {min(timings) * 1000:.1f}, макс {max(timings) * 1000:.1f})")
+    if args.importtime:
+        total, count = importtime_report(args.importtime)
+        print(f"importtime: {count} модулей, {total / 1000:.1f} мс -> {args.importtime}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,121 @@
+"""
+Главная страница: render() против потоковой отдачи (LANDING_STREAM_INDEX).
+
+Для каждого режима поднимается WSGI-сервер (wsgiref, отправляет каждую часть ответа сразу),
+и по сырому сокету замеряется:
+- TTFB — время до первого байта ответа;
+- «первый экран» — до конца </header>: к этому моменту у браузера есть <head> со всеми CSS и шапка
+  с картинками первого экрана, то есть всё для первой отрисовки (оценка First Contentful Paint
+  без браузера: сама отрисовка ещё ждёт загрузки CSS, но начинается она не раньше этого момента);
+- полный ответ.
+
+Тёплый кеш — фрагменты секций уже в кеше; холодный — перед каждым запросом версии всех моделей лендинга
+увеличиваются (как после правки в админке), и каждая секция рендерится заново с запросами к БД.
+
+Запуск из корня проекта (нужна БД с данными):
+    python benchmarks/streaming.py --runs 30
+"""
+import argparse
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+SERVER = """
+import socket
+from wsgiref.simple_server import WSGIRequestHandler, make_server
+import django
+django.setup()
+from django.conf import settings
+settings.LANDING_STREAM_INDEX = USE_STREAMING
+settings.ALLOWED_HOSTS = ['*']
+from barber_shop.wsgi import application
+
+class QuietHandler(WSGIRequestHandler):
+    def setup(self):
+        super().setup()
+        # как у gunicorn: без Nagle мелкие части ответа не ждут подтверждения предыдущих
+        self.connection.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+
+    def log_message(self, *args):
+        pass
+
+server = make_server('127.0.0.1', 0, application, handler_class=QuietHandler)
+print(server.server_port, flush=True)
+server.serve_forever()
+"""
+
+
+def start_server(stream):
+    env = dict(os.environ, DJANGO_SETTINGS_MODULE='barber_shop.settings', PYTHONPATH=ROOT)
+    process = subprocess.Popen(
+        [sys.executable, '-c', SERVER.replace('USE_STREAMING', str(stream))],
+        cwd=ROOT, env=env, stdout=subprocess.PIPE, text=True,
+    )
+    return process, int(process.stdout.readline())
+
+
+def fetch(port):
+    """ (TTFB, первый экран, полный ответ) в секундах. """
+    sock = socket.create_connection(('127.0.0.1', port))
+    started = time.perf_counter()
+    sock.sendall(b'GET / HTTP/1.0\r\nHost: localhost\r\n\r\n')
+    first_byte = first_screen = None
+    data = b''
+    while True:
+        chunk = sock.recv(65536)
+        if not chunk:
+            break
+        now = time.perf_counter()
+        if first_byte is None:
+            first_byte = now
+        data += chunk
+        if first_screen is None and b'</header>' in data:
+            first_screen = now
+    done = time.perf_counter()
+    sock.close()
+    assert data.startswith(b'HTTP/1.0 200'), data[:100]
+    return first_byte - started, first_screen - started, done - started
+
+
+def invalidate():
+    from landing.cache import SECTION_DEPENDENCIES, bump_model_version
+
+    bump_model_version(*{label for labels in SECTION_DEPENDENCIES.values() for label in labels})
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--runs', type=int, default=30)
+    args = parser.parse_args()
+
+    sys.path.insert(0, ROOT)
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'barber_shop.settings')
+    import django
+    django.setup()
+
+    print(f"{'режим':<24}{'кеш':<11}{'TTFB':>9}{'первый экран':>15}{'полный ответ':>15}   (медиана из {args.runs}, мс)")
+    for label, stream in (('render()', False), ('поток', True)):
+        process, port = start_server(stream)
+        try:
+            fetch(port)
+            for cache_label, cold in (('тёплый', False), ('холодный', True)):
+                rows = []
+                for _ in range(args.runs):
+                    if cold:
+                        # кеш общий (SQLiteCache), поэтому версии, увеличенные здесь, видит и сервер
+                        invalidate()
+                    rows.append(fetch(port))
+                ttfb, screen, total = (statistics.median(column) * 1000 for column in zip(*rows))
+                print(f"{label:<24}{cache_label:<11}{ttfb:>9.1f}{screen:>15.1f}{total:>15.1f}")
+        finally:
+            process.terminate()
+            process.wait()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,37 @@
+"""
+Настройки gunicorn для продакшена: gunicorn -c gunicorn.conf.py
+
+Приложение загружается в мастер-процессе до fork (preload_app): Django, вьюхи, шаблоны и Pillow
+импортируются один раз, воркеры делят эту память с мастером (copy-on-write) и сразу готовы
+обслуживать запросы — это ускоряет и запуск, и автомасштабирование.
+"""
+import gc
+import multiprocessing
+import os
+
+# Живой ленте отзывов (SSE) нужен ASGI: GUNICORN_APP=barber_shop.asgi:application
+# и GUNICORN_WORKER_CLASS=uvicorn.workers.UvicornWorker
+wsgi_app = os.environ.get('GUNICORN_APP', 'barber_shop.wsgi:application')
+worker_class = os.environ.get('GUNICORN_WORKER_CLASS', 'sync')
+bind = os.environ.get('GUNICORN_BIND', '127.0.0.1:8000')
+workers = int(os.environ.get('GUNICORN_WORKERS', multiprocessing.cpu_count() * 2 + 1))
+preload_app = True
+timeout = 30
+
+
+def when_ready(server):
+    """ Вызывается в мастере после загрузки приложения и до запуска воркеров. """
+    from landing.warmup import preload_application
+
+    preload_application()
+    # Объекты, созданные до fork, сборщик мусора больше не обходит: иначе он трогает их счётчики
+    # и страницы памяти копируются в каждый воркер
+    gc.collect()
+    gc.freeze()
+
+
+def post_request(worker, req, environ, resp):
+    """ Воркер, превысивший бюджет памяти LANDING_WORKER_MAX_RSS_MB, перезапускается после запроса. """
+    from landing.memory import recycle_gunicorn_worker
+
+    recycle_gunicorn_worker(worker)
@@ -1,6 +1,18 @@
-from django.contrib import admin
+from django.contrib import admin, messages
+from django.core.exceptions import PermissionDenied
+from django.shortcuts import redirect
+from django.template.response import TemplateResponse
+from django.urls import path, reverse
+from django.utils import timezone
 from django.utils.html import format_html
-from .models import Address, Master, Social, GalleryImage, Review, Service, ServiceSubsection, PriceItem
+from django.utils.http import urlencode
+from .exports import PRICE_FIELDS, REVIEW_FIELDS, price_rows, review_rows, streaming_response
+from .moderation import pending_reviews, publish_reviews, queue_page, reject_reviews
+from .models import (
+    Address, ArchivedReviewBatch, Master, Social, GalleryImage, Review, Service, ServiceSubsection, PriceItem, Task,
+)
+from .retention import restore_reviews
+from .taskqueue import requeue_tasks
 
 ## Вложенный (inline) интерфейс для Social внутри страницы Master
 ## позволяет редактировать соцссылки прямо при редактировании мастера
@@ -13,9 +25,9 @@ class SocialInline(admin.TabularInline):
 
 @admin.register(Master)
 class MasterAdmin(admin.ModelAdmin):
-    list_display = ('id', 'photo_preview', 'name', 'specialty', 'created_at', 'updated_at')
+    list_display = ('id', 'photo_preview', 'name', 'specialty', 'branch', 'created_at', 'updated_at')
     search_fields = ('name', 'specialty', 'description')
-    list_filter = ('specialty', 'created_at')
+    list_filter = ('branch', 'specialty', 'created_at')
     readonly_fields = ('created_at', 'updated_at')
     inlines = (SocialInline,)
 
@@ -55,13 +67,102 @@ class GalleryImageAdmin(admin.ModelAdmin):
     list_display = ('name', 'address', 'email', 'phone', 'opening_hours', 'latitude', 'longitude', 'created_at', 'updated_at')
     readonly_fields = ('created_at',)
 
+class SpamScoreFilter(admin.SimpleListFilter):
+    title = 'спам'
+    parameter_name = 'spam'
+
+    def lookups(self, request, model_admin):
+        return (
+            ('likely', 'Вероятно спам (≥ 0.5)'),
+            ('unlikely', 'Вероятно не спам (< 0.5)'),
+            ('unscored', 'Не оценён'),
+        )
+
+    def queryset(self, request, queryset):
+        if self.value() == 'likely':
+            return queryset.filter(spam_score__gte=0.5)
+        if self.value() == 'unlikely':
+            return queryset.filter(spam_score__lt=0.5)
+        if self.value() == 'unscored':
+            return queryset.filter(spam_score__isnull=True)
+        return queryset
+
+
 @admin.register(Review)
 class ReviewAdmin(admin.ModelAdmin):
-    list_display = ('id', 'name', 'rating', 'is_public', 'created_at')
-    list_filter = ('is_public', 'rating', 'created_at')
+    list_display = ('id', 'name', 'rating', 'is_public', 'spam_score_display', 'created_at', 'moderated_at')
+    list_filter = ('is_public', SpamScoreFilter, 'rating', 'created_at', 'moderated_at')
     search_fields = ('name', 'email', 'review')
-    readonly_fields = ('created_at',)
+    readonly_fields = ('created_at', 'moderated_at', 'spam_score', 'ip_address')
     ordering = ('-created_at',)
+    actions = ('publish', 'reject', 'export_csv', 'export_jsonl')
+
+    def get_urls(self):
+        urls = [
+            path(
+                'moderation/',
+                self.admin_site.admin_view(self.moderation_view),
+                name='landing_review_moderation',
+            ),
+        ]
+        return urls + super().get_urls()
+
+    def moderation_view(self, request):
+        """
+        Очередь модерации: непроверенные отзывы страницами, публикация и отклонение пачкой.
+        """
+        if not self.has_change_permission(request):
+            raise PermissionDenied
+
+        if request.method == 'POST':
+            queryset = self.model.objects.filter(pk__in=request.POST.getlist('ids'))
+            action = request.POST.get('action')
+            if action == 'publish':
+                self.message_user(request, f"Опубликовано отзывов: {publish_reviews(queryset)}")
+            elif action == 'reject':
+                self.message_user(request, f"Отклонено отзывов: {reject_reviews(queryset)}")
+            else:
+                self.message_user(request, "Неизвестное действие.", level=messages.ERROR)
+            # Обработанные отзывы ушли из очереди — на той же позиции окажутся следующие
+            url = reverse('admin:landing_review_moderation')
+            after = request.POST.get('after')
+            return redirect(f"{url}?{urlencode({'after': after})}" if after else url)
+
+        after = request.GET.get('after')
+        reviews, next_cursor = queue_page(after)
+        context = {
+            **self.admin_site.each_context(request),
+            'title': 'Очередь модерации отзывов',
+            'opts': self.model._meta,
+            'reviews': reviews,
+            'after': after or '',
+            'next_cursor': next_cursor,
+            'pending_count': pending_reviews().count(),
+        }
+        return TemplateResponse(request, 'admin/landing/review/moderation.html', context)
+
+    @admin.display(description='Спам', ordering='spam_score')
+    def spam_score_display(self, obj):
+        if obj.spam_score is None:
+            return '—'
+        return f"{obj.spam_score:.2f}"
+
+    @admin.action(description='Опубликовать выбранные отзывы')
+    def publish(self, request, queryset):
+        self.message_user(request, f"Опубликовано отзывов: {publish_reviews(queryset)}")
+
+    @admin.action(description='Отклонить выбранные отзывы')
+    def reject(self, request, queryset):
+        self.message_user(request, f"Отклонено отзывов: {reject_reviews(queryset)}")
+
+    # Выгрузка берёт отфильтрованный список целиком, если выбрать «все N объектов» над таблицей
+    @admin.action(description='Выгрузить выбранные отзывы в CSV')
+    def export_csv(self, request, queryset):
+        return streaming_response('reviews', 'csv', REVIEW_FIELDS, review_rows(queryset))
+
+    @admin.action(description='Выгрузить выбранные отзывы в JSON Lines')
+    def export_jsonl(self, request, queryset):
+        return streaming_response('reviews', 'jsonl', REVIEW_FIELDS, review_rows(queryset))
 
 # Для раздела Услуги
 class ServiceSubsectionInline(admin.TabularInline):
@@ -72,9 +173,36 @@ class PriceItemInline(admin.TabularInline):
     model = PriceItem
     extra = 1
 
+@admin.register(ArchivedReviewBatch)
+class ArchivedReviewBatchAdmin(admin.ModelAdmin):
+    """ Архив отзывов только для просмотра: пачки создаёт archive_reviews, сами отзывы сжаты. """
+    list_display = ('id', 'reason', 'count', 'first_created_at', 'last_created_at', 'archived_at')
+    list_filter = ('reason',)
+    exclude = ('data',)
+    readonly_fields = ('reason', 'count', 'first_created_at', 'last_created_at', 'archived_at')
+    actions = ('restore_batches',)
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    @admin.action(description='Вернуть отзывы выбранных пачек', permissions=['delete'])
+    def restore_batches(self, request, queryset):
+        report = restore_reviews(batch_ids=list(queryset.values_list('pk', flat=True)))
+        self.message_user(request, f"Восстановлено отзывов: {report.counts['restored']}")
+        if report.skipped:
+            self.message_user(
+                request, f"Оставлено в архиве {report.skipped}: с тем же email уже есть отзыв.", messages.WARNING,
+            )
+
+
 @admin.register(Service)
 class ServiceAdmin(admin.ModelAdmin):
     list_display = ('name', 'description', 'has_subsections')
+    list_filter = ('branches',)
+    filter_horizontal = ('branches',)
     inlines = [ServiceSubsectionInline] # Позволяет добавлять подразделы прямо из формы услуги
 
 @admin.register(ServiceSubsection)
@@ -99,3 +227,28 @@ class PriceItemAdmin(admin.ModelAdmin):
             'description': 'Выберите либо услугу, либо подраздел, но не оба.',
         }),
     )
+    actions = ('export_csv', 'export_jsonl')
+
+    @admin.action(description='Выгрузить выбранные позиции прайса в CSV')
+    def export_csv(self, request, queryset):
+        return streaming_response('prices', 'csv', PRICE_FIELDS, price_rows(queryset))
+
+    @admin.action(description='Выгрузить выбранные позиции прайса в JSON Lines')
+    def export_jsonl(self, request, queryset):
+        return streaming_response('prices', 'jsonl', PRICE_FIELDS, price_rows(queryset))
+
+@admin.register(Task)
+class TaskAdmin(admin.ModelAdmin):
+    list_display = ('id', 'name', 'status', 'attempts', 'max_attempts', 'run_at', 'locked_by', 'updated_at')
+    list_filter = ('status', 'name')
+    search_fields = ('name', 'last_error')
+    readonly_fields = ('created_at', 'updated_at', 'locked_at', 'locked_by', 'last_error')
+    ordering = ('-created_at',)
+    actions = ('retry_tasks',)
+
+    @admin.action(description='Повторить выбранные задачи')
+    def retry_tasks(self, request, queryset):
+        updated = requeue_tasks(
+            queryset.exclude(status=Task.STATUS_RUNNING), attempts=0, run_at=timezone.now(), last_error='',
+        )
+        self.message_user(request, f"Задач поставлено в очередь: {updated}")
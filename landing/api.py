@@ -0,0 +1,119 @@
+"""
+Публичное read-only API: услуги с прайсами, мастера с соцсетями, опубликованные отзывы и филиалы.
+
+Ответы кешируются по адресу запроса и формату ответа вместе с версиями моделей, от которых зависят
+(см. landing/cache.py). ETag строится из адреса и версий, поэтому повторный запрос с If-None-Match получает 304,
+не трогая ни ORM, ни сам закешированный ответ — достаточно прочитать версии моделей из кеша.
+Пока новая версия ответа считается, остальные запросы получают прежнюю вместе с её ETag.
+"""
+import hashlib
+
+from django.conf import settings
+from django.utils.cache import patch_cache_control, patch_vary_headers
+from django.utils.http import parse_etags
+from rest_framework import status, viewsets
+from rest_framework.pagination import CursorPagination
+from rest_framework.permissions import AllowAny
+from rest_framework.response import Response
+
+from .cache import get_or_compute, model_versions, release_stamp
+from .filters import AddressFilter, MasterFilter, ReviewFilter, ServiceFilter
+from .models import Address, Master, PriceItem, Review, Service, ServiceSubsection, Social
+from .serializers import AddressSerializer, MasterSerializer, PublicReviewSerializer, ServiceSerializer
+
+CACHE_KEY_PREFIX = 'landing:api:'
+
+
+class ApiCursorPagination(CursorPagination):
+    """
+    Курсорная пагинация: страницы не «съезжают» при добавлении записей и не требуют COUNT и OFFSET.
+    Порядок задаётся атрибутом cursor_ordering вьюсета.
+    """
+    page_size = 20
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+    ordering = ('pk',)
+
+    def get_ordering(self, request, queryset, view):
+        return getattr(view, 'cursor_ordering', None) or super().get_ordering(request, queryset, view)
+
+
+class VersionedCacheMixin:
+    """
+    Кеширование list/retrieve по версиям моделей cache_models, ETag и ответ 304.
+    """
+    cache_models = ()
+
+    def get_cache_key(self, request):
+        raw = '|'.join([
+            # ссылки на страницы и фото в ответе абсолютные, поэтому в ключ входит и хост
+            request.build_absolute_uri(),
+            request.accepted_renderer.format,
+        ])
+        return f"{CACHE_KEY_PREFIX}{hashlib.md5(raw.encode('utf-8')).hexdigest()}"
+
+    def cached_response(self, request, build):
+        key = self.get_cache_key(request)
+        versions = model_versions(self.cache_models)
+        stamp = '|'.join([release_stamp(), *(f"{label}={version}" for label, version in sorted(versions.items()))])
+        etag = '"%s"' % hashlib.md5(f"{key}|{stamp}".encode('utf-8')).hexdigest()
+        if etag in parse_etags(request.headers.get('If-None-Match', '')):
+            response = Response(status=status.HTTP_304_NOT_MODIFIED)
+        else:
+            # ETag хранится вместе с данными: прежняя версия ответа отдаётся со своим ETag
+            etag, data = get_or_compute(
+                key, stamp, lambda: (etag, build().data),
+                timeout=getattr(settings, 'LANDING_API_CACHE_TIMEOUT', 60 * 60 * 24),
+            )
+            response = Response(data)
+        response['ETag'] = etag
+        patch_cache_control(response, public=True, max_age=getattr(settings, 'LANDING_API_MAX_AGE', 60))
+        patch_vary_headers(response, ('Accept',))
+        return response
+
+    def list(self, request, *args, **kwargs):
+        return self.cached_response(request, lambda: super(VersionedCacheMixin, self).list(request, *args, **kwargs))
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.cached_response(request, lambda: super(VersionedCacheMixin, self).retrieve(request, *args, **kwargs))
+
+
+class PublicReadOnlyViewSet(VersionedCacheMixin, viewsets.ReadOnlyModelViewSet):
+    # Без аутентификации: API публичное, а SessionAuthentication читала бы сессию из БД
+    authentication_classes = ()
+    permission_classes = (AllowAny,)
+    pagination_class = ApiCursorPagination
+
+
+class ServiceViewSet(PublicReadOnlyViewSet):
+    """ Услуги с подразделами и прайсами. Фильтры: name, branch. """
+    queryset = Service.objects.prefetch_related('subsections__price_items', 'price_items', 'branches')
+    serializer_class = ServiceSerializer
+    filterset_class = ServiceFilter
+    cursor_ordering = ('name',)
+    cache_models = (Service, ServiceSubsection, PriceItem, Address)
+
+
+class MasterViewSet(PublicReadOnlyViewSet):
+    """ Мастера с соцсетями. Фильтры: name, specialty, branch. """
+    queryset = Master.objects.prefetch_related('socials')
+    serializer_class = MasterSerializer
+    filterset_class = MasterFilter
+    cache_models = (Master, Social, Address)
+
+
+class ReviewViewSet(PublicReadOnlyViewSet):
+    """ Опубликованные отзывы, новые первыми. Фильтры: rating, min_rating, since, until. """
+    queryset = Review.objects.filter(is_public=True)
+    serializer_class = PublicReviewSerializer
+    filterset_class = ReviewFilter
+    cursor_ordering = ('-created_at', '-pk')
+    cache_models = (Review,)
+
+
+class AddressViewSet(PublicReadOnlyViewSet):
+    """ Филиалы. Фильтры: name, address. """
+    queryset = Address.objects.all()
+    serializer_class = AddressSerializer
+    filterset_class = AddressFilter
+    cache_models = (Address,)
@@ -0,0 +1,16 @@
+from django.urls import include, path
+from rest_framework.routers import DefaultRouter
+
+from landing.api import AddressViewSet, MasterViewSet, ReviewViewSet, ServiceViewSet
+
+app_name = 'api'
+
+router = DefaultRouter()
+router.register('services', ServiceViewSet)   # услуги с прайсами
+router.register('masters', MasterViewSet)   # мастера с соцсетями
+router.register('reviews', ReviewViewSet)   # опубликованные отзывы
+router.register('branches', AddressViewSet)   # филиалы и контакты
+
+urlpatterns = [
+    path('', include(router.urls)),
+]
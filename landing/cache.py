@@ -0,0 +1,135 @@
+"""
+Версии данных лендинга для кеширования секций страницы.
+
+Для каждой модели в кеше хранится счётчик версии, который увеличивается при любом её изменении.
+Ключ фрагмента секции строится из версий только тех моделей, от которых секция зависит,
+поэтому изменение отзыва сбрасывает кеш секции отзывов, а остальные секции остаются «тёплыми».
+
+В версию каждой секции входит и версия релиза (release_stamp): общий кеш переживает деплой,
+и без неё секции продолжали бы рендериться по старым шаблонам до истечения таймаута.
+
+Секции и ответы API берутся через get_or_compute(): с общим кешем landing.sqlite_cache.SQLiteCache
+после правки в админке новую версию считает один процесс, а остальные до этого отдают прежнюю.
+"""
+import hashlib
+import os
+import time
+from functools import lru_cache
+
+from django.conf import settings
+from django.core.cache import cache
+
+# Секции index.html (в порядке вывода) и модели, от которых зависит их содержимое
+SECTION_DEPENDENCIES = {
+    'partners': (),
+    'services': ('landing.service', 'landing.servicesubsection', 'landing.priceitem', 'landing.address'),
+    'about': ('landing.master', 'landing.social', 'landing.address'),
+    'gallery': ('landing.galleryimage',),
+    'reviews': ('landing.review',),
+    'contacts': ('landing.address',),
+}
+
+VERSION_KEY_PREFIX = 'landing:version:'
+
+APP_DIR = os.path.dirname(os.path.abspath(__file__))
+# Файлы приложения, от которых зависит содержимое секций и ответов API
+RELEASE_EXTENSIONS = ('.py', '.html', '.js')
+RELEASE_SKIP_DIRS = {'migrations', 'static', '__pycache__'}
+
+
+def _label(model):
+    return model if isinstance(model, str) else model._meta.label_lower
+
+
+def _version_key(model):
+    return f"{VERSION_KEY_PREFIX}{_label(model)}"
+
+
+def _initial_version():
+    # Если ключ версии вытеснен из кеша, новая версия не должна совпасть ни с одной старой
+    return int(time.time() * 1000)
+
+
+def model_versions(models):
+    """
+    Возвращает словарь {метка модели: версия}, читая все ключи одним запросом к кешу.
+    """
+    keys = {_version_key(model): _label(model) for model in models}
+    found = cache.get_many(list(keys))
+    versions = {}
+    for key, label in keys.items():
+        if key not in found:
+            cache.add(key, _initial_version(), timeout=None)
+            found[key] = cache.get(key)
+        versions[label] = found[key]
+    return versions
+
+
+def model_version(model):
+    return model_versions([model])[_label(model)]
+
+
+def bump_model_version(*models):
+    """
+    Увеличивает версию моделей — все фрагменты, зависящие от них, становятся неактуальными.
+    """
+    for model in models:
+        key = _version_key(model)
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.add(key, _initial_version(), timeout=None)
+
+
+@lru_cache(maxsize=1)
+def release_stamp():
+    """
+    Версия релиза: LANDING_RELEASE, а если он не задан — хеш шаблонов и кода приложения landing.
+    Считается один раз на процесс; после деплоя новые процессы получают новую версию.
+    """
+    release = getattr(settings, 'LANDING_RELEASE', None)
+    if release:
+        return str(release)
+    hasher = hashlib.md5()
+    for directory, dirnames, filenames in os.walk(APP_DIR):
+        dirnames[:] = sorted(name for name in dirnames if name not in RELEASE_SKIP_DIRS)
+        for filename in sorted(filenames):
+            if filename.endswith(RELEASE_EXTENSIONS):
+                path = os.path.join(directory, filename)
+                hasher.update(os.path.relpath(path, APP_DIR).encode('utf-8'))
+                with open(path, 'rb') as f:
+                    hasher.update(f.read())
+    return hasher.hexdigest()[:12]
+
+
+def section_versions(sections=None):
+    """
+    Возвращает словарь {секция: строка версии} для {% section_cache %} в шаблонах:
+    версия релиза и версии моделей, от которых секция зависит.
+    """
+    sections = SECTION_DEPENDENCIES if sections is None else sections
+    labels = {label for name in sections for label in SECTION_DEPENDENCIES[name]}
+    versions = model_versions(labels)
+    release = release_stamp()
+    return {
+        name: '.'.join([release, *(str(versions[label]) for label in SECTION_DEPENDENCIES[name])])
+        for name in sections
+    }
+
+
+def get_or_compute(key, stamp, compute, timeout=None, stale=True):
+    """
+    Значение по постоянному ключу key, посчитанное для версии данных stamp.
+
+    Бэкенды с get_or_compute (SQLiteCache) пересчитывают значение в одном процессе и на время пересчёта
+    отдают прежнее (stale=False — ждут нового); с остальными версия просто входит в ключ,
+    и каждый промах считается заново.
+    """
+    if hasattr(cache, 'get_or_compute'):
+        return cache.get_or_compute(key, compute, timeout=timeout, stamp=stamp, stale=stale)
+    versioned_key = f"{key}:{stamp}"
+    value = cache.get(versioned_key)
+    if value is None:
+        value = compute()
+        cache.set(versioned_key, value, timeout=timeout)
+    return value
@@ -0,0 +1,139 @@
+"""
+Потоковая выгрузка отзывов и прайса в CSV и JSON Lines.
+
+Строки читаются из БД через .values_list(...).iterator(chunk_size=...) и сразу превращаются в текст,
+поэтому выгрузка любого размера занимает постоянный объём памяти, а загрузка в браузере
+начинается, как только готова первая порция строк.
+
+Текстовые ячейки CSV, похожие на формулу, выгружаются с апострофом в начале (см. escape_formula).
+"""
+import csv
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models.functions import Coalesce
+from django.http import StreamingHttpResponse
+
+from .models import PriceItem, Review
+
+CHUNK_SIZE = 2000
+# Строки склеиваются в блоки такого размера, чтобы не отправлять клиенту по строке за раз
+STREAM_BLOCK_SIZE = 64 * 1024
+
+REVIEW_FIELDS = ('id', 'name', 'email', 'rating', 'is_public', 'created_at', 'review')
+PRICE_FIELDS = ('id', 'service', 'subsection', 'operation_name', 'price', 'duration_minutes')
+
+# Начало ячейки, с которого табличные редакторы разбирают формулу (\t и \r — тоже, по рекомендации OWASP)
+FORMULA_PREFIXES = ('=', '+', '-', '@', '\t', '\r')
+
+
+class Echo:
+    """ Псевдофайл для csv.writer: вместо записи возвращает строку, чтобы её можно было отдать потоком. """
+
+    def write(self, value):
+        return value
+
+
+def filter_reviews(queryset=None, is_public=None, ratings=None, since=None, until=None):
+    """
+    Фильтрует отзывы по публикации, оценкам и дате создания (since включительно, until — нет).
+    """
+    queryset = Review.objects.all() if queryset is None else queryset
+    if is_public is not None:
+        queryset = queryset.filter(is_public=is_public)
+    if ratings:
+        queryset = queryset.filter(rating__in=ratings)
+    if since is not None:
+        queryset = queryset.filter(created_at__gte=since)
+    if until is not None:
+        queryset = queryset.filter(created_at__lt=until)
+    return queryset
+
+
+def review_rows(queryset=None, chunk_size=CHUNK_SIZE):
+    queryset = Review.objects.all() if queryset is None else queryset
+    return queryset.order_by('pk').values_list(*REVIEW_FIELDS).iterator(chunk_size=chunk_size)
+
+
+def price_rows(queryset=None, chunk_size=CHUNK_SIZE):
+    """
+    Позиции прайса с названиями услуги и подраздела, полученными одним JOIN-ом (без запроса на строку).
+    """
+    queryset = PriceItem.objects.all() if queryset is None else queryset
+    return (
+        queryset
+        .annotate(service_name=Coalesce('service__name', 'subsection__service__name'))
+        .order_by('service_name', 'subsection__name', 'operation_name', 'pk')
+        .values_list('id', 'service_name', 'subsection__name', 'operation_name', 'price', 'duration_minutes')
+        .iterator(chunk_size=chunk_size)
+    )
+
+
+def escape_formula(value):
+    """
+    Текст, который Excel и LibreOffice приняли бы за формулу (=, +, -, @), начинается с апострофа:
+    иначе отзыв вида «=HYPERLINK(...)» выполнится у того, кто откроет выгрузку.
+    Числа, даты и прочие нестроковые значения не меняются.
+    """
+    if isinstance(value, str) and value.startswith(FORMULA_PREFIXES):
+        return "'" + value
+    return value
+
+
+def iter_csv(header, rows, bom=False):
+    writer = csv.writer(Echo())
+    if bom:
+        # Excel без BOM открывает UTF-8 как однобайтовую кодировку и портит кириллицу
+        yield '\ufeff'
+    yield writer.writerow(header)
+    for row in rows:
+        yield writer.writerow([escape_formula(value) for value in row])
+
+
+def iter_jsonl(header, rows):
+    encoder = DjangoJSONEncoder(ensure_ascii=False, separators=(',', ':'))
+    for row in rows:
+        yield encoder.encode(dict(zip(header, row))) + '\n'
+
+
+FORMATS = {
+    'csv': (iter_csv, 'text/csv'),
+    'jsonl': (iter_jsonl, 'application/x-ndjson'),
+}
+
+
+def _blocks(lines, block_size=STREAM_BLOCK_SIZE):
+    buffer, size = [], 0
+    for line in lines:
+        buffer.append(line)
+        size += len(line)
+        if size >= block_size:
+            yield ''.join(buffer)
+            buffer, size = [], 0
+    if buffer:
+        yield ''.join(buffer)
+
+
+def streaming_response(filename, export_format, header, rows):
+    """
+    StreamingHttpResponse с выгрузкой в формате export_format ('csv' или 'jsonl').
+    """
+    serializer, content_type = FORMATS[export_format]
+    lines = iter_csv(header, rows, bom=True) if export_format == 'csv' else serializer(header, rows)
+    response = StreamingHttpResponse(
+        _blocks(lines),
+        content_type=f"{content_type}; charset=utf-8",
+    )
+    response['Content-Disposition'] = f'attachment; filename="{filename}.{export_format}"'
+    # Не даём nginx буферизовать ответ целиком — клиент начинает получать файл сразу
+    response['X-Accel-Buffering'] = 'no'
+    return response
+
+
+def write_export(stream, export_format, header, rows):
+    """ Пишет выгрузку в текстовый поток (файл или stdout). Возвращает количество строк данных. """
+    serializer = FORMATS[export_format][0]
+    count = -1 if export_format == 'csv' else 0  # строка заголовка CSV не считается
+    for line in serializer(header, rows):
+        stream.write(line)
+        count += 1
+    return max(count, 0)
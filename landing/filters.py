@@ -0,0 +1,54 @@
+"""
+Фильтры публичного API (django-filter).
+"""
+import django_filters
+from django.db.models import Q
+
+from .models import Address, Master, Review, Service
+
+
+class ServiceFilter(django_filters.FilterSet):
+    name = django_filters.CharFilter(lookup_expr='icontains')
+    branch = django_filters.NumberFilter(method='filter_branch', label="Филиал")
+
+    class Meta:
+        model = Service
+        fields = ('name', 'branch')
+
+    def filter_branch(self, queryset, name, value):
+        # Услуга без филиалов оказывается во всех филиалах
+        return queryset.filter(Q(branches=value) | Q(branches__isnull=True)).distinct()
+
+
+class MasterFilter(django_filters.FilterSet):
+    name = django_filters.CharFilter(lookup_expr='icontains')
+    specialty = django_filters.CharFilter(lookup_expr='icontains')
+    branch = django_filters.NumberFilter(method='filter_branch', label="Филиал")
+
+    class Meta:
+        model = Master
+        fields = ('name', 'specialty', 'branch')
+
+    def filter_branch(self, queryset, name, value):
+        # Мастер без филиала работает во всех филиалах
+        return queryset.filter(Q(branch=value) | Q(branch__isnull=True))
+
+
+class ReviewFilter(django_filters.FilterSet):
+    rating = django_filters.NumberFilter()
+    min_rating = django_filters.NumberFilter(field_name='rating', lookup_expr='gte')
+    since = django_filters.IsoDateTimeFilter(field_name='created_at', lookup_expr='gte')
+    until = django_filters.IsoDateTimeFilter(field_name='created_at', lookup_expr='lt')
+
+    class Meta:
+        model = Review
+        fields = ('rating', 'min_rating', 'since', 'until')
+
+
+class AddressFilter(django_filters.FilterSet):
+    name = django_filters.CharFilter(lookup_expr='icontains')
+    address = django_filters.CharFilter(lookup_expr='icontains')
+
+    class Meta:
+        model = Address
+        fields = ('name', 'address')
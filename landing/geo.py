@@ -0,0 +1,114 @@
+"""
+Поиск ближайших филиалов.
+
+Координаты филиалов переводятся в точки на единичной сфере (x, y, z): евклидово расстояние между
+такими точками монотонно зависит от расстояния по поверхности Земли, поэтому обычное k-d дерево
+в трёх измерениях находит ближайшие филиалы без перебора всей таблицы и без проблем у 180-го меридиана.
+
+Дерево строится в памяти процесса и пересобирается, когда меняется версия модели Address
+(её увеличивают сигналы при любом изменении адресов, см. landing/cache.py).
+"""
+import heapq
+import math
+import threading
+
+from .cache import model_version
+
+EARTH_RADIUS_KM = 6371.0088
+
+
+def to_unit_vector(latitude, longitude):
+    lat, lon = math.radians(latitude), math.radians(longitude)
+    cos_lat = math.cos(lat)
+    return (cos_lat * math.cos(lon), cos_lat * math.sin(lon), math.sin(lat))
+
+
+def chord_to_km(chord):
+    """ Длина хорды единичной сферы -> расстояние по дуге большого круга в километрах. """
+    return 2 * EARTH_RADIUS_KM * math.asin(min(chord / 2, 1.0))
+
+
+class KDTree:
+    """
+    k-d дерево по трёхмерным точкам. Узел — кортеж (точка, значение, ось, левое поддерево, правое поддерево).
+    """
+
+    def __init__(self, items):
+        # items — список пар (точка, значение)
+        self.size = len(items)
+        self.root = self._build(list(items), 0)
+
+    def _build(self, items, depth):
+        if not items:
+            return None
+        axis = depth % 3
+        items.sort(key=lambda item: item[0][axis])
+        median = len(items) // 2
+        point, value = items[median]
+        return (
+            point, value, axis,
+            self._build(items[:median], depth + 1),
+            self._build(items[median + 1:], depth + 1),
+        )
+
+    def nearest(self, point, k=1):
+        """
+        Возвращает до k пар (расстояние, значение), от ближайшей к дальней.
+        """
+        heap = []  # максимальная куча по расстоянию: (-квадрат расстояния, порядковый номер, значение)
+        counter = 0
+        # В стеке пары (узел, квадрат расстояния до разделяющей плоскости — нижняя граница для поддерева)
+        stack = [(self.root, 0.0)]
+        while stack:
+            node, bound = stack.pop()
+            if node is None or (len(heap) == k and bound >= -heap[0][0]):
+                continue
+            node_point, value, axis, left, right = node
+            dist2 = sum((a - b) ** 2 for a, b in zip(point, node_point))
+            counter += 1
+            if len(heap) < k:
+                heapq.heappush(heap, (-dist2, counter, value))
+            elif dist2 < -heap[0][0]:
+                heapq.heapreplace(heap, (-dist2, counter, value))
+
+            diff = point[axis] - node_point[axis]
+            near, far = (left, right) if diff < 0 else (right, left)
+            # Дальнее поддерево проверяется после ближнего, когда кандидаты уже найдены
+            stack.append((far, diff * diff))
+            stack.append((near, bound))
+        return [(math.sqrt(-d2), value) for d2, _, value in sorted(heap, reverse=True)]
+
+
+_lock = threading.Lock()
+_index = (None, None)  # (версия Address, KDTree)
+
+
+def branch_index():
+    """
+    Дерево филиалов для текущей версии Address. Пересобирается при изменении адресов.
+    """
+    global _index
+    from .models import Address
+
+    version = model_version(Address)
+    cached_version, tree = _index
+    if cached_version == version:
+        return tree
+    with _lock:
+        cached_version, tree = _index
+        if cached_version != version:
+            rows = Address.objects.values_list('pk', 'latitude', 'longitude')
+            tree = KDTree([(to_unit_vector(lat, lon), pk) for pk, lat, lon in rows])
+            _index = (version, tree)
+    return tree
+
+
+def nearest_branches(latitude, longitude, limit=1):
+    """
+    Возвращает список пар (id филиала, расстояние в км) от ближайшего к дальнему.
+    """
+    tree = branch_index()
+    return [
+        (pk, chord_to_km(chord))
+        for chord, pk in tree.nearest(to_unit_vector(latitude, longitude), k=limit)
+    ]
@@ -0,0 +1,196 @@
+"""
+Обработка изображений для моделей landing (Pillow).
+
+Pillow импортируется внутри функций: модуль подключают models.py (валидатор) и сигналы, то есть каждый
+процесс при django.setup(), а изображения обрабатывают только загрузка в админке и фоновые задачи.
+"""
+import base64
+from io import BytesIO
+
+from django.core.exceptions import ValidationError
+
+# Сторона крошечного превью-заглушки (LQIP), которое встраивается прямо в HTML
+PLACEHOLDER_SIZE = 16
+
+# Суффиксы полей модели, в которых хранятся метаданные изображения.
+# Для поля photo это photo_width, photo_height, photo_bytes, photo_color, photo_placeholder.
+META_SUFFIXES = ('width', 'height', 'bytes', 'color', 'placeholder')
+
+# Форматы, которые сохраняются как есть; остальные перекодируются в JPEG или PNG
+NORMALIZED_FORMATS = {'JPEG': '.jpg', 'PNG': '.png', 'WEBP': '.webp'}
+
+# Ключи Image.info с метаданными, которые не нужны посетителям сайта
+METADATA_KEYS = ('exif', 'xmp', 'XML:com.adobe.xmp', 'comment', 'photoshop')
+
+
+def meta_field_names(field_name):
+    """
+    Возвращает словарь {ключ метаданных: имя поля модели} для ImageField.
+    """
+    return {suffix: f"{field_name}_{suffix}" for suffix in META_SUFFIXES}
+
+
+def empty_metadata():
+    return {'width': None, 'height': None, 'bytes': None, 'color': '', 'placeholder': ''}
+
+
+def _file_size(fileobj):
+    size = getattr(fileobj, 'size', None)
+    if size is not None:
+        return size
+    position = fileobj.tell()
+    fileobj.seek(0, 2)
+    size = fileobj.tell()
+    fileobj.seek(position)
+    return size
+
+
+def dominant_color(image):
+    """
+    Возвращает преобладающий цвет изображения в формате #rrggbb.
+    Цвета квантуются до небольшой палитры, выбирается самый частый.
+    """
+    quantized = image.convert('RGB').quantize(colors=4)
+    palette = quantized.getpalette()
+    count, index = max(quantized.getcolors())
+    red, green, blue = palette[index * 3:index * 3 + 3]
+    return f"#{red:02x}{green:02x}{blue:02x}"
+
+
+def placeholder_data_uri(image):
+    """
+    Кодирует крошечное превью в data: URI (WebP, если Pillow собран с его поддержкой).
+    """
+    from PIL import features
+
+    buffer = BytesIO()
+    if features.check('webp'):
+        image.save(buffer, 'WEBP', quality=40, method=6)
+        mime = 'image/webp'
+    else:
+        image.save(buffer, 'JPEG', quality=40, optimize=True)
+        mime = 'image/jpeg'
+    encoded = base64.b64encode(buffer.getvalue()).decode('ascii')
+    return f"data:{mime};base64,{encoded}"
+
+
+def extract_metadata(fileobj):
+    """
+    Извлекает из файла изображения размеры, размер в байтах, преобладающий цвет и LQIP.
+
+    Для JPEG используется draft(): декодер сразу уменьшает картинку в 2–8 раз,
+    поэтому даже большие фото не разворачиваются в память целиком.
+    """
+    from PIL import Image
+
+    fileobj.seek(0)
+    size = _file_size(fileobj)
+    with Image.open(fileobj) as image:
+        width, height = image.size
+        image.draft('RGB', (PLACEHOLDER_SIZE * 4, PLACEHOLDER_SIZE * 4))
+        small = image.convert('RGB')
+    small.thumbnail((PLACEHOLDER_SIZE, PLACEHOLDER_SIZE))
+    fileobj.seek(0)
+    return {
+        'width': width,
+        'height': height,
+        'bytes': size,
+        'color': dominant_color(small),
+        'placeholder': placeholder_data_uri(small),
+    }
+
+
+def image_size(fileobj):
+    """
+    Ширина и высота изображения. Читается только заголовок файла, без декодирования пикселей.
+    """
+    from PIL import Image
+
+    fileobj.seek(0)
+    with Image.open(fileobj) as image:
+        size = image.size
+    fileobj.seek(0)
+    return size
+
+
+def check_image_limits(fileobj, max_bytes, max_pixels):
+    """
+    Проверяет размер файла и количество пикселей, не декодируя изображение.
+    Image.open читает только заголовок, поэтому «бомба декомпрессии» отсекается до выделения памяти.
+    """
+    from PIL import Image
+
+    size = _file_size(fileobj)
+    if size > max_bytes:
+        raise ValidationError(
+            f"Файл слишком большой: {size // 1024} КБ, допустимо не более {max_bytes // 1024} КБ."
+        )
+    fileobj.seek(0)
+    try:
+        with Image.open(fileobj) as image:
+            width, height = image.size
+    except Image.DecompressionBombError:
+        raise ValidationError("Изображение содержит слишком много пикселей.")
+    finally:
+        fileobj.seek(0)
+    if width * height > max_pixels:
+        raise ValidationError(
+            f"Изображение {width}×{height} слишком большое: допустимо не более {max_pixels} пикселей."
+        )
+
+
+def normalize_image(fileobj, max_edge, quality=85):
+    """
+    Подготавливает загруженное изображение к хранению:
+    поворачивает по EXIF-ориентации, удаляет метаданные и уменьшает до max_edge по длинной стороне.
+
+    Возвращает кортеж (байты, расширение) или None, если файл уже в порядке и перекодировать его не нужно.
+    Для JPEG используется draft(): декодер сразу масштабирует картинку в 2–8 раз,
+    а thumbnail() с reducing_gap сначала дёшево уменьшает её через reduce().
+    """
+    from PIL import ExifTags, Image, ImageOps
+
+    fileobj.seek(0)
+    with Image.open(fileobj) as image:
+        if getattr(image, 'is_animated', False):
+            # анимацию не трогаем, чтобы не потерять кадры
+            fileobj.seek(0)
+            return None
+
+        source_format = image.format
+        orientation = image.getexif().get(ExifTags.Base.Orientation, 1)
+        has_metadata = any(key in image.info for key in METADATA_KEYS)
+        too_big = max(image.size) > max_edge
+        if source_format in NORMALIZED_FORMATS and not (too_big or has_metadata or orientation != 1):
+            fileobj.seek(0)
+            return None
+
+        if source_format == 'JPEG':
+            image.draft('RGB' if image.mode not in ('RGB', 'L') else image.mode, (max_edge, max_edge))
+        icc_profile = image.info.get('icc_profile')
+
+        result = ImageOps.exif_transpose(image)
+        result.thumbnail((max_edge, max_edge), Image.Resampling.LANCZOS, reducing_gap=3.0)
+
+    if source_format in NORMALIZED_FORMATS:
+        target_format = source_format
+    else:
+        target_format = 'PNG' if 'A' in result.getbands() else 'JPEG'
+
+    params = {}
+    if target_format == 'JPEG':
+        if result.mode not in ('RGB', 'L'):
+            result = result.convert('RGB')
+        params = {'quality': quality, 'optimize': True, 'progressive': True}
+    elif target_format == 'WEBP':
+        params = {'quality': quality, 'method': 6}
+    elif target_format == 'PNG':
+        params = {'optimize': True}
+    if icc_profile:
+        # цветовой профиль — не метаданные: без него цвета могут исказиться
+        params['icc_profile'] = icc_profile
+
+    buffer = BytesIO()
+    result.save(buffer, target_format, **params)
+    fileobj.seek(0)
+    return buffer.getvalue(), NORMALIZED_FORMATS[target_format]
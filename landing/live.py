@@ -0,0 +1,220 @@
+"""
+Живая лента отзывов: Server-Sent Events с только что опубликованными отзывами.
+
+Публикация отзыва (переход is_public False -> True в админке или в модерации пачкой) после коммита
+дописывает событие строкой JSON в журнал LANDING_LIVE_EVENTS_PATH. Журнал — локальная замена
+pub/sub-брокера: в него пишут любые процессы (веб-воркеры, воркер задач, manage.py),
+а читает его один Broadcaster на процесс ASGI-сервера и раздаёт события всем подключённым страницам.
+
+Подключение — это корутина, ждущая свою asyncio.Queue: ни потоков, ни запросов к БД на клиента,
+поэтому процесс держит тысячи простаивающих соединений. Без ASGI (runserver, WSGI) лента отключена:
+вьюха отвечает 204, и EventSource больше не переподключается.
+"""
+import asyncio
+import collections
+import fcntl
+import json
+import os
+import time
+
+from django.conf import settings
+
+# Журнал переименовывается в <путь>.1, когда превышает этот размер
+LOG_MAX_BYTES = 1024 * 1024
+# Сколько последних событий помнит процесс — для переподключившихся клиентов (Last-Event-ID)
+HISTORY_SIZE = 50
+# События для клиента, который не успевает их забирать, отбрасываются
+QUEUE_SIZE = 20
+# Пауза, с которой EventSource переподключается после обрыва, мс
+RETRY_MS = 5000
+
+
+def get_log_path():
+    return str(getattr(settings, 'LANDING_LIVE_EVENTS_PATH', os.path.join(settings.BASE_DIR, 'cache', 'review-events.log')))
+
+
+def review_event(review):
+    """ Данные отзыва для страницы — те же поля, что выводит секция отзывов (без email). """
+    return {
+        'id': review.pk,
+        'name': review.name,
+        'review': review.review,
+        'rating': review.rating,
+        # секция показывает дату только у отзывов с email
+        'date': review.created_at.strftime('%d.%m.%Y') if review.email and review.created_at else None,
+    }
+
+
+def append_events(events, path=None):
+    """
+    Дописывает события в журнал одной записью. Блокировка нужна для ротации:
+    строки из разных процессов не перемешиваются и не теряются при переименовании файла.
+    """
+    path = path or get_log_path()
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    data = ''.join(
+        json.dumps({'event_id': f"{time.time_ns() // 1000}-{n}", **event}, ensure_ascii=False) + '\n'
+        for n, event in enumerate(events)
+    ).encode('utf-8')
+    if not data:
+        return
+    while True:
+        fd = os.open(path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+        fcntl.flock(fd, fcntl.LOCK_EX)
+        try:
+            stat = os.fstat(fd)
+            # пока ждали блокировку, другой процесс мог переименовать файл — тогда открываем новый
+            if os.stat(path).st_ino == stat.st_ino:
+                if stat.st_size <= LOG_MAX_BYTES:
+                    os.write(fd, data)
+                    return
+                os.replace(path, f"{path}.1")
+        except FileNotFoundError:
+            pass
+        finally:
+            os.close(fd)
+
+
+def broadcast_reviews(review_ids):
+    """ Отправляет опубликованные отзывы в живую ленту (вызывается после коммита). """
+    from .models import Review
+
+    reviews = Review.objects.filter(pk__in=list(review_ids), is_public=True).order_by('created_at')
+    append_events([review_event(review) for review in reviews])
+
+
+class LogReader:
+    """
+    Читает новые строки журнала с места последнего чтения; переживает ротацию файла.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.file = None
+        self.buffer = b''
+        self.started = False
+
+    def _open(self, at_end):
+        try:
+            self.file = open(self.path, 'rb')
+        except FileNotFoundError:
+            self.file = None
+            return
+        if at_end:
+            self.file.seek(0, os.SEEK_END)
+
+    def read(self):
+        """ Возвращает список новых событий. При первом вызове журнал пропускается до конца. """
+        if self.file is None:
+            # журнал, появившийся после запуска, читается с начала
+            self._open(at_end=not self.started)
+            self.started = True
+            if self.file is None:
+                return []
+        lines = self._read_lines()
+        try:
+            rotated = os.stat(self.path).st_ino != os.fstat(self.file.fileno()).st_ino
+        except FileNotFoundError:
+            rotated = False
+        if rotated:
+            # дочитали старый файл до конца, новый — с начала
+            self.file.close()
+            self.buffer = b''
+            self._open(at_end=False)
+            if self.file is not None:
+                lines += self._read_lines()
+        events = []
+        for line in lines:
+            try:
+                events.append(json.loads(line))
+            except ValueError:
+                continue
+        return events
+
+    def _read_lines(self):
+        data = self.buffer + self.file.read()
+        *lines, self.buffer = data.split(b'\n')
+        return [line for line in lines if line]
+
+    def close(self):
+        if self.file is not None:
+            self.file.close()
+            self.file = None
+
+
+class Broadcaster:
+    """
+    Раздаёт события журнала подписчикам одного процесса. Журнал опрашивается, пока есть подписчики.
+    """
+
+    def __init__(self, path=None, poll_interval=None):
+        self.path = path
+        self.poll_interval = poll_interval
+        self.subscribers = set()
+        self.history = collections.deque(maxlen=HISTORY_SIZE)
+        self._task = None
+
+    def subscribe(self, last_event_id=None):
+        queue = asyncio.Queue(maxsize=QUEUE_SIZE)
+        ids = [event['event_id'] for event in self.history]
+        if last_event_id in ids:
+            for event in list(self.history)[ids.index(last_event_id) + 1:][-QUEUE_SIZE:]:
+                queue.put_nowait(event)
+        self.subscribers.add(queue)
+        if self._task is None or self._task.done():
+            self._task = asyncio.get_running_loop().create_task(self._run())
+        return queue
+
+    def unsubscribe(self, queue):
+        self.subscribers.discard(queue)
+
+    async def _run(self):
+        reader = LogReader(self.path or get_log_path())
+        poll_interval = self.poll_interval or getattr(settings, 'LANDING_LIVE_POLL_INTERVAL', 0.5)
+        try:
+            while self.subscribers:
+                # stat и чтение нескольких новых строк — дешевле, чем переход в поток
+                for event in reader.read():
+                    self.history.append(event)
+                    for queue in list(self.subscribers):
+                        if not queue.full():
+                            queue.put_nowait(event)
+                await asyncio.sleep(poll_interval)
+        finally:
+            reader.close()
+
+
+_broadcaster = None
+
+
+def get_broadcaster():
+    global _broadcaster
+    if _broadcaster is None:
+        _broadcaster = Broadcaster()
+    return _broadcaster
+
+
+def format_event(event):
+    data = json.dumps({key: value for key, value in event.items() if key != 'event_id'}, ensure_ascii=False)
+    return f"id: {event['event_id']}\nevent: review\ndata: {data}\n\n"
+
+
+async def event_stream(last_event_id=None):
+    """
+    Поток SSE для одного подключения. Раз в LANDING_LIVE_HEARTBEAT секунд отправляется комментарий,
+    чтобы прокси не закрывали простаивающее соединение.
+    """
+    heartbeat = getattr(settings, 'LANDING_LIVE_HEARTBEAT', 20)
+    broadcaster = get_broadcaster()
+    queue = broadcaster.subscribe(last_event_id)
+    try:
+        yield f"retry: {RETRY_MS}\n\n"
+        while True:
+            try:
+                event = await asyncio.wait_for(queue.get(), timeout=heartbeat)
+            except asyncio.TimeoutError:
+                yield ": ping\n\n"
+                continue
+            yield format_event(event)
+    finally:
+        broadcaster.unsubscribe(queue)
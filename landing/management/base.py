@@ -0,0 +1,12 @@
+from django.core.management.base import BaseCommand
+
+
+class LandingCommand(BaseCommand):
+    """
+    Базовый класс команд landing.
+
+    Команды запускаются по расписанию и воркерами, поэтому системные проверки Django перед ними
+    не выполняются: проверки импортируют все URL-ы, вьюхи, DRF и админку и заметно удлиняют запуск.
+    Проверить проект целиком можно командой `manage.py check` (её запускают при деплое).
+    """
+    requires_system_checks = []
@@ -0,0 +1,34 @@
+from landing.management.base import LandingCommand
+from landing.retention import archive_reviews
+
+
+class Command(LandingCommand):
+    help = (
+        "Переносит в архив (ArchivedReviewBatch) старые отклонённые и давно опубликованные отзывы "
+        "по LANDING_REVIEW_ARCHIVE_REJECTED_DAYS / LANDING_REVIEW_ARCHIVE_PUBLIC_DAYS."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dry-run', action='store_true', help='Только посчитать, сколько отзывов будет перенесено.')
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=None,
+            help='Отзывов в одной транзакции (по умолчанию LANDING_REVIEW_ARCHIVE_BATCH_SIZE).',
+        )
+        parser.add_argument('--pause', type=float, default=0.0, help='Пауза между пачками, секунды.')
+
+    def handle(self, *args, dry_run=False, batch_size=None, pause=0.0, **options):
+        log = self.stdout.write if options['verbosity'] > 1 else None
+        report = archive_reviews(batch_size=batch_size, pause=pause, dry_run=dry_run, log=log)
+
+        if not report.counts:
+            self.stdout.write("Политики хранения отзывов не заданы.")
+            return
+        counts = ', '.join(f"{reason}: {count}" for reason, count in report.counts.items())
+        if dry_run:
+            self.stdout.write(self.style.SUCCESS(f"[dry-run] Будет перенесено в архив: {counts}."))
+        else:
+            self.stdout.write(self.style.SUCCESS(
+                f"Перенесено в архив: {counts}; пачек: {report.batches}, {report.bytes} байт (gzip)."
+            ))
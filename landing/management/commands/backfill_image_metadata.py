@@ -0,0 +1,70 @@
+from concurrent.futures import ThreadPoolExecutor
+from itertools import islice
+
+from landing.cache import bump_model_version
+from landing.imaging import extract_metadata, meta_field_names
+from landing.management.base import LandingCommand
+from landing.prerender import schedule_prerender
+from landing.signals import IMAGE_FIELDS
+
+
+def _compute(storage, name):
+    """
+    Считает метаданные одного файла. Выполняется в пуле потоков:
+    Pillow отпускает GIL при декодировании, поэтому потоки работают параллельно.
+    """
+    try:
+        with storage.open(name, 'rb') as fh:
+            return name, extract_metadata(fh), None
+    except Exception as exc:  # повреждённый или отсутствующий файл не должен останавливать backfill
+        return name, None, exc
+
+
+class Command(LandingCommand):
+    help = "Заполняет размеры, размер файла, преобладающий цвет и LQIP для уже загруженных изображений."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=4, help='Количество потоков обработки.')
+        parser.add_argument('--batch-size', type=int, default=200, help='Сколько строк обрабатывать за раз.')
+        parser.add_argument('--force', action='store_true', help='Пересчитать метаданные и для заполненных строк.')
+
+    def handle(self, *args, workers=4, batch_size=200, force=False, **options):
+        processed = failed = 0
+        touched = set()
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            for model, field_names in IMAGE_FIELDS.items():
+                for field_name in field_names:
+                    fields = meta_field_names(field_name)
+                    queryset = model.objects.exclude(**{field_name: ''}).exclude(**{f"{field_name}__isnull": True})
+                    if not force:
+                        queryset = queryset.filter(**{fields['placeholder']: ''})
+                    rows = queryset.values_list('pk', field_name).iterator(chunk_size=batch_size)
+                    storage = model._meta.get_field(field_name).storage
+
+                    while True:
+                        batch = list(islice(rows, batch_size))
+                        if not batch:
+                            break
+                        names = {name for pk, name in batch}
+                        results = {
+                            name: (metadata, error)
+                            for name, metadata, error in executor.map(lambda n: _compute(storage, n), names)
+                        }
+                        for pk, name in batch:
+                            metadata, error = results[name]
+                            if error is not None:
+                                failed += 1
+                                self.stderr.write(f"{model._meta.label}#{pk} {name}: {error}")
+                                continue
+                            model.objects.filter(pk=pk).update(
+                                **{attname: metadata[key] for key, attname in fields.items()}
+                            )
+                            processed += 1
+                            touched.add(model)
+
+        if touched:
+            # update() обходит сигналы: секции и ответы API в кеше ещё без новых размеров и превью
+            bump_model_version(*touched)
+            schedule_prerender()
+
+        self.stdout.write(self.style.SUCCESS(f"Обновлено строк: {processed}, ошибок: {failed}."))
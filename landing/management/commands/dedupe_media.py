@@ -0,0 +1,124 @@
+import os
+import posixpath
+import shutil
+
+from django.db import transaction
+
+from landing.cache import bump_model_version
+from landing.management.base import LandingCommand
+from landing.prerender import schedule_prerender
+from landing.storage import hash_file, hashed_name, image_fields, is_hashed_name, media_storage
+
+
+class Command(LandingCommand):
+    help = (
+        "Переносит уже загруженные изображения в контентно-адресуемое хранилище: "
+        "одинаковые файлы сливаются в один, ссылки в БД переписываются на имена по хешу."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Только показать, что будет сделано, ничего не меняя.',
+        )
+        parser.add_argument(
+            '--keep-originals',
+            action='store_true',
+            help='Не удалять исходные файлы после переписывания ссылок.',
+        )
+
+    def handle(self, *args, dry_run=False, keep_originals=False, **options):
+        # старое имя -> новое имя; один и тот же файл может встречаться в нескольких полях
+        renamed = {}
+        # сколько байт занимают новые файлы, которых раньше не было
+        self._created_bytes = 0
+        self._created = set()
+        missing = 0
+        updated_rows = 0
+        # модели, в которых переписаны ссылки: их секции и ответы API в кеше указывают на старые файлы
+        touched = set()
+
+        for model, field in image_fields():
+            label = f"{model._meta.label}.{field.name}"
+            names = (
+                model.objects.exclude(**{field.name: ''})
+                .exclude(**{f"{field.name}__isnull": True})
+                .values_list(field.name, flat=True)
+                .distinct()
+                .iterator(chunk_size=500)
+            )
+            for name in names:
+                if is_hashed_name(name):
+                    continue
+                if name not in renamed:
+                    new_name = self._hashed_copy(name, dry_run)
+                    if new_name is None:
+                        missing += 1
+                        self.stderr.write(f"{label}: файл не найден — {name}")
+                        continue
+                    renamed[name] = new_name
+
+                new_name = renamed[name]
+                self.stdout.write(f"{label}: {name} -> {new_name}")
+                if not dry_run:
+                    with transaction.atomic():
+                        updated = model.objects.filter(**{field.name: name}).update(**{field.name: new_name})
+                    updated_rows += updated
+                    if updated:
+                        touched.add(model)
+
+        if touched:
+            # до удаления исходников: иначе закешированные страницы ссылаются на уже удалённые файлы
+            bump_model_version(*touched)
+            schedule_prerender()
+
+        reclaimed = -self._created_bytes
+        unique_targets = set(renamed.values())
+        if not keep_originals:
+            for old_name in renamed:
+                if not dry_run and self._is_referenced(old_name):
+                    continue
+                reclaimed += media_storage.size(old_name)
+                if not dry_run:
+                    media_storage.delete(old_name)
+
+        prefix = '[dry-run] ' if dry_run else ''
+        self.stdout.write(self.style.SUCCESS(
+            f"{prefix}Файлов обработано: {len(renamed)}, уникальных: {len(unique_targets)}, "
+            f"строк обновлено: {updated_rows}, не найдено: {missing}, "
+            f"освобождено: {max(reclaimed, 0)} байт."
+        ))
+
+    def _hashed_copy(self, name, dry_run):
+        """
+        Кладёт копию файла под имя по хешу и возвращает это имя (None, если исходника нет).
+        По возможности используется жёсткая ссылка, чтобы не копировать байты.
+        """
+        if not media_storage.exists(name):
+            return None
+        with media_storage.open(name, 'rb') as fh:
+            digest = hash_file(fh)
+        new_name = hashed_name(posixpath.dirname(name), digest, os.path.splitext(name)[1])
+        if media_storage.exists(new_name):
+            return new_name
+        if new_name not in self._created:
+            self._created.add(new_name)
+            self._created_bytes += media_storage.size(name)
+        if dry_run:
+            return new_name
+
+        source = media_storage.path(name)
+        target = media_storage.path(new_name)
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        try:
+            os.link(source, target)
+        except OSError:
+            shutil.copy2(source, target)
+        return new_name
+
+    def _is_referenced(self, name):
+        for model, field in image_fields():
+            if model.objects.filter(**{field.name: name}).exists():
+                return True
+        return False
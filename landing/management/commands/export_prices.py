@@ -0,0 +1,21 @@
+from landing.exports import CHUNK_SIZE, FORMATS, PRICE_FIELDS, price_rows, write_export
+from landing.management.base import LandingCommand
+
+
+class Command(LandingCommand):
+    help = "Потоково выгружает весь прайс (услуга, подраздел, операция, цена) в CSV или JSON Lines."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--format', choices=list(FORMATS), default='csv', dest='export_format')
+        parser.add_argument('--output', '-o', default=None, help='Файл для выгрузки (по умолчанию stdout).')
+        parser.add_argument('--chunk-size', type=int, default=CHUNK_SIZE, help='Сколько строк читать из БД за раз.')
+
+    def handle(self, *args, export_format='csv', output=None, chunk_size=CHUNK_SIZE, **options):
+        rows = price_rows(chunk_size=chunk_size)
+
+        if output:
+            with open(output, 'w', encoding='utf-8', newline='') as stream:
+                count = write_export(stream, export_format, PRICE_FIELDS, rows)
+            self.stderr.write(self.style.SUCCESS(f"Выгружено позиций: {count} -> {output}"))
+        else:
+            write_export(self.stdout, export_format, PRICE_FIELDS, rows)
@@ -0,0 +1,50 @@
+import datetime
+
+from django.core.management.base import CommandError
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+
+from landing.exports import CHUNK_SIZE, FORMATS, REVIEW_FIELDS, filter_reviews, review_rows, write_export
+from landing.management.base import LandingCommand
+
+
+def _date(value):
+    try:
+        parsed = parse_date(value)
+    except ValueError:
+        parsed = None
+    if parsed is None:
+        raise CommandError(f"Неверная дата '{value}', ожидается ГГГГ-ММ-ДД.")
+    return timezone.make_aware(datetime.datetime.combine(parsed, datetime.time.min))
+
+
+class Command(LandingCommand):
+    help = "Потоково выгружает отзывы в CSV или JSON Lines (в файл или stdout)."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--format', choices=list(FORMATS), default='csv', dest='export_format')
+        parser.add_argument('--output', '-o', default=None, help='Файл для выгрузки (по умолчанию stdout).')
+        public = parser.add_mutually_exclusive_group()
+        public.add_argument('--public', action='store_const', const=True, dest='is_public', help='Только опубликованные.')
+        public.add_argument('--hidden', action='store_const', const=False, dest='is_public', help='Только неопубликованные.')
+        parser.add_argument('--rating', type=int, action='append', choices=range(1, 6), help='Оценка (можно повторять).')
+        parser.add_argument('--since', default=None, help='С даты (ГГГГ-ММ-ДД, включительно).')
+        parser.add_argument('--until', default=None, help='По дату (ГГГГ-ММ-ДД, не включая).')
+        parser.add_argument('--chunk-size', type=int, default=CHUNK_SIZE, help='Сколько строк читать из БД за раз.')
+
+    def handle(self, *args, export_format='csv', output=None, is_public=None, rating=None,
+               since=None, until=None, chunk_size=CHUNK_SIZE, **options):
+        queryset = filter_reviews(
+            is_public=is_public,
+            ratings=rating,
+            since=_date(since) if since else None,
+            until=_date(until) if until else None,
+        )
+        rows = review_rows(queryset, chunk_size=chunk_size)
+
+        if output:
+            with open(output, 'w', encoding='utf-8', newline='') as stream:
+                count = write_export(stream, export_format, REVIEW_FIELDS, rows)
+            self.stderr.write(self.style.SUCCESS(f"Выгружено отзывов: {count} -> {output}"))
+        else:
+            write_export(self.stdout, export_format, REVIEW_FIELDS, rows)
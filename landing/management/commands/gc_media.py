@@ -0,0 +1,36 @@
+from landing.management.base import LandingCommand
+from landing.media_gc import collect_garbage
+
+
+class Command(LandingCommand):
+    help = (
+        "Переносит в карантин медиафайлы, на которые не ссылается ни одна модель, "
+        "и удаляет файлы, пролежавшие в карантине дольше grace-периода."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Только посчитать, сколько места будет освобождено.',
+        )
+        parser.add_argument(
+            '--grace-hours',
+            type=float,
+            default=None,
+            help='Grace-период в часах (по умолчанию LANDING_MEDIA_GC_GRACE_HOURS).',
+        )
+
+    def handle(self, *args, dry_run=False, grace_hours=None, **options):
+        grace_seconds = None if grace_hours is None else grace_hours * 3600
+        log = self.stdout.write if options['verbosity'] > 1 else None
+
+        report = collect_garbage(dry_run=dry_run, grace_seconds=grace_seconds, log=log)
+
+        prefix = '[dry-run] ' if dry_run else ''
+        self.stdout.write(self.style.SUCCESS(
+            f"{prefix}Просмотрено файлов: {report.scanned}, используется: {report.referenced}, "
+            f"в карантин: {report.quarantined} ({report.quarantined_bytes} байт), "
+            f"возвращено: {report.restored}, "
+            f"удалено: {report.deleted} ({report.deleted_bytes} байт)."
+        ))
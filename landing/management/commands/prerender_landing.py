@@ -0,0 +1,24 @@
+from django.core.management.base import CommandError
+
+from landing.management.base import LandingCommand
+from landing.prerender import get_prerender_root, prerender_landing
+
+
+class Command(LandingCommand):
+    help = "Рендерит главную страницу и JSON секций в статические файлы для отдачи через nginx."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--output',
+            default=None,
+            help='Каталог для файлов (по умолчанию LANDING_PRERENDER_ROOT).',
+        )
+
+    def handle(self, *args, output=None, **options):
+        root = output or get_prerender_root()
+        if not root:
+            raise CommandError("Укажите --output или задайте LANDING_PRERENDER_ROOT в настройках.")
+
+        for path in prerender_landing(root):
+            self.stdout.write(path)
+        self.stdout.write(self.style.SUCCESS("Главная страница отрендерена."))
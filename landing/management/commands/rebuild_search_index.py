@@ -0,0 +1,17 @@
+import time
+
+from landing.management.base import LandingCommand
+from landing.search import rebuild_index
+
+
+class Command(LandingCommand):
+    help = "Пересобирает поисковый индекс по услугам, подразделам и позициям прайса."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=200, help='Сколько записей индекса вставлять за раз.')
+
+    def handle(self, *args, batch_size=200, **options):
+        started = time.perf_counter()
+        total = rebuild_index(batch_size=batch_size)
+        elapsed = time.perf_counter() - started
+        self.stdout.write(self.style.SUCCESS(f"Проиндексировано записей: {total} за {elapsed:.2f} с."))
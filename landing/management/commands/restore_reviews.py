@@ -0,0 +1,53 @@
+import datetime
+
+from django.core.management.base import CommandError
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+
+from landing.management.base import LandingCommand
+from landing.models import ArchivedReviewBatch
+from landing.retention import restore_reviews
+
+
+def _date(value):
+    try:
+        parsed = parse_date(value)
+    except ValueError:
+        parsed = None
+    if parsed is None:
+        raise CommandError(f"Неверная дата '{value}', ожидается ГГГГ-ММ-ДД.")
+    return timezone.make_aware(datetime.datetime.combine(parsed, datetime.time.min))
+
+
+class Command(LandingCommand):
+    help = "Возвращает отзывы из архива (ArchivedReviewBatch) в таблицу отзывов."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch', type=int, action='append', dest='batch_ids', help='id пачки (можно повторять).')
+        parser.add_argument('--reason', choices=[choice for choice, _ in ArchivedReviewBatch.REASON_CHOICES])
+        parser.add_argument('--since', default=None, help='Отзывы с даты (ГГГГ-ММ-ДД, включительно).')
+        parser.add_argument('--until', default=None, help='Отзывы по дату (ГГГГ-ММ-ДД, не включая).')
+        parser.add_argument('--email', default=None, help='Только отзывы с этим email.')
+        parser.add_argument('--all', action='store_true', help='Восстановить весь архив.')
+        parser.add_argument('--dry-run', action='store_true', help='Только посчитать.')
+
+    def handle(self, *args, batch_ids=None, reason=None, since=None, until=None, email=None, dry_run=False,
+               **options):
+        if not (batch_ids or reason or since or until or email or options['all']):
+            raise CommandError("Укажите, что восстановить (--batch, --reason, --since/--until, --email), или --all.")
+        log = self.stdout.write if options['verbosity'] > 1 else None
+        report = restore_reviews(
+            batch_ids=batch_ids,
+            reason=reason,
+            since=_date(since) if since else None,
+            until=_date(until) if until else None,
+            email=email,
+            dry_run=dry_run,
+            log=log,
+        )
+
+        prefix = '[dry-run] ' if dry_run else ''
+        message = f"{prefix}Восстановлено отзывов: {report.counts['restored']} из пачек: {report.batches}."
+        if report.skipped:
+            message += f" Оставлено в архиве {report.skipped}: с тем же email уже есть отзыв."
+        self.stdout.write(self.style.SUCCESS(message))
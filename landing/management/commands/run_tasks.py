@@ -0,0 +1,103 @@
+import multiprocessing
+import signal
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, ThreadPoolExecutor, wait
+
+import django
+from django.conf import settings
+from django.db import connections
+from django.utils.module_loading import autodiscover_modules
+
+from landing.management.base import LandingCommand
+from landing.taskqueue import claim_tasks, execute_task, purge_finished_tasks, release_stale_tasks, worker_id
+
+
+def _init_process():
+    # Процессы пула запускаются через spawn (без унаследованных соединений с БД) — настраиваем Django заново
+    django.setup()
+    autodiscover_modules('tasks')
+
+
+class Command(LandingCommand):
+    help = "Воркер фоновых задач landing: забирает задачи из таблицы Task и выполняет их в пуле."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--concurrency',
+            type=int,
+            default=None,
+            help='Сколько задач выполнять одновременно (по умолчанию LANDING_TASKS_CONCURRENCY).',
+        )
+        parser.add_argument(
+            '--pool',
+            choices=('thread', 'process'),
+            default='thread',
+            help='Пул потоков (для задач с вводом-выводом) или процессов (для тяжёлых вычислений).',
+        )
+        parser.add_argument(
+            '--once',
+            action='store_true',
+            help='Выполнить готовые задачи и завершиться (для cron).',
+        )
+
+    def handle(self, *args, concurrency=None, pool='thread', once=False, **options):
+        concurrency = concurrency or settings.LANDING_TASKS_CONCURRENCY
+        poll_interval = settings.LANDING_TASKS_POLL_INTERVAL
+        worker = worker_id()
+        autodiscover_modules('tasks')
+
+        self._stopping = False
+        signal.signal(signal.SIGTERM, self._stop)
+        signal.signal(signal.SIGINT, self._stop)
+
+        connections.close_all()
+        if pool == 'process':
+            # spawn, а не fork: соединения с БД нельзя разделять между процессами
+            executor = ProcessPoolExecutor(
+                max_workers=concurrency,
+                mp_context=multiprocessing.get_context('spawn'),
+                initializer=_init_process,
+            )
+        else:
+            executor = ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix='landing-task')
+
+        self.stdout.write(f"Воркер {worker}: пул {pool}, параллельно {concurrency}.")
+        in_flight = set()
+        done_count = failed_count = 0
+        last_maintenance = float('-inf')
+
+        with executor:
+            while not self._stopping:
+                if time.monotonic() - last_maintenance > poll_interval * 60:
+                    release_stale_tasks()
+                    purge_finished_tasks()
+                    last_maintenance = time.monotonic()
+
+                for task_id in claim_tasks(concurrency - len(in_flight), worker):
+                    in_flight.add(executor.submit(execute_task, task_id))
+
+                if not in_flight:
+                    if once:
+                        break
+                    time.sleep(poll_interval)
+                    continue
+
+                finished, in_flight = wait(in_flight, timeout=poll_interval, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    if future.result():
+                        done_count += 1
+                    else:
+                        failed_count += 1
+
+            # Дожидаемся задач, которые уже выполняются
+            for future in wait(in_flight).done:
+                if future.result():
+                    done_count += 1
+                else:
+                    failed_count += 1
+
+        self.stdout.write(self.style.SUCCESS(f"Выполнено задач: {done_count}, с ошибкой: {failed_count}."))
+
+    def _stop(self, signum, frame):
+        self.stdout.write("Получен сигнал остановки, завершаем текущие задачи...")
+        self._stopping = True
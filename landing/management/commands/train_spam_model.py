@@ -0,0 +1,55 @@
+from django.core.management.base import CommandError
+
+from landing.management.base import LandingCommand
+from landing.models import Review
+from landing.spam import NaiveBayes, evaluate, get_model_path, save_model, spam_probability, training_data
+
+
+class Command(LandingCommand):
+    help = (
+        "Обучает спам-фильтр отзывов на опубликованных (не спам) и отклонённых (спам) отзывах "
+        "и сохраняет модель в LANDING_SPAM_MODEL_PATH."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--evaluate',
+            action='store_true',
+            help='Перед обучением проверить точность на отложенных 20%% отзывов.',
+        )
+        parser.add_argument(
+            '--rescore',
+            action='store_true',
+            help='После обучения пересчитать оценку для всех отзывов, ожидающих модерации.',
+        )
+        parser.add_argument('--batch-size', type=int, default=500, help='Сколько отзывов пересчитывать за раз.')
+
+    def handle(self, *args, rescore=False, batch_size=500, **options):
+        texts, labels = training_data()
+        spam_count = sum(labels)
+        ham_count = len(labels) - spam_count
+        if not spam_count or not ham_count:
+            raise CommandError(
+                f"Нужны и опубликованные, и отклонённые отзывы (сейчас: {ham_count} и {spam_count})."
+            )
+
+        if options['evaluate']:
+            accuracy = evaluate(texts, labels)
+            if accuracy is not None:
+                self.stdout.write(f"Точность на отложенной выборке: {accuracy:.1%}")
+
+        model = NaiveBayes.train(texts, labels)
+        path = get_model_path()
+        save_model(model, path)
+        self.stdout.write(self.style.SUCCESS(
+            f"Модель обучена: не спам {ham_count}, спам {spam_count}, "
+            f"признаков {len(model.spam_counts.keys() | model.ham_counts.keys())} -> {path}"
+        ))
+
+        if rescore:
+            rescored = 0
+            pending = Review.objects.filter(moderated_at__isnull=True).order_by('pk')
+            for review in pending.iterator(chunk_size=batch_size):
+                Review.objects.filter(pk=review.pk).update(spam_score=spam_probability(review, model))
+                rescored += 1
+            self.stdout.write(f"Пересчитано отзывов в очереди: {rescored}")
@@ -0,0 +1,66 @@
+import os
+import time
+
+from django.core.management.base import CommandError
+
+from landing.management.base import LandingCommand
+from landing.prerender import write_atomic
+from landing.warmup import STEPS, warm_landing
+
+
+class Command(LandingCommand):
+    help = (
+        "Прогревает общие кеши, страницы БД и медиафайлы лендинга после деплоя. "
+        "Завершается с ошибкой, если какой-то шаг не удался, — подходит как проверка готовности. "
+        "Шаблоны и модули воркеров загружаются не здесь, а при запуске gunicorn (preload_app, gunicorn.conf.py)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--step',
+            action='append',
+            choices=list(STEPS),
+            dest='steps',
+            help='Выполнить только указанный шаг (можно повторять). По умолчанию — все.',
+        )
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=None,
+            help='Сколько шагов выполнять одновременно (по умолчанию — все сразу).',
+        )
+        parser.add_argument(
+            '--ready-file',
+            default=None,
+            help='Файл-флаг готовности: удаляется перед прогревом и создаётся после успешного завершения.',
+        )
+        parser.add_argument(
+            '--strict',
+            action='store_true',
+            help='Считать ошибкой и предупреждения (например, не найденные медиафайлы).',
+        )
+
+    def handle(self, *args, steps=None, workers=None, ready_file=None, strict=False, **options):
+        if ready_file and os.path.exists(ready_file):
+            os.remove(ready_file)
+
+        started = time.perf_counter()
+        results = warm_landing(steps, workers, strict=strict)
+        elapsed = time.perf_counter() - started
+
+        for result in results:
+            line = f"{result.name:<10} {result.seconds * 1000:8.1f} мс  "
+            if not result.ok:
+                self.stderr.write(self.style.ERROR(f"{line}ошибка: {result.error}"))
+                continue
+            self.stdout.write(line + result.detail)
+            if result.warning:
+                self.stderr.write(self.style.WARNING(f"{result.name:<10} предупреждение: {result.warning}"))
+
+        failed = [result.name for result in results if not result.ok]
+        if failed:
+            raise CommandError(f"Прогрев не завершён, ошибки в шагах: {', '.join(failed)}.")
+
+        if ready_file:
+            write_atomic(ready_file, f"{time.time():.0f}\n".encode())
+        self.stdout.write(self.style.SUCCESS(f"Лендинг прогрет за {elapsed * 1000:.1f} мс."))
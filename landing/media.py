@@ -0,0 +1,186 @@
+"""
+Отдача загруженных файлов (MEDIA_URL) в продакшене.
+
+Сам Django байты изображений не передаёт: при LANDING_MEDIA_ACCEL = 'nginx' ответ содержит только
+X-Accel-Redirect на internal-location, а при 'sendfile' — X-Sendfile с абсолютным путём, и файл отдаёт
+фронтовой сервер (вместе с Range и условными запросами). Без прокси ответ — FileResponse, который
+gunicorn передаёт через wsgi.file_wrapper в os.sendfile без копирования в Python; Range (один диапазон)
+и If-None-Match / If-Modified-Since / If-Range обрабатываются здесь.
+
+Файлы с именем по хешу содержимого (см. landing/storage.py) никогда не меняются, поэтому кешируются
+клиентами и прокси на год с immutable; остальные — на LANDING_MEDIA_MAX_AGE секунд.
+"""
+import mimetypes
+import os
+import posixpath
+import re
+import stat
+from urllib.parse import quote
+
+from django.conf import settings
+from django.core.exceptions import SuspiciousFileOperation
+from django.http import FileResponse, Http404, HttpResponse
+from django.utils._os import safe_join
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date, parse_http_date_safe
+from django.views.decorators.http import require_safe
+
+from .storage import is_hashed_name
+
+IMMUTABLE_MAX_AGE = 60 * 60 * 24 * 365
+RANGE_RE = re.compile(r'^bytes=(\d*)-(\d*)$')
+DIGEST_RE = re.compile(r'[0-9a-f]{64}')
+
+
+class RangeFile:
+    """
+    Отрезок файла [start, start + length): чтение не выходит за его конец.
+    fileno() отдаёт дескриптор исходного файла, уже спозиционированного на start, — gunicorn передаёт
+    в sendfile ровно Content-Length байт с текущей позиции.
+    """
+
+    def __init__(self, file, start, length):
+        self.file = file
+        self.name = file.name
+        self.remaining = length
+        file.seek(start)
+
+    def read(self, size=-1):
+        if size is None or size < 0 or size > self.remaining:
+            size = self.remaining
+        data = self.file.read(size) if size else b''
+        self.remaining -= len(data)
+        return data
+
+    def fileno(self):
+        return self.file.fileno()
+
+    def close(self):
+        self.file.close()
+
+
+def parse_range(header, size):
+    """
+    Один диапазон из заголовка Range: (start, end) включительно, None — заголовок не поддерживается
+    (несколько диапазонов, другие единицы) и отдаётся весь файл, ValueError — диапазон вне файла.
+    """
+    match = RANGE_RE.match(header.strip())
+    if match is None:
+        return None
+    first, last = match.groups()
+    if not first and not last:
+        return None
+    if not first:
+        # bytes=-N — последние N байт
+        suffix = int(last)
+        if not suffix or not size:
+            raise ValueError(header)
+        return max(size - suffix, 0), size - 1
+    start = int(first)
+    end = min(int(last), size - 1) if last else size - 1
+    if start >= size or end < start:
+        raise ValueError(header)
+    return start, end
+
+
+def media_etag(path, st):
+    if is_hashed_name(path):
+        return f'"{DIGEST_RE.search(path).group()}"'
+    return f'"{st.st_mtime_ns:x}-{st.st_size:x}"'
+
+
+def range_allowed(request, etag, last_modified):
+    """ If-Range: диапазон отдаётся, только если файл не изменился с тех пор, как клиент получил начало. """
+    if_range = request.headers.get('If-Range')
+    if not if_range:
+        return True
+    if if_range.startswith(('"', 'W/')):
+        return if_range == etag
+    return parse_http_date_safe(if_range) == last_modified
+
+
+def set_cache_headers(response, path):
+    if is_hashed_name(path):
+        patch_cache_control(response, public=True, max_age=IMMUTABLE_MAX_AGE, immutable=True)
+    else:
+        patch_cache_control(response, public=True, max_age=getattr(settings, 'LANDING_MEDIA_MAX_AGE', 60 * 60))
+    return response
+
+
+def accel_response(path, full_path, mode):
+    """ Пустой ответ, по которому файл отдаёт фронтовой сервер. """
+    response = HttpResponse(content_type=mimetypes.guess_type(path)[0] or 'application/octet-stream')
+    if mode == 'nginx':
+        prefix = getattr(settings, 'LANDING_MEDIA_ACCEL_PREFIX', '/protected-media/')
+        response['X-Accel-Redirect'] = prefix.rstrip('/') + '/' + quote(path)
+    elif mode == 'sendfile':
+        response['X-Sendfile'] = full_path
+    else:
+        raise ValueError(f"Неизвестный LANDING_MEDIA_ACCEL: {mode!r}")
+    return response
+
+
+def file_response(request, full_path, size, etag, last_modified):
+    content_type = mimetypes.guess_type(full_path)[0] or 'application/octet-stream'
+    byte_range = None
+    header = request.headers.get('Range')
+    if header and range_allowed(request, etag, last_modified):
+        try:
+            byte_range = parse_range(header, size)
+        except ValueError:
+            response = HttpResponse(status=416)
+            response['Content-Range'] = f'bytes */{size}'
+            return response
+
+    if request.method == 'HEAD':
+        # заголовки без открытия файла
+        response = HttpResponse(content_type=content_type)
+        response['Content-Length'] = size
+        return response
+
+    file = open(full_path, 'rb')
+    if byte_range is None:
+        return FileResponse(file, content_type=content_type)
+    start, end = byte_range
+    response = FileResponse(RangeFile(file, start, end - start + 1), content_type=content_type, status=206)
+    response['Content-Length'] = end - start + 1
+    response['Content-Range'] = f'bytes {start}-{end}/{size}'
+    return response
+
+
+@require_safe
+def serve_media(request, path):
+    """
+    Файл из MEDIA_ROOT. Скрытые файлы (например, недописанные .upload-*.part) не отдаются.
+    """
+    path = posixpath.normpath(path).lstrip('/')
+    if any(part.startswith('.') for part in path.split('/')):
+        raise Http404
+    try:
+        full_path = safe_join(settings.MEDIA_ROOT, path)
+    except SuspiciousFileOperation:
+        raise Http404
+
+    mode = getattr(settings, 'LANDING_MEDIA_ACCEL', None)
+    if mode:
+        # Range, условные запросы и 404 обрабатывает прокси; здесь не нужен даже stat()
+        return set_cache_headers(accel_response(path, full_path, mode), path)
+
+    try:
+        st = os.stat(full_path)
+    except OSError:
+        raise Http404
+    if not stat.S_ISREG(st.st_mode):
+        raise Http404
+
+    etag = media_etag(path, st)
+    last_modified = int(st.st_mtime)
+    response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+    if response is None:
+        response = file_response(request, full_path, st.st_size, etag, last_modified)
+    response['ETag'] = etag
+    response['Last-Modified'] = http_date(last_modified)
+    response['Accept-Ranges'] = 'bytes'
+    if response.status_code == 416:
+        return response
+    return set_cache_headers(response, path)
@@ -0,0 +1,174 @@
+"""
+Сборка мусора в MEDIA_ROOT: поиск файлов, на которые больше не ссылается ни одно ImageField.
+
+Файлы не удаляются сразу: сначала они переносятся в карантин и удаляются
+только после истечения grace-периода. Если за это время на файл снова
+появилась ссылка, он возвращается на место.
+"""
+import os
+import shutil
+import time
+
+from django.conf import settings
+
+from .storage import image_fields
+
+# Незавершённые загрузки ContentAddressedStorage
+UPLOAD_TMP_PREFIX = '.upload-'
+
+
+class GCReport:
+    """ Итог одного прохода сборщика мусора """
+
+    def __init__(self):
+        self.scanned = 0
+        self.referenced = 0
+        self.quarantined = 0
+        self.quarantined_bytes = 0
+        self.restored = 0
+        self.deleted = 0
+        self.deleted_bytes = 0
+
+
+def get_quarantine_root():
+    return str(getattr(settings, 'LANDING_MEDIA_QUARANTINE_ROOT', os.path.join(settings.BASE_DIR, 'media_quarantine')))
+
+
+def get_grace_seconds():
+    return getattr(settings, 'LANDING_MEDIA_GC_GRACE_HOURS', 72) * 3600
+
+
+def referenced_names(chunk_size=2000):
+    """
+    Собирает множество путей (относительно MEDIA_ROOT), на которые ссылаются ImageField.
+    Строки читаются из БД потоково через .iterator(), в памяти остаются только сами имена.
+    """
+    names = set()
+    for model, field in image_fields():
+        queryset = (
+            model.objects.exclude(**{field.name: ''})
+            .exclude(**{f"{field.name}__isnull": True})
+            .values_list(field.name, flat=True)
+            .iterator(chunk_size=chunk_size)
+        )
+        names.update(queryset)
+    return names
+
+
+def walk_files(root, exclude=()):
+    """
+    Обходит дерево каталогов через os.scandir и лениво отдаёт пары (относительный путь, DirEntry).
+    Используется явный стек вместо рекурсии, поэтому глубина дерева не ограничена.
+    """
+    exclude = {os.path.abspath(path) for path in exclude}
+    stack = [(root, '')]
+    while stack:
+        directory, prefix = stack.pop()
+        try:
+            iterator = os.scandir(directory)
+        except FileNotFoundError:
+            continue
+        with iterator:
+            for entry in iterator:
+                relpath = f"{prefix}{entry.name}"
+                if entry.is_dir(follow_symlinks=False):
+                    if os.path.abspath(entry.path) not in exclude:
+                        stack.append((entry.path, f"{relpath}/"))
+                elif entry.is_file(follow_symlinks=False):
+                    yield relpath, entry
+
+
+def _move(source, target):
+    os.makedirs(os.path.dirname(target), exist_ok=True)
+    try:
+        os.replace(source, target)
+    except OSError:
+        # карантин на другом разделе диска
+        shutil.move(source, target)
+
+
+def _remove_empty_dirs(root):
+    for directory, dirnames, filenames in os.walk(root, topdown=False):
+        if directory != root and not dirnames and not filenames:
+            try:
+                os.rmdir(directory)
+            except OSError:
+                pass
+
+
+def collect_garbage(dry_run=False, grace_seconds=None, now=None, log=None):
+    """
+    Один проход сборщика мусора.
+
+    1. Файлы в MEDIA_ROOT без ссылок из БД и старше grace-периода переносятся в карантин.
+       Свежие файлы не трогаются: их запись в БД могла ещё не закоммититься.
+       Временные файлы загрузок (UPLOAD_TMP_PREFIX) в карантин не попадают, брошенные удаляются.
+    2. Файлы в карантине, на которые снова есть ссылка, возвращаются обратно.
+    3. Файлы, пролежавшие в карантине дольше grace-периода, удаляются.
+
+    При dry_run ничего не меняется, но отчёт содержит то, что было бы сделано.
+    """
+    media_root = str(settings.MEDIA_ROOT)
+    quarantine_root = get_quarantine_root()
+    grace_seconds = get_grace_seconds() if grace_seconds is None else grace_seconds
+    now = time.time() if now is None else now
+    cutoff = now - grace_seconds
+    log = log or (lambda message: None)
+
+    report = GCReport()
+    references = referenced_names()
+
+    for relpath, entry in walk_files(media_root, exclude=[quarantine_root]):
+        if entry.name.startswith(UPLOAD_TMP_PREFIX):
+            # загрузка ещё пишется или процесс упал посреди неё: ссылок на такой файл не бывает,
+            # в карантин его не переносим, брошенный старше grace-периода просто удаляем
+            stat = entry.stat(follow_symlinks=False)
+            if stat.st_mtime <= cutoff:
+                report.deleted += 1
+                report.deleted_bytes += stat.st_size
+                log(f"удаление брошенной загрузки: {relpath} ({stat.st_size} байт)")
+                if not dry_run:
+                    os.remove(entry.path)
+            continue
+        report.scanned += 1
+        if relpath in references:
+            report.referenced += 1
+            continue
+        stat = entry.stat(follow_symlinks=False)
+        if stat.st_mtime > cutoff:
+            continue
+
+        report.quarantined += 1
+        report.quarantined_bytes += stat.st_size
+        log(f"в карантин: {relpath} ({stat.st_size} байт)")
+        if not dry_run:
+            target = os.path.join(quarantine_root, relpath)
+            _move(entry.path, target)
+            # время попадания в карантин отсчитываем от момента переноса
+            os.utime(target, (now, now))
+
+    for relpath, entry in walk_files(quarantine_root):
+        if relpath in references:
+            report.restored += 1
+            log(f"возврат из карантина: {relpath}")
+            if not dry_run:
+                target = os.path.join(media_root, relpath)
+                if os.path.exists(target):
+                    os.remove(entry.path)
+                else:
+                    _move(entry.path, target)
+            continue
+
+        stat = entry.stat(follow_symlinks=False)
+        if stat.st_mtime > cutoff:
+            continue
+        report.deleted += 1
+        report.deleted_bytes += stat.st_size
+        log(f"удаление: {relpath} ({stat.st_size} байт)")
+        if not dry_run:
+            os.remove(entry.path)
+
+    if not dry_run and os.path.isdir(quarantine_root):
+        _remove_empty_dirs(quarantine_root)
+
+    return report
@@ -0,0 +1,180 @@
+"""
+Память воркеров: профилирование выделений по вьюхам (tracemalloc) и бюджет RSS на процесс.
+
+Профилирование (LANDING_TRACEMALLOC, landing.middleware.MemoryProfileMiddleware) выборочное: tracemalloc
+включается только на время каждого LANDING_TRACEMALLOC_EVERY-го запроса по пути и выключается после ответа
+(вместе с потоковой отдачей). Для такого запроса известны пик памяти Python и места в коде, выделившие
+то, что ещё занято к концу ответа (HTML, данные сериализаторов, заполненные кеши). Снимок включает лишь
+выделенное за запрос, поэтому он дешёв; остальные запросы tracemalloc не замедляет. Сводка по вьюхам пишется
+в логгер landing.memory раз в LANDING_MEMORY_REPORT_INTERVAL секунд. tracemalloc общий на процесс, поэтому
+замеры точны для воркеров, обрабатывающих один запрос за раз (sync-воркеры gunicorn).
+
+Бюджет (LANDING_WORKER_MAX_RSS_MB): воркер, резидентная память которого после запроса превысила бюджет,
+завершается штатно и заменяется новым. Под gunicorn это делает хук post_request (gunicorn.conf.py),
+под другими серверами — landing.middleware.MemoryBudgetMiddleware (SIGTERM своему процессу).
+"""
+import logging
+import os
+import resource
+import sys
+import threading
+import time
+import tracemalloc
+from collections import Counter
+
+from django.conf import settings
+
+logger = logging.getLogger('landing.memory')
+
+PROJECT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# Кадры замеров (middleware оборачивает потоковый ответ) местом выделения не считаются
+INSTRUMENTATION_FILES = {
+    os.path.abspath(__file__),
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), 'middleware.py'),
+}
+REPORT_TOP_VIEWS = 10
+REPORT_TOP_SITES = 5
+
+
+def rss_bytes():
+    """ Текущая резидентная память процесса; без /proc (не Linux) — пиковая из getrusage. """
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, IndexError):
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # ru_maxrss: килобайты на Linux, байты на macOS
+        return peak if sys.platform == 'darwin' else peak * 1024
+
+
+def rss_budget():
+    budget = getattr(settings, 'LANDING_WORKER_MAX_RSS_MB', None)
+    return None if budget is None else budget * 1024 * 1024
+
+
+def over_budget():
+    """ RSS в байтах, если процесс превысил LANDING_WORKER_MAX_RSS_MB, иначе None. """
+    budget = rss_budget()
+    if budget is None:
+        return None
+    rss = rss_bytes()
+    return rss if rss > budget else None
+
+
+def allocation_site(traceback):
+    """ Ближайший к месту выделения кадр из кода проекта (кроме самих замеров), иначе самый внутренний кадр. """
+    # кадры в traceback идут от внешнего к самому внутреннему
+    for frame in reversed(traceback):
+        filename = os.path.abspath(frame.filename)
+        if filename in INSTRUMENTATION_FILES:
+            continue
+        if filename.startswith(PROJECT_DIR) and 'site-packages' not in filename:
+            return f"{os.path.relpath(filename, PROJECT_DIR)}:{frame.lineno}"
+    frame = traceback[-1]
+    return f"{frame.filename}:{frame.lineno}"
+
+
+def held_sites(snapshot):
+    """ Counter {место в коде: байт} по снимку. """
+    sites = Counter()
+    for stat in snapshot.statistics('traceback'):
+        sites[allocation_site(stat.traceback)] += stat.size
+    return sites
+
+
+class MemoryStats:
+    """
+    Накопленная статистика памяти по вьюхам за период отчёта.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.views = {}
+        self.started = time.monotonic()
+
+    def add_request(self, view, peak, held, sites):
+        with self.lock:
+            entry = self.views.get(view)
+            if entry is None:
+                entry = self.views[view] = {
+                    'view': view, 'requests': 0, 'peak_total': 0, 'peak_max': 0, 'held_total': 0, 'sites': Counter(),
+                }
+            entry['requests'] += 1
+            entry['peak_total'] += peak
+            entry['peak_max'] = max(entry['peak_max'], peak)
+            entry['held_total'] += held
+            entry['sites'].update(sites)
+
+    def pop(self):
+        """ Забирает накопленное и начинает новый период. Возвращает (секунд в периоде, записи). """
+        with self.lock:
+            views, self.views = self.views, {}
+            started, self.started = self.started, time.monotonic()
+        return time.monotonic() - started, sorted(views.values(), key=lambda e: e['peak_max'], reverse=True)
+
+
+class MemoryProfiler:
+    """
+    Замер выборочных запросов одного процесса. tracemalloc включается только на время такого запроса,
+    поэтому остальные запросы не замедляются, а снимок содержит лишь выделенное за этот запрос.
+    """
+
+    def __init__(self):
+        self.stats = MemoryStats()
+        self.every = getattr(settings, 'LANDING_TRACEMALLOC_EVERY', 20)
+        self.frames = getattr(settings, 'LANDING_TRACEMALLOC_FRAMES', 25)
+        self.interval = getattr(settings, 'LANDING_MEMORY_REPORT_INTERVAL', 300)
+        self.next_report = time.monotonic() + self.interval
+        self.counts = Counter()
+
+    def begin(self, view):
+        """
+        Включает tracemalloc, если запрос попал в выборку: первый и затем каждый every-й к этой вьюхе.
+        Счётчики ведутся по именам вьюх, а не по путям: путей (/media/..., несуществующих URL) неограниченно
+        много. Возвращает, включён ли замер.
+        """
+        self.counts[view] += 1
+        if (self.counts[view] - 1) % self.every or tracemalloc.is_tracing():
+            return False
+        tracemalloc.start(self.frames)
+        return True
+
+    def end(self, view, traced):
+        if traced:
+            snapshot = tracemalloc.take_snapshot()
+            held, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            self.stats.add_request(view, peak, held, held_sites(snapshot))
+        if time.monotonic() >= self.next_report:
+            self.next_report = time.monotonic() + self.interval
+            self.report()
+
+    def report(self):
+        period, entries = self.stats.pop()
+        if not entries:
+            return
+        lines = [f"Память по вьюхам за {period:.0f} с (RSS процесса {rss_bytes() / 2 ** 20:.1f} МБ):"]
+        for entry in entries[:REPORT_TOP_VIEWS]:
+            requests = entry['requests']
+            lines.append(
+                f"  {entry['view']}: замерено запросов {requests}, пик — в среднем "
+                f"{entry['peak_total'] / requests / 1024:.0f} КБ, максимум {entry['peak_max'] / 1024:.0f} КБ; "
+                f"занято к концу ответа {entry['held_total'] / requests / 1024:.0f} КБ"
+            )
+            for site, size in entry['sites'].most_common(REPORT_TOP_SITES):
+                lines.append(f"    {size / requests / 1024:8.1f} КБ  {site}")
+        logger.info('\n'.join(lines))
+
+
+def recycle_gunicorn_worker(worker):
+    """
+    Хук post_request gunicorn: воркер сверх бюджета RSS дообслуживает текущий запрос и завершается,
+    мастер запускает вместо него новый (как при max_requests).
+    """
+    rss = over_budget()
+    if rss is not None and worker.alive:
+        logger.warning(
+            "Воркер %s использует %.1f МБ (бюджет %s МБ) и будет перезапущен",
+            os.getpid(), rss / 2 ** 20, settings.LANDING_WORKER_MAX_RSS_MB,
+        )
+        worker.alive = False
@@ -0,0 +1,121 @@
+import os
+import signal
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+from django.urls import Resolver404, resolve
+
+from .memory import MemoryProfiler, logger, over_budget
+from .querylog import QueryWatcher
+
+
+class QueryLogMiddleware:
+    """
+    Следит за запросами к БД во время обработки HTTP-запроса (см. landing/querylog.py).
+    Отключается, если LANDING_SLOW_QUERY_MS = None.
+    """
+
+    def __init__(self, get_response):
+        if getattr(settings, 'LANDING_SLOW_QUERY_MS', None) is None:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.slow_seconds = settings.LANDING_SLOW_QUERY_MS / 1000
+
+    def _watch(self, watchers):
+        stack = ExitStack()
+        for watcher in watchers:
+            stack.enter_context(connections[watcher.alias].execute_wrapper(watcher))
+        return stack
+
+    def _watch_stream(self, content, watchers):
+        # Потоковый ответ (главная страница) рендерит секции уже после выхода из вьюхи
+        try:
+            with self._watch(watchers):
+                yield from content
+        finally:
+            for watcher in watchers:
+                watcher.finish()
+
+    def __call__(self, request):
+        watchers = [QueryWatcher(request, alias, self.slow_seconds) for alias in connections]
+        with self._watch(watchers):
+            response = self.get_response(request)
+        # файлы (FileResponse) не оборачиваются: иначе WSGI-сервер не сможет отдать их через sendfile
+        if response.streaming and not response.is_async and getattr(response, 'file_to_stream', None) is None:
+            response.streaming_content = self._watch_stream(response.streaming_content, watchers)
+            return response
+        for watcher in watchers:
+            watcher.finish()
+        return response
+
+
+def _view_name(request):
+    """
+    Имя вьюхи по URL ещё до обработки запроса (resolver_match появляется только внутри неё).
+    Все несуществующие пути дают одно имя '-', поэтому число имён ограничено числом URL-шаблонов.
+    """
+    try:
+        match = resolve(request.path_info, getattr(request, 'urlconf', None))
+    except Resolver404:
+        return '-'
+    return match.view_name or '-'
+
+
+class MemoryProfileMiddleware:
+    """
+    Пик памяти и места выделений по вьюхам на выборке запросов (tracemalloc, см. landing/memory.py).
+    Отключается, если LANDING_TRACEMALLOC не включён.
+    """
+
+    def __init__(self, get_response):
+        if not getattr(settings, 'LANDING_TRACEMALLOC', False):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.profiler = MemoryProfiler()
+
+    def _watch_stream(self, content, view, traced):
+        # потоковый ответ рендерит секции уже после выхода из вьюхи
+        try:
+            yield from content
+        finally:
+            self.profiler.end(view, traced)
+
+    def __call__(self, request):
+        view = _view_name(request)
+        traced = self.profiler.begin(view)
+        response = self.get_response(request)
+        if response.streaming and not response.is_async and getattr(response, 'file_to_stream', None) is None:
+            response.streaming_content = self._watch_stream(response.streaming_content, view, traced)
+            return response
+        self.profiler.end(view, traced)
+        return response
+
+
+class MemoryBudgetMiddleware:
+    """
+    Бюджет RSS воркера (LANDING_WORKER_MAX_RSS_MB) для серверов без хука post_request:
+    процесс сверх бюджета получает SIGTERM и завершается после текущих запросов, сервер запускает новый.
+    Под gunicorn воркеры перезапускает хук из gunicorn.conf.py. Отключается, если бюджет не задан.
+    """
+
+    def __init__(self, get_response):
+        if getattr(settings, 'LANDING_WORKER_MAX_RSS_MB', None) is None:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.recycling = False
+
+    def __call__(self, request):
+        response = self.get_response(request)
+        if self.recycling or request.META.get('SERVER_SOFTWARE', '').startswith('gunicorn'):
+            return response
+        rss = over_budget()
+        if rss is not None:
+            self.recycling = True
+            logger.warning(
+                "Процесс %s использует %.1f МБ (бюджет %s МБ) и будет перезапущен",
+                os.getpid(), rss / 2 ** 20, settings.LANDING_WORKER_MAX_RSS_MB,
+            )
+            os.kill(os.getpid(), signal.SIGTERM)
+        return response
@@ -0,0 +1,39 @@
+# Generated by Django 5.2 on 2026-10-19 14:35
+
+import landing.storage
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('landing', '0012_alter_galleryimage_options_alter_master_options_and_more'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='galleryimage',
+            name='image',
+            field=models.ImageField(storage=landing.storage.get_media_storage, upload_to='gallery_images/', verbose_name='Изображение'),
+        ),
+        migrations.AlterField(
+            model_name='master',
+            name='photo',
+            field=models.ImageField(storage=landing.storage.get_media_storage, upload_to='photos/', verbose_name='Фотография'),
+        ),
+        migrations.AlterField(
+            model_name='review',
+            name='name',
+            field=models.CharField(max_length=100, verbose_name='Имя автора'),
+        ),
+        migrations.AlterField(
+            model_name='service',
+            name='title_image',
+            field=models.ImageField(blank=True, null=True, storage=landing.storage.get_media_storage, upload_to='service_covers/', verbose_name='Обложка услуги'),
+        ),
+        migrations.AlterField(
+            model_name='servicesubsection',
+            name='title_image',
+            field=models.ImageField(blank=True, null=True, storage=landing.storage.get_media_storage, upload_to='subsection_covers/', verbose_name='Обложка подраздела'),
+        ),
+    ]
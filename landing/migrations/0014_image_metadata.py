@@ -0,0 +1,134 @@
+# Generated by Django 5.2 on 2026-10-19 14:37
+
+import landing.storage
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('landing', '0013_content_addressed_storage'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='galleryimage',
+            name='image_bytes',
+            field=models.PositiveIntegerField(blank=True, editable=False, null=True, verbose_name='Размер файла, байт'),
+        ),
+        migrations.AddField(
+            model_name='galleryimage',
+            name='image_color',
+            field=models.CharField(blank=True, editable=False, max_length=7, verbose_name='Преобладающий цвет'),
+        ),
+        migrations.AddField(
+            model_name='galleryimage',
+            name='image_height',
+            field=models.PositiveIntegerField(blank=True, editable=False, null=True, verbose_name='Высота, px'),
+        ),
+        migrations.AddField(
+            model_name='galleryimage',
+            name='image_placeholder',
+            field=models.TextField(blank=True, editable=False, verbose_name='Превью-заглушка (data URI)'),
+        ),
+        migrations.AddField(
+            model_name='galleryimage',
+            name='image_width',
+            field=models.PositiveIntegerField(blank=True, editable=False, null=True, verbose_name='Ширина, px'),
+        ),
+        migrations.AddField(
+            model_name='master',
+            name='photo_bytes',
+            field=models.PositiveIntegerField(blank=True, editable=False, null=True, verbose_name='Размер файла, байт'),
+        ),
+        migrations.AddField(
+            model_name='master',
+            name='photo_color',
+            field=models.CharField(blank=True, editable=False, max_length=7, verbose_name='Преобладающий цвет'),
+        ),
+        migrations.AddField(
+            model_name='master',
+            name='photo_height',
+            field=models.PositiveIntegerField(blank=True, editable=False, null=True, verbose_name='Высота, px'),
+        ),
+        migrations.AddField(
+            model_name='master',
+            name='photo_placeholder',
+            field=models.TextField(blank=True, editable=False, verbose_name='Превью-заглушка (data URI)'),
+        ),
+        migrations.AddField(
+            model_name='master',
+            name='photo_width',
+            field=models.PositiveIntegerField(blank=True, editable=False, null=True, verbose_name='Ширина, px'),
+        ),
+        migrations.AddField(
+            model_name='service',
+            name='title_image_bytes',
+            field=models.PositiveIntegerField(blank=True, editable=False, null=True, verbose_name='Размер файла, байт'),
+        ),
+        migrations.AddField(
+            model_name='service',
+            name='title_image_color',
+            field=models.CharField(blank=True, editable=False, max_length=7, verbose_name='Преобладающий цвет'),
+        ),
+        migrations.AddField(
+            model_name='service',
+            name='title_image_height',
+            field=models.PositiveIntegerField(blank=True, editable=False, null=True, verbose_name='Высота, px'),
+        ),
+        migrations.AddField(
+            model_name='service',
+            name='title_image_placeholder',
+            field=models.TextField(blank=True, editable=False, verbose_name='Превью-заглушка (data URI)'),
+        ),
+        migrations.AddField(
+            model_name='service',
+            name='title_image_width',
+            field=models.PositiveIntegerField(blank=True, editable=False, null=True, verbose_name='Ширина, px'),
+        ),
+        migrations.AddField(
+            model_name='servicesubsection',
+            name='title_image_bytes',
+            field=models.PositiveIntegerField(blank=True, editable=False, null=True, verbose_name='Размер файла, байт'),
+        ),
+        migrations.AddField(
+            model_name='servicesubsection',
+            name='title_image_color',
+            field=models.CharField(blank=True, editable=False, max_length=7, verbose_name='Преобладающий цвет'),
+        ),
+        migrations.AddField(
+            model_name='servicesubsection',
+            name='title_image_height',
+            field=models.PositiveIntegerField(blank=True, editable=False, null=True, verbose_name='Высота, px'),
+        ),
+        migrations.AddField(
+            model_name='servicesubsection',
+            name='title_image_placeholder',
+            field=models.TextField(blank=True, editable=False, verbose_name='Превью-заглушка (data URI)'),
+        ),
+        migrations.AddField(
+            model_name='servicesubsection',
+            name='title_image_width',
+            field=models.PositiveIntegerField(blank=True, editable=False, null=True, verbose_name='Ширина, px'),
+        ),
+        migrations.AlterField(
+            model_name='galleryimage',
+            name='image',
+            field=models.ImageField(height_field='image_height', storage=landing.storage.get_media_storage, upload_to='gallery_images/', verbose_name='Изображение', width_field='image_width'),
+        ),
+        migrations.AlterField(
+            model_name='master',
+            name='photo',
+            field=models.ImageField(height_field='photo_height', storage=landing.storage.get_media_storage, upload_to='photos/', verbose_name='Фотография', width_field='photo_width'),
+        ),
+        migrations.AlterField(
+            model_name='service',
+            name='title_image',
+            field=models.ImageField(blank=True, height_field='title_image_height', null=True, storage=landing.storage.get_media_storage, upload_to='service_covers/', verbose_name='Обложка услуги', width_field='title_image_width'),
+        ),
+        migrations.AlterField(
+            model_name='servicesubsection',
+            name='title_image',
+            field=models.ImageField(blank=True, height_field='title_image_height', null=True, storage=landing.storage.get_media_storage, upload_to='subsection_covers/', verbose_name='Обложка подраздела', width_field='title_image_width'),
+        ),
+    ]
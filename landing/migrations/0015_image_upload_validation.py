@@ -0,0 +1,35 @@
+# Generated by Django 5.2 on 2026-10-19 14:39
+
+import landing.models
+import landing.storage
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('landing', '0014_image_metadata'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='galleryimage',
+            name='image',
+            field=models.ImageField(height_field='image_height', storage=landing.storage.get_media_storage, upload_to='gallery_images/', validators=[landing.models.validate_image_upload], verbose_name='Изображение', width_field='image_width'),
+        ),
+        migrations.AlterField(
+            model_name='master',
+            name='photo',
+            field=models.ImageField(height_field='photo_height', storage=landing.storage.get_media_storage, upload_to='photos/', validators=[landing.models.validate_image_upload], verbose_name='Фотография', width_field='photo_width'),
+        ),
+        migrations.AlterField(
+            model_name='service',
+            name='title_image',
+            field=models.ImageField(blank=True, height_field='title_image_height', null=True, storage=landing.storage.get_media_storage, upload_to='service_covers/', validators=[landing.models.validate_image_upload], verbose_name='Обложка услуги', width_field='title_image_width'),
+        ),
+        migrations.AlterField(
+            model_name='servicesubsection',
+            name='title_image',
+            field=models.ImageField(blank=True, height_field='title_image_height', null=True, storage=landing.storage.get_media_storage, upload_to='subsection_covers/', validators=[landing.models.validate_image_upload], verbose_name='Обложка подраздела', width_field='title_image_width'),
+        ),
+    ]
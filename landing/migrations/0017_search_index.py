@@ -0,0 +1,129 @@
+# Generated by Django 5.2 on 2026-10-19 14:47
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+# DDL полнотекстового индекса зафиксирован здесь, а не импортируется из landing.search:
+# историческая миграция не должна меняться вместе с кодом приложения
+FTS_TABLE = 'landing_searchentry_fts'
+
+SQLITE_SCHEMA = [
+    f"""
+    CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5(
+        title_terms, body_terms, context_terms,
+        content='landing_searchentry', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2', prefix='2 3'
+    )
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS landing_searchentry_ai AFTER INSERT ON landing_searchentry BEGIN
+        INSERT INTO {FTS_TABLE}(rowid, title_terms, body_terms, context_terms)
+        VALUES (new.id, new.title_terms, new.body_terms, new.context_terms);
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS landing_searchentry_ad AFTER DELETE ON landing_searchentry BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, title_terms, body_terms, context_terms)
+        VALUES ('delete', old.id, old.title_terms, old.body_terms, old.context_terms);
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS landing_searchentry_au AFTER UPDATE ON landing_searchentry BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, title_terms, body_terms, context_terms)
+        VALUES ('delete', old.id, old.title_terms, old.body_terms, old.context_terms);
+        INSERT INTO {FTS_TABLE}(rowid, title_terms, body_terms, context_terms)
+        VALUES (new.id, new.title_terms, new.body_terms, new.context_terms);
+    END
+    """,
+]
+SQLITE_DROP = [
+    "DROP TRIGGER IF EXISTS landing_searchentry_au",
+    "DROP TRIGGER IF EXISTS landing_searchentry_ad",
+    "DROP TRIGGER IF EXISTS landing_searchentry_ai",
+    f"DROP TABLE IF EXISTS {FTS_TABLE}",
+]
+
+POSTGRES_SCHEMA = [
+    # Тексты уже приведены к основам, поэтому используется конфигурация 'simple' без своего стемминга
+    """
+    ALTER TABLE landing_searchentry ADD COLUMN IF NOT EXISTS search_vector tsvector
+    GENERATED ALWAYS AS (
+        setweight(to_tsvector('simple', title_terms), 'A') ||
+        setweight(to_tsvector('simple', body_terms), 'B') ||
+        setweight(to_tsvector('simple', context_terms), 'C')
+    ) STORED
+    """,
+    "CREATE INDEX IF NOT EXISTS landing_searchentry_search_vector ON landing_searchentry USING GIN (search_vector)",
+]
+POSTGRES_DROP = [
+    "DROP INDEX IF EXISTS landing_searchentry_search_vector",
+    "ALTER TABLE landing_searchentry DROP COLUMN IF EXISTS search_vector",
+]
+
+
+def sqlite_has_fts5(conn):
+    with conn.cursor() as cursor:
+        cursor.execute("SELECT sqlite_compileoption_used('ENABLE_FTS5')")
+        if cursor.fetchone()[0]:
+            return True
+        # FTS5 может быть загружен и без опции компиляции — проверяем напрямую
+        try:
+            cursor.execute("CREATE VIRTUAL TABLE temp._fts5_probe USING fts5(x)")
+            cursor.execute("DROP TABLE temp._fts5_probe")
+            return True
+        except Exception:
+            return False
+
+
+def create_fulltext_index(apps, schema_editor):
+    """ Если SQLite собран без FTS5, индекс не создаётся и поиск работает через LIKE. """
+    vendor = schema_editor.connection.vendor
+    statements = {'sqlite': SQLITE_SCHEMA, 'postgresql': POSTGRES_SCHEMA}.get(vendor, [])
+    if vendor == 'sqlite' and not sqlite_has_fts5(schema_editor.connection):
+        statements = []
+    for sql in statements:
+        schema_editor.execute(sql)
+
+
+def drop_fulltext_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    for sql in {'sqlite': SQLITE_DROP, 'postgresql': POSTGRES_DROP}.get(vendor, []):
+        schema_editor.execute(sql)
+
+
+def populate_index(apps, schema_editor):
+    # Наполнение — как у команды rebuild_search_index: основы слов в индексе должны совпадать
+    # с тем, как текущий код разбирает запросы, поэтому здесь используется landing.search
+    from landing.search import rebuild_index
+
+    rebuild_index(apps, using=schema_editor.connection.alias)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('landing', '0016_task'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SearchEntry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('service', 'Услуга'), ('subsection', 'Подраздел'), ('price', 'Позиция прайса')], max_length=20, verbose_name='Тип')),
+                ('object_id', models.PositiveIntegerField(verbose_name='ID объекта')),
+                ('title', models.CharField(max_length=255, verbose_name='Заголовок')),
+                ('title_terms', models.TextField(verbose_name='Основы слов заголовка')),
+                ('body_terms', models.TextField(blank=True, verbose_name='Основы слов описания')),
+                ('context_terms', models.TextField(blank=True, verbose_name='Основы слов родителей')),
+                ('service', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='search_entries', to='landing.service', verbose_name='Услуга')),
+            ],
+            options={
+                'verbose_name': 'Запись поискового индекса',
+                'verbose_name_plural': 'Поисковый индекс',
+                'constraints': [models.UniqueConstraint(fields=('kind', 'object_id'), name='landing_searchentry_unique_object')],
+            },
+        ),
+        migrations.RunPython(create_fulltext_index, drop_fulltext_index),
+        migrations.RunPython(populate_index, migrations.RunPython.noop),
+    ]
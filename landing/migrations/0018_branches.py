@@ -0,0 +1,28 @@
+# Generated by Django 5.2 on 2026-10-19 14:50
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('landing', '0017_search_index'),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name='address',
+            options={'verbose_name': 'Адрес филиала', 'verbose_name_plural': 'Адреса филиалов'},
+        ),
+        migrations.AddField(
+            model_name='master',
+            name='branch',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='masters', to='landing.address', verbose_name='Филиал'),
+        ),
+        migrations.AddField(
+            model_name='service',
+            name='branches',
+            field=models.ManyToManyField(blank=True, help_text='Пусто — услуга оказывается во всех филиалах', related_name='services', to='landing.address', verbose_name='Филиалы'),
+        ),
+    ]
@@ -0,0 +1,34 @@
+# Generated by Django 5.2 on 2026-10-19 14:53
+
+from django.db import migrations, models
+from django.db.models import F
+
+
+def mark_published_as_moderated(apps, schema_editor):
+    # Уже опубликованные отзывы проверены — в очередь модерации они попасть не должны
+    Review = apps.get_model('landing', 'Review')
+    Review.objects.filter(is_public=True).update(moderated_at=F('created_at'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('landing', '0018_branches'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='review',
+            name='moderated_at',
+            field=models.DateTimeField(blank=True, null=True, verbose_name='Проверен'),
+        ),
+        migrations.AddIndex(
+            model_name='review',
+            index=models.Index(fields=['is_public', 'created_at'], name='landing_review_public_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='review',
+            index=models.Index(condition=models.Q(('moderated_at__isnull', True)), fields=['is_public', 'created_at'], name='landing_review_queue_idx'),
+        ),
+        migrations.RunPython(mark_published_as_moderated, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,27 @@
+# Generated by Django 5.2 on 2026-10-19 14:55
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('landing', '0019_review_moderation'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='review',
+            name='ip_address',
+            field=models.GenericIPAddressField(blank=True, editable=False, null=True, verbose_name='IP-адрес'),
+        ),
+        migrations.AddField(
+            model_name='review',
+            name='spam_score',
+            field=models.FloatField(blank=True, editable=False, null=True, verbose_name='Вероятность спама'),
+        ),
+        migrations.AddIndex(
+            model_name='review',
+            index=models.Index(fields=['ip_address', 'created_at'], name='landing_review_ip_idx'),
+        ),
+    ]
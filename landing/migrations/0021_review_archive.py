@@ -0,0 +1,31 @@
+# Generated by Django 5.2 on 2026-10-19 15:32
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('landing', '0020_review_spam_score'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ArchivedReviewBatch',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('reason', models.CharField(choices=[('rejected', 'Отклонённые'), ('public', 'Опубликованные')], max_length=20, verbose_name='Причина')),
+                ('count', models.PositiveIntegerField(verbose_name='Отзывов')),
+                ('first_created_at', models.DateTimeField(verbose_name='Самый ранний отзыв')),
+                ('last_created_at', models.DateTimeField(verbose_name='Самый поздний отзыв')),
+                ('data', models.BinaryField(verbose_name='Отзывы (gzip JSON Lines)')),
+                ('archived_at', models.DateTimeField(auto_now_add=True, verbose_name='Перенесено в архив')),
+            ],
+            options={
+                'verbose_name': 'Архив отзывов',
+                'verbose_name_plural': 'Архив отзывов',
+                'ordering': ['-archived_at'],
+                'indexes': [models.Index(fields=['first_created_at', 'last_created_at'], name='landing_arc_first_c_ade304_idx')],
+            },
+        ),
+    ]
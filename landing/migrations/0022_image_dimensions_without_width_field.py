@@ -0,0 +1,35 @@
+# Generated by Django 5.2 on 2026-10-19 15:53
+
+import landing.models
+import landing.storage
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('landing', '0021_review_archive'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='galleryimage',
+            name='image',
+            field=models.ImageField(storage=landing.storage.get_media_storage, upload_to='gallery_images/', validators=[landing.models.validate_image_upload], verbose_name='Изображение'),
+        ),
+        migrations.AlterField(
+            model_name='master',
+            name='photo',
+            field=models.ImageField(storage=landing.storage.get_media_storage, upload_to='photos/', validators=[landing.models.validate_image_upload], verbose_name='Фотография'),
+        ),
+        migrations.AlterField(
+            model_name='service',
+            name='title_image',
+            field=models.ImageField(blank=True, null=True, storage=landing.storage.get_media_storage, upload_to='service_covers/', validators=[landing.models.validate_image_upload], verbose_name='Обложка услуги'),
+        ),
+        migrations.AlterField(
+            model_name='servicesubsection',
+            name='title_image',
+            field=models.ImageField(blank=True, null=True, storage=landing.storage.get_media_storage, upload_to='subsection_covers/', validators=[landing.models.validate_image_upload], verbose_name='Обложка подраздела'),
+        ),
+    ]
@@ -0,0 +1,22 @@
+# Generated by Django 5.2 on 2026-10-19 15:55
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('landing', '0022_image_dimensions_without_width_field'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='task',
+            name='unique_key',
+            field=models.CharField(blank=True, default='', editable=False, max_length=32, verbose_name='Ключ уникальности'),
+        ),
+        migrations.AddConstraint(
+            model_name='task',
+            constraint=models.UniqueConstraint(condition=models.Q(('status', 'pending'), models.Q(('unique_key', ''), _negated=True)), fields=('unique_key',), name='landing_task_unique_pending'),
+        ),
+    ]
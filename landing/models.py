@@ -1,9 +1,14 @@
 import re
 from django.db import models
 from django.db.models import Q
+from django.utils import timezone
 from django.core.validators import MinValueValidator, MaxValueValidator
+from django.conf import settings
 from django.core.exceptions import ValidationError
 
+from .imaging import check_image_limits
+from .storage import get_media_storage
+
 ICON_CHOICES = [
     ('fa-brands fa-twitter', 'Twitter'),
     ('fa-brands fa-square-odnoklassniki', 'Одноклассники'),
@@ -31,8 +36,17 @@ def validate_hex_color(value):
     if not HEX_COLOR_RE.match(value):
         raise ValidationError('Цвет должен быть в формате #rrggbb, например #1a2b3c')
 
+def validate_image_upload(value):
+    """
+    Валидатор загружаемого изображения: ограничивает размер файла и количество пикселей.
+    Уже сохранённые файлы повторно не проверяются.
+    """
+    if not value or getattr(value, '_committed', True):
+        return
+    check_image_limits(value.file, settings.LANDING_IMAGE_MAX_BYTES, settings.LANDING_IMAGE_MAX_PIXELS)
+
 class Address(models.Model):
-    """ Модель контактов """
+    """ Модель контактов филиала. Первый адрес (по id) считается основным и показывается в разделе «Контакты». """
     name = models.CharField(max_length=100, verbose_name="Название организации")
     address = models.CharField(max_length=1024, verbose_name="Физический адрес")
     email = models.EmailField(max_length=254, blank=True, verbose_name="Email")
@@ -60,8 +74,8 @@ class Address(models.Model):
     updated_at = models.DateTimeField(auto_now=True)
 
     class Meta:
-        verbose_name = "Адрес"
-        verbose_name_plural = "Адреса"
+        verbose_name = "Адрес филиала"
+        verbose_name_plural = "Адреса филиалов"
 
     def __str__(self):
         return self.name
@@ -76,7 +90,27 @@ class Address(models.Model):
 class Master(models.Model):
     """ Модель мастера """
     name = models.CharField(max_length=100, verbose_name="Имя")
-    photo = models.ImageField(upload_to='photos/', verbose_name="Фотография")
+    photo = models.ImageField(
+        upload_to='photos/',
+        storage=get_media_storage,
+        validators=[validate_image_upload],
+        verbose_name="Фотография"
+    )
+    # Метаданные изображения: заполняются при загрузке или командой backfill_image_metadata
+    photo_width = models.PositiveIntegerField(null=True, blank=True, editable=False, verbose_name="Ширина, px")
+    photo_height = models.PositiveIntegerField(null=True, blank=True, editable=False, verbose_name="Высота, px")
+    photo_bytes = models.PositiveIntegerField(null=True, blank=True, editable=False, verbose_name="Размер файла, байт")
+    photo_color = models.CharField(max_length=7, blank=True, editable=False, verbose_name="Преобладающий цвет")
+    photo_placeholder = models.TextField(blank=True, editable=False, verbose_name="Превью-заглушка (data URI)")
+    # Филиал, в котором работает мастер (пусто — работает во всех)
+    branch = models.ForeignKey(
+        Address,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='masters',
+        verbose_name="Филиал",
+    )
     specialty = models.CharField(max_length=200, blank=True, verbose_name="Специализация")
     description = models.TextField(blank=True, verbose_name="Описание")
     created_at = models.DateTimeField(auto_now_add=True)
@@ -113,7 +147,18 @@ class Social(models.Model):
 class GalleryImage(models.Model):
     """ Модель изображения в галерее """
     title = models.CharField(max_length=100, verbose_name="Заголовок изображения")
-    image = models.ImageField(upload_to='gallery_images/', verbose_name="Изображение")
+    image = models.ImageField(
+        upload_to='gallery_images/',
+        storage=get_media_storage,
+        validators=[validate_image_upload],
+        verbose_name="Изображение"
+    )
+    # Метаданные изображения: заполняются при загрузке или командой backfill_image_metadata
+    image_width = models.PositiveIntegerField(null=True, blank=True, editable=False, verbose_name="Ширина, px")
+    image_height = models.PositiveIntegerField(null=True, blank=True, editable=False, verbose_name="Высота, px")
+    image_bytes = models.PositiveIntegerField(null=True, blank=True, editable=False, verbose_name="Размер файла, байт")
+    image_color = models.CharField(max_length=7, blank=True, editable=False, verbose_name="Преобладающий цвет")
+    image_placeholder = models.TextField(blank=True, editable=False, verbose_name="Превью-заглушка (data URI)")
 
     class Meta:
         verbose_name = "Изображение в галерее"
@@ -137,6 +182,11 @@ class Review(models.Model):
     # Поле "публичный/опубликован" — чтобы можно было фильтровать опубликованные отзывы
     is_public = models.BooleanField(default=False, db_index=True)
     created_at = models.DateTimeField(auto_now_add=True)
+    # Когда отзыв прошёл модерацию (опубликован или отклонён). Пусто — отзыв ждёт в очереди модерации.
+    moderated_at = models.DateTimeField(null=True, blank=True, verbose_name="Проверен")
+    # Вероятность спама 0..1 (landing/spam.py); пусто — отзыв ещё не оценён
+    spam_score = models.FloatField(null=True, blank=True, editable=False, verbose_name="Вероятность спама")
+    ip_address = models.GenericIPAddressField(null=True, blank=True, editable=False, verbose_name="IP-адрес")
 
     def str(self):
         return f"{self.name} ({self.created_at:%Y-%m-%d %H:%M})"
@@ -151,8 +201,51 @@ class Review(models.Model):
         indexes = [
             models.Index(fields=['created_at']),
             models.Index(fields=['is_public']),
+            # Опубликованные отзывы по дате (секция отзывов на главной)
+            models.Index(fields=['is_public', 'created_at'], name='landing_review_public_idx'),
+            # Очередь модерации: только непроверенные отзывы, keyset-пагинация по created_at
+            models.Index(
+                fields=['is_public', 'created_at'],
+                name='landing_review_queue_idx',
+                condition=models.Q(moderated_at__isnull=True),
+            ),
+            # Частота отзывов с одного IP (эвристика спам-фильтра)
+            models.Index(fields=['ip_address', 'created_at'], name='landing_review_ip_idx'),
         ]
 
+
+class ArchivedReviewBatch(models.Model):
+    """
+    Пачка отзывов, перенесённых из Review в архив (landing/retention.py).
+    Отзывы хранятся сжатыми: gzip JSON Lines, одна строка — все поля одного отзыва.
+    Вернуть их в Review можно командой restore_reviews.
+    """
+    REASON_REJECTED = 'rejected'
+    REASON_PUBLIC = 'public'
+    REASON_CHOICES = [
+        (REASON_REJECTED, 'Отклонённые'),
+        (REASON_PUBLIC, 'Опубликованные'),
+    ]
+
+    reason = models.CharField(max_length=20, choices=REASON_CHOICES, verbose_name="Причина")
+    count = models.PositiveIntegerField(verbose_name="Отзывов")
+    # Диапазон дат создания отзывов пачки: восстановление за период не распаковывает лишние пачки
+    first_created_at = models.DateTimeField(verbose_name="Самый ранний отзыв")
+    last_created_at = models.DateTimeField(verbose_name="Самый поздний отзыв")
+    data = models.BinaryField(verbose_name="Отзывы (gzip JSON Lines)")
+    archived_at = models.DateTimeField(auto_now_add=True, verbose_name="Перенесено в архив")
+
+    class Meta:
+        verbose_name = "Архив отзывов"
+        verbose_name_plural = "Архив отзывов"
+        ordering = ['-archived_at']
+        indexes = [
+            models.Index(fields=['first_created_at', 'last_created_at']),
+        ]
+
+    def __str__(self):
+        return f"{self.get_reason_display()}: {self.count} ({self.first_created_at:%Y-%m-%d} — {self.last_created_at:%Y-%m-%d})"
+
 # Модели для секции Услуги
 class Service(models.Model):
     """
@@ -160,12 +253,27 @@ class Service(models.Model):
     """
     name = models.CharField(max_length=255, unique=True, verbose_name="Название услуги")
     description = models.TextField(blank=True, null=True, verbose_name="Описание услуги")
+    branches = models.ManyToManyField(
+        Address,
+        blank=True,
+        related_name='services',
+        verbose_name="Филиалы",
+        help_text="Пусто — услуга оказывается во всех филиалах",
+    )
     title_image = models.ImageField(
         upload_to='service_covers/',
+        storage=get_media_storage,
+        validators=[validate_image_upload],
         blank=True,
         null=True,
         verbose_name="Обложка услуги"
     )
+    # Метаданные изображения: заполняются при загрузке или командой backfill_image_metadata
+    title_image_width = models.PositiveIntegerField(null=True, blank=True, editable=False, verbose_name="Ширина, px")
+    title_image_height = models.PositiveIntegerField(null=True, blank=True, editable=False, verbose_name="Высота, px")
+    title_image_bytes = models.PositiveIntegerField(null=True, blank=True, editable=False, verbose_name="Размер файла, байт")
+    title_image_color = models.CharField(max_length=7, blank=True, editable=False, verbose_name="Преобладающий цвет")
+    title_image_placeholder = models.TextField(blank=True, editable=False, verbose_name="Превью-заглушка (data URI)")
 
     class Meta:
         verbose_name = "Услуга"
@@ -178,7 +286,10 @@ class Service(models.Model):
     def has_subsections(self):
         """
         Проверяет, есть ли у данной услуги подразделы.
+        Если подразделы загружены через prefetch_related, запрос к БД не выполняется.
         """
+        if 'subsections' in getattr(self, '_prefetched_objects_cache', {}):
+            return bool(self.subsections.all())
         return self.subsections.exists()
 
     def get_price_list(self):
@@ -212,10 +323,18 @@ class ServiceSubsection(models.Model):
     description = models.TextField(blank=True, null=True, verbose_name="Описание подраздела")
     title_image = models.ImageField(
         upload_to='subsection_covers/',
+        storage=get_media_storage,
+        validators=[validate_image_upload],
         blank=True,
         null=True,
         verbose_name="Обложка подраздела"
     )
+    # Метаданные изображения: заполняются при загрузке или командой backfill_image_metadata
+    title_image_width = models.PositiveIntegerField(null=True, blank=True, editable=False, verbose_name="Ширина, px")
+    title_image_height = models.PositiveIntegerField(null=True, blank=True, editable=False, verbose_name="Высота, px")
+    title_image_bytes = models.PositiveIntegerField(null=True, blank=True, editable=False, verbose_name="Размер файла, байт")
+    title_image_color = models.CharField(max_length=7, blank=True, editable=False, verbose_name="Преобладающий цвет")
+    title_image_placeholder = models.TextField(blank=True, editable=False, verbose_name="Превью-заглушка (data URI)")
 
     class Meta:
         unique_together = ('service', 'name') # Подразделы одной услуги должны иметь уникальные имена
@@ -315,6 +434,97 @@ class PriceItem(models.Model):
             owner_name = f"Подраздел: {self.subsection.name}"
         return f"{self.operation_name} ({self.price} руб.) - {owner_name}"
 
+class SearchEntry(models.Model):
+    """
+    Строка поискового индекса по услугам и прайсу (см. landing/search.py).
+    Тексты хранятся уже разбитыми на основы слов (стемминг выполняется в Python),
+    полнотекстовый индекс поверх таблицы создаёт миграция: FTS5 на SQLite, tsvector + GIN на PostgreSQL.
+    """
+    KIND_SERVICE = 'service'
+    KIND_SUBSECTION = 'subsection'
+    KIND_PRICE = 'price'
+    KIND_CHOICES = [
+        (KIND_SERVICE, 'Услуга'),
+        (KIND_SUBSECTION, 'Подраздел'),
+        (KIND_PRICE, 'Позиция прайса'),
+    ]
+
+    kind = models.CharField(max_length=20, choices=KIND_CHOICES, verbose_name="Тип")
+    object_id = models.PositiveIntegerField(verbose_name="ID объекта")
+    # Услуга, к которой относится запись: по ней результаты группируются
+    service = models.ForeignKey(
+        Service,
+        on_delete=models.CASCADE,
+        related_name='search_entries',
+        verbose_name="Услуга",
+    )
+    title = models.CharField(max_length=255, verbose_name="Заголовок")
+    title_terms = models.TextField(verbose_name="Основы слов заголовка")
+    body_terms = models.TextField(blank=True, verbose_name="Основы слов описания")
+    # Названия родительских услуги и подраздела: «детская» в подразделе «Стрижка» находится по «детская стрижка»
+    context_terms = models.TextField(blank=True, verbose_name="Основы слов родителей")
+
+    class Meta:
+        verbose_name = "Запись поискового индекса"
+        verbose_name_plural = "Поисковый индекс"
+        constraints = [
+            models.UniqueConstraint(fields=['kind', 'object_id'], name='landing_searchentry_unique_object'),
+        ]
+
+    def __str__(self):
+        return f"{self.get_kind_display()}: {self.title}"
+
+class Task(models.Model):
+    """
+    Фоновая задача во встроенной очереди (см. landing/taskqueue.py).
+    Медленная работа (обработка изображений, перегенерация кешей, уведомления)
+    выполняется воркером `manage.py run_tasks`, а не внутри запроса.
+    """
+    STATUS_PENDING = 'pending'
+    STATUS_RUNNING = 'running'
+    STATUS_DONE = 'done'
+    STATUS_FAILED = 'failed'
+    STATUS_CHOICES = [
+        (STATUS_PENDING, 'Ожидает'),
+        (STATUS_RUNNING, 'Выполняется'),
+        (STATUS_DONE, 'Выполнена'),
+        (STATUS_FAILED, 'Ошибка'),
+    ]
+
+    name = models.CharField(max_length=200, verbose_name="Задача")
+    payload = models.JSONField(default=dict, blank=True, verbose_name="Аргументы")
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default=STATUS_PENDING, verbose_name="Статус")
+    attempts = models.PositiveIntegerField(default=0, verbose_name="Попыток")
+    max_attempts = models.PositiveIntegerField(default=5, verbose_name="Максимум попыток")
+    # Задача не будет взята воркером раньше этого времени (используется для повторов с задержкой)
+    run_at = models.DateTimeField(default=timezone.now, verbose_name="Запустить не раньше")
+    locked_at = models.DateTimeField(null=True, blank=True, verbose_name="Взята в работу")
+    locked_by = models.CharField(max_length=100, blank=True, verbose_name="Воркер")
+    last_error = models.TextField(blank=True, verbose_name="Последняя ошибка")
+    # Хеш имени и аргументов задачи с unique=True (пусто у остальных): ожидающая задача с таким ключом одна
+    unique_key = models.CharField(max_length=32, blank=True, default='', editable=False, verbose_name="Ключ уникальности")
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = "Фоновая задача"
+        verbose_name_plural = "Фоновые задачи"
+        ordering = ['run_at']
+        # Воркер выбирает задачи по статусу и времени запуска
+        indexes = [
+            models.Index(fields=['status', 'run_at']),
+        ]
+        constraints = [
+            models.UniqueConstraint(
+                fields=['unique_key'],
+                condition=Q(status='pending') & ~Q(unique_key=''),
+                name='landing_task_unique_pending',
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.name} ({self.get_status_display()})"
+
 # первый вариант:    
 # class Master(models.Model):
 #     name = models.CharField(max_length=100)
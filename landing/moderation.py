@@ -0,0 +1,108 @@
+"""
+Модерация отзывов пачками.
+
+Публикация и отклонение выполняются одним UPDATE на всю пачку, без сохранения каждой модели
+и без сигналов на каждую строку; зависящие от отзывов кеши сбрасываются один раз на пачку.
+Очередь — непроверенные отзывы (moderated_at IS NULL) от старых к новым, с keyset-пагинацией
+по (created_at, id): следующая страница не требует OFFSET и не «съезжает», когда отзывы уходят из очереди.
+"""
+from datetime import datetime
+
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from .cache import bump_model_version
+from .live import broadcast_reviews
+from .models import Review
+from .prerender import schedule_prerender
+
+PAGE_SIZE = 50
+# По сколько опубликованных отзывов отправлять в живую ленту: список id уходит в запрос параметрами,
+# а у SQLite их число ограничено
+BROADCAST_BATCH_SIZE = 500
+
+
+def pending_reviews():
+    return Review.objects.filter(is_public=False, moderated_at__isnull=True)
+
+
+def encode_cursor(review):
+    return f"{review.created_at.isoformat()}_{review.pk}"
+
+
+def decode_cursor(cursor):
+    """ Разбирает курсор «<created_at>_<id>». Возвращает None для пустого или испорченного курсора. """
+    if not cursor:
+        return None
+    created_at, _, pk = cursor.rpartition('_')
+    try:
+        return datetime.fromisoformat(created_at), int(pk)
+    except ValueError:
+        return None
+
+
+def queue_page(after=None, limit=PAGE_SIZE):
+    """
+    Страница очереди модерации после курсора after.
+    Возвращает (список отзывов, курсор следующей страницы или None).
+    """
+    queryset = pending_reviews().order_by('created_at', 'pk')
+    position = decode_cursor(after)
+    if position is not None:
+        created_at, pk = position
+        queryset = queryset.filter(Q(created_at__gt=created_at) | Q(created_at=created_at, pk__gt=pk))
+    # Берём на одну строку больше, чтобы узнать, есть ли следующая страница, без COUNT
+    reviews = list(queryset[:limit + 1])
+    next_cursor = encode_cursor(reviews[limit - 1]) if len(reviews) > limit else None
+    return reviews[:limit], next_cursor
+
+
+def _invalidate_reviews():
+    # версия — после коммита, чтобы рендер не закешировал под ней ещё прежние отзывы
+    transaction.on_commit(lambda: bump_model_version(Review))
+    schedule_prerender()
+
+
+def _broadcast_published(queryset, moderated_at):
+    """ Отправляет в живую ленту отзывы, опубликованные в moderated_at, пачками по BROADCAST_BATCH_SIZE. """
+    review_ids = (
+        queryset.filter(is_public=True, moderated_at=moderated_at)
+        .order_by('pk').values_list('pk', flat=True)
+        .iterator(chunk_size=BROADCAST_BATCH_SIZE)
+    )
+    batch = []
+    for pk in review_ids:
+        batch.append(pk)
+        if len(batch) >= BROADCAST_BATCH_SIZE:
+            broadcast_reviews(batch)
+            batch = []
+    if batch:
+        broadcast_reviews(batch)
+
+
+def publish_reviews(queryset):
+    """
+    Публикует отзывы одним UPDATE по самому queryset (без списка id — «Выбрать все» в админке может
+    охватывать всю очередь) и после коммита отправляет их в живую ленту.
+    Возвращает количество опубликованных.
+    """
+    moderated_at = timezone.now()
+    updated = queryset.filter(is_public=False).update(is_public=True, moderated_at=moderated_at)
+    if updated:
+        _invalidate_reviews()
+        # опубликованные этим вызовом узнаются по времени модерации
+        transaction.on_commit(lambda: _broadcast_published(queryset, moderated_at))
+    return updated
+
+
+def reject_reviews(queryset):
+    """
+    Отклоняет отзывы (снимает с публикации и убирает из очереди) одним UPDATE.
+    Кеши сбрасываются, только если среди отклонённых были опубликованные.
+    """
+    was_public = queryset.filter(is_public=True).exists()
+    updated = queryset.update(is_public=False, moderated_at=timezone.now())
+    if updated and was_public:
+        _invalidate_reviews()
+    return updated
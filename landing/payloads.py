@@ -0,0 +1,84 @@
+"""
+Данные секций для клиентского кеша: прайс услуг (services) и мастера со соцсетями (masters).
+
+Вместо JSON внутри каждого HTML-ответа страница содержит только адрес /data/<имя>.<версия>.json.
+Версия — хеш версий моделей секции (landing/cache.py), поэтому ответ по такому адресу не меняется
+и кешируется браузером и прокси навсегда, а landing/js/data-cache.js хранит его в localStorage и
+запрашивает заново, только когда версия на странице другая.
+
+Формат компактный: списки однотипных объектов записываются как {"fields": [...], "rows": [[...], ...]}
+(как филиалы для карты) — имена полей не повторяются в каждой записи. JSON кодируется orjson,
+если он установлен, иначе стандартным json.
+"""
+import hashlib
+import json
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.urls import reverse
+
+from .cache import get_or_compute, section_versions
+
+try:
+    import orjson
+except ImportError:  # необязательная зависимость: без неё работает json из стандартной библиотеки
+    orjson = None
+
+# Данные клиента -> секция страницы, от версий моделей которой они зависят
+PAYLOAD_SECTIONS = {
+    'services': 'services',
+    'masters': 'about',
+}
+
+CACHE_KEY_PREFIX = 'landing:payload:'
+
+
+def payload_data(name):
+    from .views import get_masters_data, get_services_data
+
+    return {'services': get_services_data, 'masters': get_masters_data}[name]()
+
+
+def payload_version(name, versions=None):
+    """ Короткая версия данных name; versions — уже прочитанный section_versions(). """
+    section = PAYLOAD_SECTIONS[name]
+    if versions is None:
+        versions = section_versions([section])
+    return hashlib.md5(versions[section].encode('utf-8')).hexdigest()[:12]
+
+
+def payload_links(versions):
+    """ {имя: {'url': ..., 'version': ...}} для шаблонов секций. """
+    links = {}
+    for name in PAYLOAD_SECTIONS:
+        version = payload_version(name, versions)
+        links[name] = {'url': reverse('payload', args=(name, version)), 'version': version}
+    return links
+
+
+def pack(value):
+    """ Списки объектов с одинаковым набором полей -> {"fields": [...], "rows": [[...], ...]}, рекурсивно. """
+    if isinstance(value, dict):
+        return {key: pack(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        if value and all(isinstance(item, dict) for item in value):
+            fields = list(value[0])
+            if all(list(item) == fields for item in value):
+                return {'fields': fields, 'rows': [[pack(item[field]) for field in fields] for item in value]}
+        return [pack(item) for item in value]
+    return value
+
+
+def dumps(data):
+    if orjson is not None:
+        return orjson.dumps(data, default=DjangoJSONEncoder().default)
+    return json.dumps(data, cls=DjangoJSONEncoder, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+
+def encoded_payload(name, version):
+    """
+    Готовое тело ответа: кешируется по версии, после правки его пересчитывает один процесс.
+    Прежние данные не отдаются даже на время пересчёта — ответ по адресу с версией кешируется навсегда.
+    """
+    return get_or_compute(
+        f"{CACHE_KEY_PREFIX}{name}", version, lambda: dumps(pack(payload_data(name))), stale=False,
+    )
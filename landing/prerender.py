@@ -0,0 +1,116 @@
+"""
+Статический пререндер главной страницы.
+
+index.html одинаков для всех анонимных посетителей (CSRF-токен форма отзыва получает отдельным
+запросом), поэтому страницу можно один раз отрендерить в файл и отдавать его напрямую через nginx.
+Файлы перезаписываются атомарно: сначала пишется временный файл, затем он переименовывается.
+"""
+import json
+import os
+import tempfile
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import transaction
+from django.template.loader import render_to_string
+
+
+def get_prerender_root():
+    root = getattr(settings, 'LANDING_PRERENDER_ROOT', None)
+    return str(root) if root else None
+
+
+def write_atomic(path, data):
+    """
+    Записывает файл так, что читатель видит либо старую, либо новую версию целиком.
+    """
+    directory = os.path.dirname(path)
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix='.prerender-', suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as tmp_file:
+            tmp_file.write(data)
+            tmp_file.flush()
+            os.fsync(tmp_file.fileno())
+        # mkstemp создаёт файл с правами 0600 — nginx должен иметь возможность его прочитать
+        os.chmod(tmp_path, 0o644)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+def render_index():
+    """
+    Рендерит главную страницу без запроса: CSRF-токен и пользовательские данные в неё не попадают.
+    Секции — только для текущей версии данных: устаревший файл nginx отдавал бы до следующей правки.
+    """
+    from .views import get_common_context
+
+    context = get_common_context()
+    # Явно сообщаем тегу {% csrf_token %}, что токена нет: форма запросит его сама
+    context['csrf_token'] = 'NOTPROVIDED'
+    # Не отдавать прежний фрагмент, пока другой процесс пересчитывает секцию (см. {% section_cache %})
+    context['section_cache_fresh'] = True
+    return render_to_string('landing/index.html', context)
+
+
+def section_payloads():
+    """
+    Данные секций в виде JSON-совместимых структур (для клиентов, которым не нужен HTML).
+    """
+    from .views import get_address_data, get_branches_data, get_masters_data, get_public_reviews, get_services_data
+
+    return {
+        'services': get_services_data(),
+        'masters': get_masters_data(),
+        'address': get_address_data(),
+        'branches': get_branches_data(),
+        'reviews': [
+            {
+                'id': review.id,
+                'name': review.name,
+                'review': review.review,
+                'rating': review.rating,
+                'created_at': review.created_at,
+            }
+            for review in get_public_reviews()
+        ],
+    }
+
+
+def prerender_landing(root=None):
+    """
+    Пишет index.html и <секция>.json в каталог пререндера. Возвращает список записанных файлов.
+    """
+    root = root or get_prerender_root()
+    if not root:
+        raise ValueError("Каталог пререндера не задан (LANDING_PRERENDER_ROOT).")
+
+    written = []
+    index_path = os.path.join(root, 'index.html')
+    write_atomic(index_path, render_index().encode('utf-8'))
+    written.append(index_path)
+
+    for name, payload in section_payloads().items():
+        path = os.path.join(root, f"{name}.json")
+        data = json.dumps(payload, cls=DjangoJSONEncoder, ensure_ascii=False, separators=(',', ':'))
+        write_atomic(path, data.encode('utf-8'))
+        written.append(path)
+    return written
+
+
+def schedule_prerender():
+    """
+    Ставит в очередь фоновую перегенерацию пререндера (задача landing.tasks.prerender_landing).
+    Ничего не делает, если LANDING_PRERENDER_ROOT не задан.
+
+    Задача ставится после коммита, следом за увеличением версий моделей (оно тоже в on_commit и
+    зарегистрировано раньше): иначе воркер мог бы взять задачу между коммитом и новой версией
+    и записать в index.html секции прежней версии.
+    """
+    if get_prerender_root():
+        from .tasks import prerender_landing as prerender_task
+
+        transaction.on_commit(prerender_task.delay)
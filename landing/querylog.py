@@ -0,0 +1,297 @@
+"""
+Журнал медленных запросов к БД и поиск повторяющихся запросов (N+1).
+
+QueryWatcher подключается к соединениям через connection.execute_wrapper на время запроса
+(см. landing.middleware.QueryLogMiddleware) и на каждый SQL-запрос делает только замер времени
+и подсчёт «формы» запроса. Всё дорогое — EXPLAIN, форматирование и запись в лог — выполняет
+фоновый поток со своим соединением с БД, поэтому обработка HTTP-запроса его не ждёт.
+
+Медленные запросы (дольше LANDING_SLOW_QUERY_MS) пишутся в логгер landing.queries вместе с вьюхой,
+местом вызова в коде landing и планом запроса. Формы запросов, повторившиеся в одном HTTP-запросе
+не меньше LANDING_QUERY_REPEAT_THRESHOLD раз, накапливаются и раз в LANDING_QUERY_REPORT_INTERVAL секунд
+выводятся сводкой.
+"""
+import hashlib
+import logging
+import os
+import queue
+import re
+import sys
+import threading
+import time
+from collections import Counter
+
+import django.db
+from django.conf import settings
+from django.db import connections
+
+logger = logging.getLogger('landing.queries')
+
+# Файлы, в которых ищется место вызова запроса (первый найденный кадр стека, от ближайшего)
+CALL_SITE_FILES = ('views.py', 'serializers.py', 'admin.py', 'api.py')
+LANDING_DIR = os.path.dirname(os.path.abspath(__file__))
+# Кадры самого журнала запросов местом вызова не считаются
+INSTRUMENTATION_FILES = {os.path.abspath(__file__), os.path.join(LANDING_DIR, 'middleware.py')}
+DJANGO_ROOT = os.path.dirname(os.path.dirname(django.__file__))
+DJANGO_DB_DIR = os.path.dirname(django.db.__file__)
+
+# Очередь фонового потока; при переполнении записи отбрасываются, а не тормозят запросы
+QUEUE_SIZE = 1000
+REPORT_TOP = 10
+SQL_LOG_LENGTH = 2000
+
+STRING_RE = re.compile(r"'(?:[^']|'')*'")
+NUMBER_RE = re.compile(r'\b\d+(?:\.\d+)?\b')
+PLACEHOLDER_RE = re.compile(r'%s|\?')
+IN_LIST_RE = re.compile(r'\(\s*\?(?:\s*,\s*\?)*\s*\)')
+SPACE_RE = re.compile(r'\s+')
+# План строится только для чтения: EXPLAIN записи бесполезен, а executemany не объяснить одним запросом
+READ_QUERY_RE = re.compile(r'\s*(SELECT|WITH)\b', re.IGNORECASE)
+
+
+def normalize_sql(sql):
+    """
+    «Форма» запроса: значения и списки IN (...) заменены на ?, пробелы схлопнуты.
+    Запросы, различающиеся только параметрами, получают одну форму.
+    """
+    shape = STRING_RE.sub('?', sql)
+    shape = NUMBER_RE.sub('?', shape)
+    shape = PLACEHOLDER_RE.sub('?', shape)
+    shape = IN_LIST_RE.sub('(...)', shape)
+    return SPACE_RE.sub(' ', shape).strip()
+
+
+def fingerprint(shape):
+    return hashlib.md5(shape.encode('utf-8')).hexdigest()[:12]
+
+
+def _format_site(filename, frame):
+    root = os.path.dirname(LANDING_DIR) if filename.startswith(LANDING_DIR) else DJANGO_ROOT
+    return f"{os.path.relpath(filename, root)}:{frame.f_lineno} in {frame.f_code.co_name}"
+
+
+def call_site():
+    """
+    Место вызова запроса: сначала ищутся вьюхи, сериализаторы и админка landing, затем любой
+    другой модуль landing, затем ближайший кадр вне ORM (например, код админки Django).
+    Строка вида «landing/views.py:57 in get_public_reviews».
+    """
+    landing_site = other_site = None
+    frame = sys._getframe(1)
+    while frame is not None:
+        filename = os.path.abspath(frame.f_code.co_filename)
+        if filename not in INSTRUMENTATION_FILES:
+            if filename.startswith(LANDING_DIR):
+                if os.path.basename(filename) in CALL_SITE_FILES:
+                    return _format_site(filename, frame)
+                landing_site = landing_site or _format_site(filename, frame)
+            elif other_site is None and not filename.startswith(DJANGO_DB_DIR):
+                other_site = _format_site(filename, frame)
+        frame = frame.f_back
+    return landing_site or other_site or '?'
+
+
+def explain_sql(alias, sql, params):
+    """
+    План запроса: EXPLAIN QUERY PLAN на SQLite, EXPLAIN на PostgreSQL и остальных БД.
+    Сам запрос при этом не выполняется.
+    """
+    connection = connections[alias]
+    if connection.vendor == 'sqlite':
+        prefix = 'EXPLAIN QUERY PLAN '
+    else:
+        prefix = 'EXPLAIN '
+    with connection.cursor() as cursor:
+        cursor.execute(prefix + sql, params)
+        rows = cursor.fetchall()
+    if connection.vendor == 'sqlite':
+        # (id, parent, notused, detail): отступ по глубине узла в дереве плана
+        depth = {0: -1}
+        lines = []
+        for node_id, parent, _, detail in rows:
+            depth[node_id] = depth.get(parent, -1) + 1
+            lines.append('  ' * depth[node_id] + detail)
+        return '\n'.join(lines)
+    return '\n'.join(str(row[0]) for row in rows)
+
+
+class RepeatStats:
+    """
+    Накопленная статистика повторяющихся форм запросов по паре (вьюха, форма).
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.entries = {}
+        self.started = time.monotonic()
+
+    def add(self, view, key, shape, site, count, seconds):
+        with self.lock:
+            entry = self.entries.get((view, key))
+            if entry is None:
+                entry = self.entries[(view, key)] = {
+                    'view': view, 'shape': shape, 'site': site,
+                    'requests': 0, 'queries': 0, 'seconds': 0.0, 'max_per_request': 0,
+                }
+            entry['requests'] += 1
+            entry['queries'] += count
+            entry['seconds'] += seconds
+            entry['max_per_request'] = max(entry['max_per_request'], count)
+
+    def pop(self):
+        """ Забирает накопленное и начинает новый период. Возвращает (секунд в периоде, записи). """
+        with self.lock:
+            entries, self.entries = self.entries, {}
+            started, self.started = self.started, time.monotonic()
+        return time.monotonic() - started, sorted(entries.values(), key=lambda e: e['seconds'], reverse=True)
+
+
+class QueryLogWorker:
+    """
+    Фоновый поток: EXPLAIN и запись медленных запросов в лог, периодическая сводка повторов.
+    """
+
+    def __init__(self):
+        self.queue = queue.Queue(maxsize=QUEUE_SIZE)
+        self.stats = RepeatStats()
+        self.dropped = 0
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def submit(self, item):
+        self.start()
+        try:
+            self.queue.put_nowait(item)
+        except queue.Full:
+            self.dropped += 1
+
+    def start(self):
+        # поток запускается лениво: в мастере gunicorn до fork его быть не должно
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name='landing-querylog', daemon=True)
+                self._thread.start()
+
+    def _run(self):
+        interval = getattr(settings, 'LANDING_QUERY_REPORT_INTERVAL', 300)
+        next_report = time.monotonic() + interval
+        while True:
+            try:
+                item = self.queue.get(timeout=max(next_report - time.monotonic(), 0.1))
+            except queue.Empty:
+                item = None
+            if item is not None:
+                try:
+                    self.log_slow_query(item)
+                except Exception:
+                    logger.exception("Не удалось записать медленный запрос")
+                if self.queue.empty():
+                    # соединения этого потока не держим открытыми между всплесками медленных запросов
+                    connections.close_all()
+            if time.monotonic() >= next_report:
+                self.report()
+                next_report = time.monotonic() + interval
+
+    def log_slow_query(self, item):
+        plan = ''
+        if item['explain']:
+            try:
+                plan = explain_sql(item['alias'], item['sql'], item['params'])
+            except Exception as exc:
+                plan = f"EXPLAIN не выполнен: {exc}"
+        logger.warning(
+            "Медленный запрос %.1f мс [%s] %s %s\n  вызов: %s\n  SQL: %s%s",
+            item['seconds'] * 1000, item['alias'], item['view'], item['path'], item['site'],
+            item['sql'][:SQL_LOG_LENGTH],
+            '\n  план:\n    ' + plan.replace('\n', '\n    ') if plan else '',
+        )
+
+    def report(self):
+        period, entries = self.stats.pop()
+        if not entries and not self.dropped:
+            return
+        lines = [f"Повторяющиеся запросы за {period:.0f} с (возможные N+1), форм: {len(entries)}"]
+        for entry in entries[:REPORT_TOP]:
+            lines.append(
+                f"  {entry['view']}: {entry['queries']} запросов в {entry['requests']} HTTP-запросах "
+                f"(до {entry['max_per_request']} за раз), {entry['seconds'] * 1000:.0f} мс; "
+                f"вызов: {entry['site']}\n    {entry['shape'][:300]}"
+            )
+        if self.dropped:
+            lines.append(f"  отброшено записей о медленных запросах: {self.dropped}")
+            self.dropped = 0
+        logger.warning('\n'.join(lines))
+
+
+_worker = QueryLogWorker()
+
+
+def get_worker():
+    return _worker
+
+
+class QueryWatcher:
+    """
+    execute_wrapper для одного HTTP-запроса. На горячем пути — замер времени и счётчик форм.
+    """
+
+    def __init__(self, request, alias, slow_seconds):
+        self.request = request
+        self.alias = alias
+        self.slow_seconds = slow_seconds
+        self.counts = Counter()
+        self.seconds = Counter()
+        self.shapes = {}
+        self.sites = {}
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            elapsed = time.perf_counter() - started
+            shape = normalize_sql(sql)
+            key = fingerprint(shape)
+            self.counts[key] += 1
+            self.seconds[key] += elapsed
+            if key not in self.shapes:
+                self.shapes[key] = shape
+                self.sites[key] = call_site()
+            if self.slow_seconds is not None and elapsed >= self.slow_seconds:
+                self._submit_slow(sql, params, many, elapsed, key)
+
+    def view_name(self):
+        match = getattr(self.request, 'resolver_match', None)
+        return (match.view_name if match else None) or '-'
+
+    def _submit_slow(self, sql, params, many, elapsed, key):
+        explain = (
+            getattr(settings, 'LANDING_SLOW_QUERY_EXPLAIN', True)
+            and not many
+            and READ_QUERY_RE.match(sql) is not None
+        )
+        get_worker().submit({
+            'alias': self.alias,
+            'sql': sql,
+            'params': tuple(params) if params is not None and not many else None,
+            'explain': explain,
+            'seconds': elapsed,
+            'view': self.view_name(),
+            'path': self.request.path,
+            'site': self.sites.get(key) or call_site(),
+        })
+
+    def finish(self):
+        """ Передаёт в статистику формы, повторившиеся в этом запросе не реже порога. """
+        threshold = getattr(settings, 'LANDING_QUERY_REPEAT_THRESHOLD', 5)
+        repeated = [(key, count) for key, count in self.counts.items() if count >= threshold]
+        if not repeated:
+            return
+        view = self.view_name()
+        worker = get_worker()
+        for key, count in repeated:
+            worker.stats.add(view, key, self.shapes[key], self.sites[key], count, self.seconds[key])
+        # сводку выводит фоновый поток
+        worker.start()
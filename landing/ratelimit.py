@@ -0,0 +1,132 @@
+"""
+Защита формы отзывов от флуда — до любых обращений к БД.
+
+- Ограничение частоты: «ведро токенов» на IP-адрес и на нормализованный email. Ведро хранится
+  в общем для всех процессов кеше (settings.LANDING_REVIEW_RATE_CACHE) одним числом — моментом,
+  когда ведро снова станет полным (алгоритм GCRA, эквивалентный ведру токенов).
+- IP клиента за обратным прокси берётся из X-Forwarded-For, но только из записей, добавленных
+  своими прокси (settings.LANDING_TRUSTED_PROXY_HOPS): начало заголовка клиент может подделать.
+- Дубликаты: хеш нормализованного текста отзыва запоминается на LANDING_REVIEW_DUPLICATE_WINDOW
+  секунд через cache.add, поэтому из двух одинаковых отзывов в БД попадает только первый.
+
+Чтение и запись ведра не атомарны: при одновременных запросах одного клиента лимит может быть
+превышен не более чем на число этих одновременных запросов.
+"""
+import hashlib
+import ipaddress
+import math
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+
+# (ёмкость ведра, секунд на восстановление одного токена)
+DEFAULT_IP_RATE = (5, 10 * 60)
+DEFAULT_EMAIL_RATE = (2, 60 * 60)
+DEFAULT_DUPLICATE_WINDOW = 24 * 60 * 60
+# Короткие тексты («Всё отлично!») легко совпадают у разных людей — для них в хеш входят имя и email
+DUPLICATE_MIN_LENGTH = 30
+
+KEY_PREFIX = 'landing:ratelimit:'
+# Почтовые сервисы, где точки в имени ящика не имеют значения
+DOTLESS_DOMAINS = {'gmail.com': 'gmail.com', 'googlemail.com': 'gmail.com'}
+
+
+def get_cache():
+    return caches[getattr(settings, 'LANDING_REVIEW_RATE_CACHE', 'default')]
+
+
+def _digest(value):
+    return hashlib.sha256(value.encode('utf-8')).hexdigest()[:32]
+
+
+def normalize_email(email):
+    """
+    Приводит адрес к виду, общему для всех его вариантов: регистр, метка после «+»,
+    точки в ящиках Gmail. Пустая строка, если адреса нет.
+    """
+    email = (email or '').strip().lower()
+    local, at, domain = email.rpartition('@')
+    if not at or not local:
+        return email
+    local = local.split('+', 1)[0]
+    if domain in DOTLESS_DOMAINS:
+        local, domain = local.replace('.', ''), DOTLESS_DOMAINS[domain]
+    return f"{local}@{domain}"
+
+
+def normalize_text(text):
+    return ' '.join((text or '').lower().replace('ё', 'е').split())
+
+
+def client_ip(request):
+    """
+    IP-адрес клиента. Без прокси — REMOTE_ADDR. За N доверенными прокси (LANDING_TRUSTED_PROXY_HOPS = N)
+    каждый из них дописывает в X-Forwarded-For адрес, с которого пришёл запрос, поэтому клиент —
+    N-й адрес с конца цепочки «X-Forwarded-For + REMOTE_ADDR». None, если адрес не разобрать.
+    """
+    remote_addr = request.META.get('REMOTE_ADDR') or ''
+    hops = getattr(settings, 'LANDING_TRUSTED_PROXY_HOPS', 0)
+    chain = [remote_addr]
+    if hops:
+        forwarded = request.META.get('HTTP_X_FORWARDED_FOR', '')
+        chain = [value.strip() for value in forwarded.split(',') if value.strip()] + chain
+        # Цепочка короче ожидаемой — берём самый дальний адрес, который в ней есть
+        chain = chain[-(hops + 1):]
+    try:
+        return str(ipaddress.ip_address(chain[0]))
+    except ValueError:
+        return None
+
+
+def take_token(scope, identity, rate):
+    """
+    Забирает токен из ведра scope/identity. rate — пара (ёмкость, секунд на один токен).
+    Возвращает 0, если токен получен, иначе — через сколько секунд появится следующий.
+    """
+    capacity, period = rate
+    cache = get_cache()
+    key = f"{KEY_PREFIX}{scope}:{_digest(identity)}"
+    now = time.time()
+    # Момент, к которому ведро восстановится полностью; в прошлом — ведро уже полное
+    full_at = max(cache.get(key) or now, now)
+    wait = full_at + period - now - capacity * period
+    if wait > 0:
+        return math.ceil(wait)
+    full_at += period
+    cache.set(key, full_at, timeout=math.ceil(full_at - now))
+    return 0
+
+
+def take_review_token(ip_address=None, email=None):
+    """
+    Токены для отзыва с IP и email (пустые значения не проверяются).
+    Возвращает 0 или число секунд до следующей разрешённой попытки.
+    """
+    if ip_address:
+        rate = getattr(settings, 'LANDING_REVIEW_RATE_IP', DEFAULT_IP_RATE)
+        wait = take_token('ip', ip_address, rate)
+        if wait:
+            return wait
+    email = normalize_email(email)
+    if email:
+        rate = getattr(settings, 'LANDING_REVIEW_RATE_EMAIL', DEFAULT_EMAIL_RATE)
+        return take_token('email', email, rate)
+    return 0
+
+
+def content_hash(name, email, text):
+    text = normalize_text(text)
+    if len(text) < DUPLICATE_MIN_LENGTH:
+        text = '\n'.join((normalize_text(name), normalize_email(email), text))
+    return _digest(text)
+
+
+def is_duplicate(name, email, text):
+    """
+    True, если такой же отзыв уже отправлялся за последние LANDING_REVIEW_DUPLICATE_WINDOW секунд.
+    Иначе запоминает отзыв и возвращает False.
+    """
+    window = getattr(settings, 'LANDING_REVIEW_DUPLICATE_WINDOW', DEFAULT_DUPLICATE_WINDOW)
+    key = f"{KEY_PREFIX}duplicate:{content_hash(name, email, text)}"
+    return not get_cache().add(key, 1, timeout=window)
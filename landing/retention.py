@@ -0,0 +1,243 @@
+"""
+Хранение отзывов: старые отклонённые и давно опубликованные отзывы переносятся из Review в архив
+(ArchivedReviewBatch, gzip JSON Lines), чтобы таблица, её индексы и список в админке оставались
+размером с рабочий набор.
+
+Политики (дни от created_at, None — не архивировать):
+- LANDING_REVIEW_ARCHIVE_REJECTED_DAYS — проверенные и не опубликованные (спам, отклонённые);
+- LANDING_REVIEW_ARCHIVE_PUBLIC_DAYS — опубликованные.
+Непроверенные отзывы остаются в очереди модерации независимо от возраста.
+
+Перенос идёт пачками по LANDING_REVIEW_ARCHIVE_BATCH_SIZE: каждая пачка — отдельная короткая транзакция
+(запись в архив и удаление из Review), поэтому блокировка записи SQLite не держится долго и форма отзывов
+продолжает работать. Восстановление (restore_reviews) возвращает отзывы с прежними id, если они свободны.
+"""
+import gzip
+import json
+import time
+from datetime import datetime, timedelta
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import connection, models, transaction
+from django.db.models import Case, Value, When
+from django.utils import timezone
+
+from .cache import bump_model_version
+from .models import ArchivedReviewBatch, Review
+from .prerender import schedule_prerender
+
+
+class ArchiveEncoder(DjangoJSONEncoder):
+    """ Даты с микросекундами: DjangoJSONEncoder округляет их до миллисекунд. """
+
+    def default(self, o):
+        if isinstance(o, datetime):
+            return o.isoformat()
+        return super().default(o)
+
+
+class RetentionReport:
+    """ Итог переноса в архив или восстановления """
+
+    def __init__(self):
+        self.counts = {}
+        self.batches = 0
+        self.skipped = 0
+        self.bytes = 0
+
+    @property
+    def total(self):
+        return sum(self.counts.values())
+
+
+def review_fields():
+    return [field.attname for field in Review._meta.concrete_fields]
+
+
+def pack_rows(rows):
+    """ Строки Review (словари полей) -> gzip JSON Lines. """
+    lines = ''.join(json.dumps(row, cls=ArchiveEncoder, ensure_ascii=False) + '\n' for row in rows)
+    return gzip.compress(lines.encode('utf-8'))
+
+
+def unpack_rows(data):
+    """ gzip JSON Lines -> словари полей с типами модели (даты — datetime и т. п.). """
+    fields = {field.attname: field for field in Review._meta.concrete_fields}
+    rows = []
+    for line in gzip.decompress(bytes(data)).decode('utf-8').splitlines():
+        row = json.loads(line)
+        rows.append({name: fields[name].to_python(value) for name, value in row.items() if name in fields})
+    return rows
+
+
+def retention_policies(now=None):
+    """ [(причина, queryset отзывов для архива)] по настройкам хранения. """
+    now = now or timezone.now()
+    policies = []
+    rejected_days = getattr(settings, 'LANDING_REVIEW_ARCHIVE_REJECTED_DAYS', 90)
+    if rejected_days is not None:
+        policies.append((ArchivedReviewBatch.REASON_REJECTED, Review.objects.filter(
+            is_public=False, moderated_at__isnull=False, created_at__lt=now - timedelta(days=rejected_days),
+        )))
+    public_days = getattr(settings, 'LANDING_REVIEW_ARCHIVE_PUBLIC_DAYS', None)
+    if public_days is not None:
+        policies.append((ArchivedReviewBatch.REASON_PUBLIC, Review.objects.filter(
+            is_public=True, created_at__lt=now - timedelta(days=public_days),
+        )))
+    return policies
+
+
+def _delete_reviews(ids):
+    """
+    Удаление одним запросом, без загрузки объектов: QuerySet.delete() из-за обработчиков post_delete
+    выбрал бы каждую строку и сбрасывал кеш на каждый отзыв. Кеш сбрасывается один раз в конце.
+    """
+    quote = connection.ops.quote_name
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"DELETE FROM {quote(Review._meta.db_table)} "
+            f"WHERE {quote(Review._meta.pk.column)} IN ({', '.join(['%s'] * len(ids))})",
+            ids,
+        )
+
+
+def _archive_batch(reason, queryset, fields, batch_size):
+    """ Одна пачка в одной транзакции; число перенесённых отзывов и размер архива. """
+    with transaction.atomic():
+        rows = list(queryset.order_by('pk').values(*fields)[:batch_size])
+        if not rows:
+            return 0, 0
+        dates = [row['created_at'] for row in rows]
+        data = pack_rows(rows)
+        ArchivedReviewBatch.objects.create(
+            reason=reason, count=len(rows), first_created_at=min(dates), last_created_at=max(dates), data=data,
+        )
+        _delete_reviews([row['id'] for row in rows])
+    return len(rows), len(data)
+
+
+def _invalidate(public_changed):
+    bump_model_version(Review)
+    if public_changed:
+        schedule_prerender()
+
+
+def archive_reviews(batch_size=None, pause=0.0, dry_run=False, now=None, log=None):
+    """
+    Переносит в архив отзывы по политикам хранения. pause — секунды между пачками,
+    чтобы под нагрузкой запросы сайта успевали между транзакциями.
+    """
+    batch_size = batch_size or getattr(settings, 'LANDING_REVIEW_ARCHIVE_BATCH_SIZE', 500)
+    fields = review_fields()
+    report = RetentionReport()
+    for reason, queryset in retention_policies(now):
+        if dry_run:
+            report.counts[reason] = queryset.count()
+            continue
+        report.counts[reason] = 0
+        while True:
+            count, size = _archive_batch(reason, queryset, fields, batch_size)
+            if not count:
+                break
+            report.counts[reason] += count
+            report.batches += 1
+            report.bytes += size
+            if log:
+                log(f"{reason}: перенесено {report.counts[reason]}")
+            if pause:
+                time.sleep(pause)
+
+    if report.total and not dry_run:
+        _invalidate(report.counts.get(ArchivedReviewBatch.REASON_PUBLIC, 0) > 0)
+    return report
+
+
+def _restore_batch(batch_id, matches, seen_emails, dry_run):
+    """ Возвращает подходящие отзывы пачки в Review; (восстановлено, пропущено, есть ли опубликованные). """
+    with transaction.atomic():
+        batch = ArchivedReviewBatch.objects.select_for_update().filter(pk=batch_id).first()
+        if batch is None:
+            return 0, 0, False
+        rows = unpack_rows(batch.data)
+        selected = [row for row in rows if matches(row)]
+        if not selected:
+            return 0, 0, False
+
+        taken_ids = set(Review.objects.filter(pk__in=[row['id'] for row in selected]).values_list('pk', flat=True))
+        taken_emails = set(
+            Review.objects.filter(email__in=[row['email'] for row in selected]).values_list('email', flat=True)
+        ) | seen_emails
+        restored, skipped = [], []
+        for row in selected:
+            # email у Review уникален: если автор уже оставил новый отзыв, архивный остаётся в архиве
+            if row['email'] in taken_emails:
+                skipped.append(row)
+                continue
+            taken_emails.add(row['email'])
+            restored.append(row)
+        if dry_run or not restored:
+            return len(restored), len(skipped), False
+
+        reviews = Review.objects.bulk_create([
+            Review(**{**row, 'id': None if row['id'] in taken_ids else row['id']}) for row in restored
+        ])
+        # bulk_create проставляет created_at = now (auto_now_add) — возвращаем исходные даты одним UPDATE
+        Review.objects.filter(pk__in=[review.pk for review in reviews]).update(created_at=Case(
+            *[When(pk=review.pk, then=Value(row['created_at'])) for review, row in zip(reviews, restored)],
+            output_field=models.DateTimeField(),
+        ))
+        seen_emails.update(row['email'] for row in restored)
+        restored_ids = {id(row) for row in restored}
+        remaining = [row for row in rows if id(row) not in restored_ids]
+        if remaining:
+            dates = [row['created_at'] for row in remaining]
+            batch.data = pack_rows(remaining)
+            batch.count = len(remaining)
+            batch.first_created_at, batch.last_created_at = min(dates), max(dates)
+            batch.save(update_fields=['data', 'count', 'first_created_at', 'last_created_at'])
+        else:
+            batch.delete()
+    return len(restored), len(skipped), any(row['is_public'] for row in restored)
+
+
+def restore_reviews(batch_ids=None, reason=None, since=None, until=None, email=None, dry_run=False, log=None):
+    """
+    Возвращает отзывы из архива в Review. Фильтры: пачки batch_ids, причина архивации,
+    дата создания отзыва в [since, until), email автора. Восстановленные строки удаляются из архива.
+    """
+    batches = ArchivedReviewBatch.objects.order_by('pk')
+    if batch_ids:
+        batches = batches.filter(pk__in=batch_ids)
+    if reason:
+        batches = batches.filter(reason=reason)
+    if since:
+        batches = batches.filter(last_created_at__gte=since)
+    if until:
+        batches = batches.filter(first_created_at__lt=until)
+    email = email.strip().lower() if email else None
+
+    def matches(row):
+        return (
+            (since is None or row['created_at'] >= since)
+            and (until is None or row['created_at'] < until)
+            and (email is None or row['email'].lower() == email)
+        )
+
+    report = RetentionReport()
+    report.counts['restored'] = 0
+    public_changed = False
+    seen_emails = set()
+    for batch_id in list(batches.values_list('pk', flat=True)):
+        restored, skipped, public = _restore_batch(batch_id, matches, seen_emails, dry_run)
+        if restored or skipped:
+            report.batches += 1
+        report.counts['restored'] += restored
+        report.skipped += skipped
+        public_changed = public_changed or public
+        if log and (restored or skipped):
+            log(f"пачка {batch_id}: восстановлено {restored}, пропущено {skipped}")
+
+    if report.total and not dry_run:
+        _invalidate(public_changed)
+    return report
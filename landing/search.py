@@ -0,0 +1,233 @@
+"""
+Полнотекстовый поиск по услугам, подразделам и позициям прайса.
+
+Каждая услуга, подраздел и позиция прайса — строка SearchEntry с текстами, уже приведёнными
+к основам слов (landing/stemmer.py). Поверх таблицы работает индекс СУБД:
+
+- SQLite: виртуальная таблица FTS5 (external content), синхронизируется триггерами;
+- PostgreSQL: генерируемая колонка tsvector с GIN-индексом;
+- другие СУБД: запасной вариант через LIKE.
+
+Индекс СУБД создаёт миграция 0017_search_index (её DDL зафиксирован в самой миграции).
+
+SearchEntry обновляются сигналами при изменении услуг, подразделов и прайса (landing/signals.py).
+Запрос «детская стриж» превращается в поиск по префиксам основ «детск* AND стриж*».
+"""
+import hashlib
+
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS, connection, connections, transaction
+from django.db.models import Q
+
+from .cache import bump_model_version, model_version
+from .stemmer import stem, stem_text, tokenize
+
+FTS_TABLE = 'landing_searchentry_fts'
+
+# Совпадают с SearchEntry.KIND_*; продублированы, потому что у исторических моделей миграций констант нет
+KIND_SERVICE, KIND_SUBSECTION, KIND_PRICE = 'service', 'subsection', 'price'
+
+# Вес совпадения в заголовке, описании и названиях родителей
+TITLE_WEIGHT, BODY_WEIGHT, CONTEXT_WEIGHT = 10.0, 2.0, 1.0
+
+MIN_QUERY_LENGTH = 2
+MAX_QUERY_TERMS = 8
+RESULTS_CACHE_TIMEOUT = 5 * 60
+
+
+def _backend(conn=None):
+    conn = conn or connection
+    if conn.vendor == 'postgresql':
+        return 'postgresql'
+    if conn.vendor == 'sqlite' and FTS_TABLE in conn.introspection.table_names():
+        return 'sqlite'
+    return 'like'
+
+
+# --- Индексация ---
+
+def _entry(SearchEntry, kind, obj, service_id, description='', context=()):
+    title = obj.operation_name if kind == KIND_PRICE else obj.name
+    return SearchEntry(
+        kind=kind,
+        object_id=obj.pk,
+        service_id=service_id,
+        title=title,
+        title_terms=stem_text(title),
+        body_terms=stem_text(description),
+        context_terms=stem_text(' '.join(context)),
+    )
+
+
+def service_entries(service, SearchEntry):
+    """
+    Записи индекса для услуги, её подразделов и всех позиций прайса.
+    Ожидает, что subsections__price_items и price_items уже загружены через prefetch_related.
+    """
+    entries = [_entry(SearchEntry, KIND_SERVICE, service, service.pk, service.description or '')]
+    for item in service.price_items.all():
+        entries.append(_entry(SearchEntry, KIND_PRICE, item, service.pk, context=(service.name,)))
+    for subsection in service.subsections.all():
+        entries.append(_entry(
+            SearchEntry, KIND_SUBSECTION, subsection, service.pk,
+            subsection.description or '', context=(service.name,),
+        ))
+        for item in subsection.price_items.all():
+            entries.append(_entry(
+                SearchEntry, KIND_PRICE, item, service.pk, context=(service.name, subsection.name),
+            ))
+    return entries
+
+
+def reindex_service(service_id):
+    """
+    Перестраивает записи индекса одной услуги. Услуга — небольшое дерево, поэтому
+    проще и надёжнее пересобрать его целиком, чем отслеживать отдельные поля.
+    """
+    from .models import SearchEntry, Service
+
+    with transaction.atomic():
+        service = (
+            Service.objects.filter(pk=service_id)
+            .prefetch_related('subsections__price_items', 'price_items')
+            .first()
+        )
+        entries = service_entries(service, SearchEntry) if service is not None else []
+
+        stale = Q(service_id=service_id)
+        # Позиция или подраздел могли переехать из другой услуги
+        for kind in {entry.kind for entry in entries}:
+            stale |= Q(kind=kind, object_id__in=[entry.object_id for entry in entries if entry.kind == kind])
+        SearchEntry.objects.filter(stale).delete()
+        SearchEntry.objects.bulk_create(entries)
+    bump_model_version(SearchEntry)
+    return len(entries)
+
+
+def rebuild_index(apps=None, batch_size=200, using=DEFAULT_DB_ALIAS):
+    """
+    Пересобирает весь индекс. apps и using передаются из миграции (исторические модели и её соединение).
+    """
+    if apps is None:
+        from django.apps import apps
+
+    Service = apps.get_model('landing', 'Service')
+    SearchEntry = apps.get_model('landing', 'SearchEntry')
+    total = 0
+    with transaction.atomic(using=using):
+        SearchEntry.objects.using(using).all().delete()
+        batch = []
+        services = Service.objects.using(using).prefetch_related('subsections__price_items', 'price_items')
+        for service in services.iterator(chunk_size=batch_size):
+            batch.extend(service_entries(service, SearchEntry))
+            if len(batch) >= batch_size:
+                SearchEntry.objects.using(using).bulk_create(batch)
+                total += len(batch)
+                batch = []
+        SearchEntry.objects.using(using).bulk_create(batch)
+        total += len(batch)
+
+    conn = connections[using]
+    if _backend(conn) == 'sqlite':
+        with conn.cursor() as cursor:
+            cursor.execute(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('optimize')")
+    bump_model_version(SearchEntry)
+    return total
+
+
+# --- Поиск ---
+
+def query_terms(query):
+    """ Основы слов запроса (не больше MAX_QUERY_TERMS). Недописанное слово даёт основу-префикс. """
+    terms = []
+    for token in tokenize(query)[:MAX_QUERY_TERMS]:
+        term = stem(token)
+        if len(term) < MIN_QUERY_LENGTH:
+            term = token
+        if term not in terms:
+            terms.append(term)
+    return terms
+
+
+def _match_sqlite(terms, limit):
+    match = ' '.join(f'"{term}"*' for term in terms)
+    sql = (
+        f"SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s "
+        f"ORDER BY bm25({FTS_TABLE}, %s, %s, %s) LIMIT %s"
+    )
+    with connection.cursor() as cursor:
+        cursor.execute(sql, [match, TITLE_WEIGHT, BODY_WEIGHT, CONTEXT_WEIGHT, limit])
+        return [row[0] for row in cursor.fetchall()]
+
+
+def _match_postgresql(terms, limit):
+    tsquery = ' & '.join(f"{term}:*" for term in terms)
+    sql = (
+        "SELECT id FROM landing_searchentry, to_tsquery('simple', %s) query "
+        "WHERE search_vector @@ query ORDER BY ts_rank(search_vector, query) DESC, id LIMIT %s"
+    )
+    with connection.cursor() as cursor:
+        cursor.execute(sql, [tsquery, limit])
+        return [row[0] for row in cursor.fetchall()]
+
+
+def _match_like(terms, limit):
+    from .models import SearchEntry
+
+    queryset = SearchEntry.objects.all()
+    for term in terms:
+        queryset = queryset.filter(
+            Q(title_terms__contains=term) | Q(body_terms__contains=term) | Q(context_terms__contains=term)
+        )
+    return list(queryset.order_by('service_id', 'kind', 'pk').values_list('pk', flat=True)[:limit])
+
+
+MATCHERS = {'sqlite': _match_sqlite, 'postgresql': _match_postgresql, 'like': _match_like}
+
+
+def _group_results(entry_ids):
+    """
+    Загружает найденные записи и группирует их по услугам в порядке релевантности.
+    """
+    from .models import PriceItem, SearchEntry
+
+    entries = SearchEntry.objects.select_related('service').in_bulk(entry_ids)
+    price_ids = [e.object_id for e in entries.values() if e.kind == KIND_PRICE]
+    prices = PriceItem.objects.select_related('subsection').in_bulk(price_ids)
+
+    groups = {}
+    for entry_id in entry_ids:
+        entry = entries.get(entry_id)
+        if entry is None:
+            continue
+        group = groups.setdefault(entry.service_id, {
+            'service': {'id': entry.service_id, 'name': entry.service.name},
+            'items': [],
+        })
+        item = {'kind': entry.kind, 'id': entry.object_id, 'title': entry.title}
+        if entry.kind == KIND_PRICE and entry.object_id in prices:
+            price_item = prices[entry.object_id]
+            item['price'] = price_item.price
+            item['duration_minutes'] = price_item.duration_minutes
+            item['subsection'] = price_item.subsection.name if price_item.subsection else None
+        group['items'].append(item)
+    return list(groups.values())
+
+
+def search(query, limit=30):
+    """
+    Ищет услуги, подразделы и позиции прайса. Возвращает список групп
+    [{'service': {...}, 'items': [...]}], отсортированный по релевантности лучшего совпадения.
+    Результаты кешируются до следующего обновления индекса.
+    """
+    terms = query_terms(query)
+    if not terms or sum(map(len, terms)) < MIN_QUERY_LENGTH:
+        return []
+
+    digest = hashlib.md5(f"{limit}:{' '.join(terms)}".encode('utf-8')).hexdigest()
+    key = f"landing:search:{model_version('landing.searchentry')}:{digest}"
+    results = cache.get(key)
+    if results is None:
+        results = _group_results(MATCHERS[_backend()](terms, limit))
+        cache.set(key, results, RESULTS_CACHE_TIMEOUT)
+    return results
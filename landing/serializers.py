@@ -7,7 +7,7 @@ class AddressSerializer(serializers.ModelSerializer):
 
     class Meta:
         model = Address
-        fields = ('name', 'address', 'email', 'phone', 'opening_hours', 'latitude', 'longitude', 'formatted_phone_number')
+        fields = ('id', 'name', 'address', 'email', 'phone', 'opening_hours', 'latitude', 'longitude', 'formatted_phone_number')
 
     # Этот метод будет вызван для получения значения formatted_phone_number
     def get_formatted_phone_number(self, obj):
@@ -24,7 +24,10 @@ class MasterSerializer(serializers.ModelSerializer):
 
     class Meta:
         model = Master
-        fields = ('name', 'photo', 'specialty', 'description', 'socials')
+        fields = (
+            'id', 'name', 'photo', 'specialty', 'description', 'socials', 'branch',
+            'photo_width', 'photo_height', 'photo_color', 'photo_placeholder',
+        )
 
 class ReviewSerializer(serializers.ModelSerializer):
     class Meta:
@@ -40,6 +43,15 @@ class ReviewSerializer(serializers.ModelSerializer):
             raise serializers.ValidationError({"review": "Отзыв не может быть пустым."})
         return attrs
 
+class PublicReviewSerializer(serializers.ModelSerializer):
+    """
+    Опубликованный отзыв для публичного API: без email и служебных полей.
+    """
+    class Meta:
+        model = Review
+        fields = ['id', 'name', 'review', 'rating', 'created_at']
+        read_only_fields = fields
+
 class PriceItemSerializer(serializers.ModelSerializer):
     """
     Сериализатор для отдельной позиции прайса.
@@ -61,7 +73,10 @@ class ServiceSubsectionSerializer(serializers.ModelSerializer):
 
     class Meta:
         model = ServiceSubsection
-        fields = ['id', 'name', 'description', 'price_items', 'title_image']
+        fields = [
+            'id', 'name', 'description', 'price_items', 'title_image',
+            'title_image_width', 'title_image_height', 'title_image_color', 'title_image_placeholder',
+        ]
 
 
 class ServiceSerializer(serializers.ModelSerializer):
@@ -79,7 +94,10 @@ class ServiceSerializer(serializers.ModelSerializer):
 
     class Meta:
         model = Service
-        fields = ['id', 'name', 'description', 'has_subsections', 'subsections', 'price_list', 'title_image']
+        fields = [
+            'id', 'name', 'description', 'has_subsections', 'subsections', 'price_list', 'branches', 'title_image',
+            'title_image_width', 'title_image_height', 'title_image_color', 'title_image_placeholder',
+        ]
 
     def get_price_list(self, obj):
         """
@@ -0,0 +1,77 @@
+"""
+Service worker лендинга (/sw.js): сайт открывается и без сети, а повторный визит почти не ходит в сеть.
+
+Стратегии (шаблон landing/sw.js):
+- статика с хешем в имени — из кеша (precache при установке + всё, что загружалось позже);
+  список для precache строится при collectstatic (LandingStaticFilesStorage в landing/storage.py);
+- данные секций /data/<имя>.<версия>.json — из кеша: адрес меняется вместе с данными;
+  при установке и при каждом обновлении главной страницы загружаются текущие версии;
+- media — из кеша, если имя по хешу содержимого, иначе stale-while-revalidate; библиотеки с CDN — тоже SWR;
+- главная страница — stale-while-revalidate: повторный заход открывается из кеша (с телефоном,
+  часами работы и прайсом), а свежая версия загружается в фоне для следующего.
+
+Версия кешей — хеш списка precache, поэтому после деплоя со статикой старые кеши удаляются.
+"""
+import json
+from functools import lru_cache
+from urllib.parse import urljoin
+
+from django.conf import settings
+from django.contrib.staticfiles.storage import staticfiles_storage
+from django.http import HttpResponse
+from django.template.loader import render_to_string
+from django.urls import reverse
+from django.utils.cache import patch_cache_control
+from django.utils.encoding import filepath_to_uri
+from django.views.decorators.http import require_safe
+
+from .storage import PRECACHE_MANIFEST_NAME
+
+# Сторонние хосты, ответы которых service worker кеширует (библиотеки на страницах лендинга)
+CDN_HOSTS = ('code.jquery.com', 'cdn.jsdelivr.net', 'cdnjs.cloudflare.com', 'unpkg.com')
+# Страницы, которые открываются из кеша
+NAVIGATION_PATHS = ('/',)
+# Сколько media-файлов держать в кеше (старые вытесняются)
+MEDIA_CACHE_ENTRIES = 100
+
+
+def precache_manifest():
+    """ {'version': ..., 'names': [...]} из collectstatic; до collectstatic — пустой список. """
+    try:
+        with staticfiles_storage.open(PRECACHE_MANIFEST_NAME) as f:
+            return json.loads(f.read().decode('utf-8'))
+    except (FileNotFoundError, ValueError):
+        return {'version': 'dev', 'names': []}
+
+
+@lru_cache(maxsize=1)
+def service_worker_script():
+    """ Текст sw.js: список precache меняется только при деплое, поэтому считается раз на процесс. """
+    manifest = precache_manifest()
+    config = {
+        'version': manifest['version'],
+        'precache': [urljoin(settings.STATIC_URL, filepath_to_uri(name)) for name in manifest['names']],
+        'pages': list(NAVIGATION_PATHS),
+        'staticUrl': settings.STATIC_URL,
+        'mediaUrl': settings.MEDIA_URL,
+        'dataUrl': reverse('payload', args=('name', 'version')).rsplit('/', 1)[0] + '/',
+        'cdnHosts': list(CDN_HOSTS),
+        'mediaEntries': MEDIA_CACHE_ENTRIES,
+    }
+    return render_to_string('landing/sw.js', {'config': json.dumps(config, indent=2)})
+
+
+def service_worker_url():
+    """ Адрес для регистрации на странице или пустая строка, если LANDING_SERVICE_WORKER выключен. """
+    return reverse('service-worker') if getattr(settings, 'LANDING_SERVICE_WORKER', False) else ''
+
+
+@require_safe
+def service_worker(request):
+    """
+    Скрипт service worker. Отдаётся с корня сайта, чтобы его область действия покрывала весь сайт.
+    """
+    response = HttpResponse(service_worker_script(), content_type='application/javascript; charset=utf-8')
+    # браузер должен проверять обновление при каждом заходе
+    patch_cache_control(response, no_cache=True)
+    return response
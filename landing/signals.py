@@ -0,0 +1,182 @@
+from django.db import transaction
+from django.db.models.signals import m2m_changed, post_delete, post_init, post_save, pre_save
+from django.dispatch import receiver
+
+from .cache import bump_model_version
+from .imaging import empty_metadata, image_size, meta_field_names
+from .live import broadcast_reviews
+from .models import Address, GalleryImage, Master, PriceItem, Review, Service, ServiceSubsection, Social
+from .prerender import schedule_prerender
+from .search import reindex_service
+from .tasks import fill_image_metadata
+
+# Модели с изображениями и имена их ImageField
+IMAGE_FIELDS = {
+    Master: ('photo',),
+    GalleryImage: ('image',),
+    Service: ('title_image',),
+    ServiceSubsection: ('title_image',),
+}
+
+# Модели, от которых зависят кешируемые секции лендинга
+CACHED_MODELS = (Address, Master, Social, GalleryImage, Review, Service, ServiceSubsection, PriceItem)
+
+
+def _image_names(sender, instance):
+    deferred = instance.get_deferred_fields()
+    return {
+        field_name: getattr(instance, field_name).name or ''
+        for field_name in IMAGE_FIELDS[sender]
+        if field_name not in deferred
+    }
+
+
+@receiver(post_init, sender=Master)
+@receiver(post_init, sender=GalleryImage)
+@receiver(post_init, sender=Service)
+@receiver(post_init, sender=ServiceSubsection)
+@receiver(post_save, sender=Master)
+@receiver(post_save, sender=GalleryImage)
+@receiver(post_save, sender=Service)
+@receiver(post_save, sender=ServiceSubsection)
+def remember_image_names(sender, instance, **kwargs):
+    """
+    Запоминает имена файлов, загруженных из БД, чтобы при сохранении понять, что изображение заменили.
+    """
+    instance._stored_image_names = _image_names(sender, instance)
+
+
+@receiver(pre_save, sender=Master)
+@receiver(pre_save, sender=GalleryImage)
+@receiver(pre_save, sender=Service)
+@receiver(pre_save, sender=ServiceSubsection)
+def reset_image_metadata(sender, instance, raw=False, **kwargs):
+    """
+    Сбрасывает метаданные заменённого изображения: ширину и высоту заполнит fill_image_dimensions
+    после сохранения файла, остальное — фоновая задача fill_image_metadata.
+    Файл, который не менялся с момента загрузки модели из БД, не трогается.
+    """
+    instance._changed_image_fields = []
+    if raw:
+        return
+    stored_names = getattr(instance, '_stored_image_names', {})
+    for field_name, current_name in _image_names(sender, instance).items():
+        field_file = getattr(instance, field_name)
+        if field_file and field_file._committed and current_name == stored_names.get(field_name):
+            continue
+        metadata = empty_metadata()
+        if field_file:
+            instance._changed_image_fields.append(field_name)
+        for key, value in metadata.items():
+            setattr(instance, meta_field_names(field_name)[key], value)
+
+
+@receiver(post_save, sender=Master)
+@receiver(post_save, sender=GalleryImage)
+@receiver(post_save, sender=Service)
+@receiver(post_save, sender=ServiceSubsection)
+def fill_image_dimensions(sender, instance, raw=False, **kwargs):
+    """
+    Записывает ширину и высоту нового изображения сразу, чтобы страница не ждала фоновой задачи.
+    Размеры читаются из заголовка уже сохранённого (нормализованного) файла только при загрузке:
+    width_field/height_field у ImageField открывали бы файл при каждой загрузке модели из БД.
+    """
+    dimensions = {}
+    for field_name in getattr(instance, '_changed_image_fields', ()):
+        field_file = getattr(instance, field_name)
+        with field_file.storage.open(field_file.name, 'rb') as fh:
+            width, height = image_size(fh)
+        names = meta_field_names(field_name)
+        dimensions.update({names['width']: width, names['height']: height})
+    if dimensions:
+        for attname, value in dimensions.items():
+            setattr(instance, attname, value)
+        sender.objects.filter(pk=instance.pk).update(**dimensions)
+
+
+@receiver(post_save, sender=Master)
+@receiver(post_save, sender=GalleryImage)
+@receiver(post_save, sender=Service)
+@receiver(post_save, sender=ServiceSubsection)
+def schedule_image_metadata(sender, instance, raw=False, **kwargs):
+    """
+    Ставит в очередь расчёт метаданных новых изображений — не внутри запроса админки.
+    """
+    for field_name in getattr(instance, '_changed_image_fields', ()):
+        fill_image_metadata.delay(model=sender._meta.label, pk=instance.pk, field_name=field_name)
+    instance._changed_image_fields = []
+
+
+def invalidate_sections(sender, instance, **kwargs):
+    """
+    Увеличивает версию изменённой модели, чтобы перерисовались только зависящие от неё секции,
+    и планирует перегенерацию статической главной страницы.
+    Версия увеличивается после коммита: иначе параллельный рендер успел бы сохранить под новой версией
+    ещё прежние данные (а данные секций по адресу с версией кешируются браузером на год).
+    Новый неопубликованный отзыв на странице не виден, поэтому кеш он не сбрасывает.
+    """
+    if sender is Review and not instance.is_public and not getattr(instance, '_stored_is_public', False):
+        return
+    transaction.on_commit(lambda: bump_model_version(sender))
+    schedule_prerender()
+
+
+for model in CACHED_MODELS:
+    post_save.connect(invalidate_sections, sender=model, dispatch_uid=f"invalidate_sections_save_{model.__name__}")
+    post_delete.connect(invalidate_sections, sender=model, dispatch_uid=f"invalidate_sections_delete_{model.__name__}")
+
+
+@receiver(m2m_changed, sender=Service.branches.through)
+def invalidate_service_branches(sender, instance, action, **kwargs):
+    """ Изменился список филиалов услуги — это изменение услуги (или филиала, если правили с его стороны). """
+    if action in ('post_add', 'post_remove', 'post_clear'):
+        invalidate_sections(type(instance), instance)
+
+
+def _owner_service_id(instance):
+    if isinstance(instance, Service):
+        return instance.pk
+    if isinstance(instance, ServiceSubsection):
+        return instance.service_id
+    if instance.service_id:
+        return instance.service_id
+    return ServiceSubsection.objects.filter(pk=instance.subsection_id).values_list('service_id', flat=True).first()
+
+
+@receiver(post_save, sender=Service)
+@receiver(post_save, sender=ServiceSubsection)
+@receiver(post_save, sender=PriceItem)
+@receiver(post_delete, sender=ServiceSubsection)
+@receiver(post_delete, sender=PriceItem)
+def update_search_index(sender, instance, raw=False, **kwargs):
+    """
+    Перестраивает поисковый индекс услуги после коммита (удалённая услуга
+    уносит свои записи индекса каскадно, отдельной обработки не требует).
+    """
+    if raw:
+        return
+    service_id = _owner_service_id(instance)
+    if service_id:
+        transaction.on_commit(lambda: reindex_service(service_id))
+
+
+@receiver(post_save, sender=Review)
+def broadcast_published_review(sender, instance, raw=False, **kwargs):
+    """
+    Отправляет отзыв в живую ленту, когда его публикуют (is_public: False -> True).
+    """
+    if raw or not instance.is_public or getattr(instance, '_stored_is_public', False):
+        return
+    review_id = instance.pk
+    transaction.on_commit(lambda: broadcast_reviews([review_id]))
+
+
+@receiver(post_init, sender=Review)
+@receiver(post_save, sender=Review)
+def remember_review_state(sender, instance, **kwargs):
+    """
+    Запоминает, был ли отзыв опубликован на момент загрузки из БД.
+    Подключается после invalidate_sections и broadcast_published_review, чтобы они успели увидеть прежнее состояние.
+    """
+    if 'is_public' not in instance.get_deferred_fields():
+        instance._stored_is_public = instance.is_public
@@ -0,0 +1,227 @@
+"""
+Локальная оценка отзывов на спам — без внешних сервисов.
+
+Оценка складывается из двух частей (в логарифмах шансов):
+
+- наивный байесовский классификатор по символьным n-граммам, обученный командой
+  `manage.py train_spam_model` на уже опубликованных (не спам) и отклонённых (спам) отзывах;
+- эвристики: ссылки, повторы, КАПС и частота отправки отзывов с одного IP.
+
+Итог — вероятность спама от 0 до 1 в Review.spam_score. Считается фоновой задачей
+landing.tasks.score_review_spam после сохранения отзыва, а не в запросе. Пока модель не обучена,
+оценка держится только на эвристиках и отзывы по ней автоматически не отклоняются.
+"""
+import ipaddress
+import json
+import math
+import os
+import random
+import re
+import threading
+from collections import Counter
+from datetime import timedelta
+
+from django.conf import settings
+from django.utils import timezone
+
+NGRAM_SIZES = (2, 3, 4)
+# n-граммы, встретившиеся в обучающей выборке реже, в модель не попадают (она остаётся компактной)
+MIN_FEATURE_COUNT = 2
+
+LINK_RE = re.compile(r'(https?://|www\.|\b[\w-]+\.(ru|com|net|org|info|io|xyz|top|su|рф)\b)', re.IGNORECASE)
+REPEATED_CHAR_RE = re.compile(r'(.)\1{5,}')
+WORD_RE = re.compile(r'\w+')
+
+# Вклад эвристик в логарифм шансов «спам / не спам»
+LINK_WEIGHT = 2.5
+REPEATED_CHARS_WEIGHT = 1.5
+REPEATED_WORDS_WEIGHT = 1.5
+CAPS_WEIGHT = 1.0
+RATE_WEIGHT = 1.2  # за каждый отзыв с того же IP за последний час
+RATE_WINDOW = timedelta(hours=1)
+MAX_RATE_BONUS = 5.0
+# Начальный логарифм шансов, пока модель не обучена: считаем, что спама около 5%
+UNTRAINED_LOG_ODDS = -3.0
+
+
+def normalize(text):
+    return ' '.join((text or '').lower().replace('ё', 'е').split())
+
+
+def char_ngrams(text):
+    """ Множество символьных n-грамм текста (с пробелами по краям, чтобы учитывались начала и концы слов). """
+    text = f" {normalize(text)} "
+    return {text[i:i + n] for n in NGRAM_SIZES for i in range(len(text) - n + 1)}
+
+
+class NaiveBayes:
+    """
+    Бернуллиевский наивный Байес по наличию n-грамм в тексте, со сглаживанием Лапласа.
+    """
+
+    def __init__(self, spam_counts=None, ham_counts=None, spam_docs=0, ham_docs=0):
+        self.spam_counts = Counter(spam_counts or {})
+        self.ham_counts = Counter(ham_counts or {})
+        self.spam_docs = spam_docs
+        self.ham_docs = ham_docs
+
+    @classmethod
+    def train(cls, texts, labels):
+        model = cls()
+        for text, is_spam in zip(texts, labels):
+            features = char_ngrams(text)
+            if is_spam:
+                model.spam_counts.update(features)
+                model.spam_docs += 1
+            else:
+                model.ham_counts.update(features)
+                model.ham_docs += 1
+        model.prune(MIN_FEATURE_COUNT)
+        return model
+
+    def prune(self, min_count):
+        for feature in list(self.spam_counts.keys() | self.ham_counts.keys()):
+            if self.spam_counts[feature] + self.ham_counts[feature] < min_count:
+                self.spam_counts.pop(feature, None)
+                self.ham_counts.pop(feature, None)
+
+    @property
+    def trained(self):
+        return self.spam_docs > 0 and self.ham_docs > 0
+
+    def log_odds(self, text):
+        """ Логарифм шансов «спам / не спам» по тексту. Для необученной модели — UNTRAINED_LOG_ODDS. """
+        if not self.trained:
+            return UNTRAINED_LOG_ODDS
+        score = math.log(self.spam_docs / self.ham_docs)
+        for feature in char_ngrams(text):
+            spam, ham = self.spam_counts.get(feature, 0), self.ham_counts.get(feature, 0)
+            if spam or ham:
+                score += math.log((spam + 1) / (self.spam_docs + 2)) - math.log((ham + 1) / (self.ham_docs + 2))
+        return score
+
+    def to_dict(self):
+        return {
+            'ngram_sizes': NGRAM_SIZES,
+            'spam_docs': self.spam_docs,
+            'ham_docs': self.ham_docs,
+            'spam_counts': dict(self.spam_counts),
+            'ham_counts': dict(self.ham_counts),
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(data['spam_counts'], data['ham_counts'], data['spam_docs'], data['ham_docs'])
+
+
+def get_model_path():
+    return str(getattr(settings, 'LANDING_SPAM_MODEL_PATH', os.path.join(settings.BASE_DIR, 'spam_model.json')))
+
+
+_model_lock = threading.Lock()
+_model_cache = (None, None)  # ((путь, mtime), NaiveBayes)
+
+
+def load_model():
+    """
+    Загружает обученную модель. Файл перечитывается, только если он изменился (новое обучение).
+    """
+    global _model_cache
+    path = get_model_path()
+    try:
+        key = (path, os.stat(path).st_mtime_ns)
+    except FileNotFoundError:
+        return NaiveBayes()
+    with _model_lock:
+        if _model_cache[0] != key:
+            with open(path, encoding='utf-8') as fh:
+                _model_cache = (key, NaiveBayes.from_dict(json.load(fh)))
+        return _model_cache[1]
+
+
+def save_model(model, path=None):
+    from .prerender import write_atomic
+
+    data = json.dumps(model.to_dict(), ensure_ascii=False, separators=(',', ':'))
+    write_atomic(path or get_model_path(), data.encode('utf-8'))
+
+
+def training_data():
+    """
+    Тексты и метки для обучения: опубликованные отзывы — не спам, отклонённые модератором — спам.
+    """
+    from .models import Review
+
+    rows = (
+        Review.objects.filter(moderated_at__isnull=False)
+        .values_list('name', 'review', 'is_public')
+        .iterator(chunk_size=2000)
+    )
+    texts, labels = [], []
+    for name, text, is_public in rows:
+        texts.append(f"{name} {text}")
+        labels.append(not is_public)
+    return texts, labels
+
+
+def evaluate(texts, labels, holdout=0.2, seed=0):
+    """
+    Доля верных ответов на отложенной выборке (порог 0.5). None, если данных слишком мало.
+    """
+    pairs = list(zip(texts, labels))
+    random.Random(seed).shuffle(pairs)
+    split = int(len(pairs) * (1 - holdout))
+    train, test = pairs[:split], pairs[split:]
+    if not test:
+        return None
+    model = NaiveBayes.train(*zip(*train)) if train else NaiveBayes()
+    correct = sum((model.log_odds(text) > 0) == is_spam for text, is_spam in test)
+    return correct / len(test)
+
+
+def heuristic_log_odds(review):
+    """
+    Вклад эвристик: ссылки, повторы, КАПС, частота отзывов с того же IP.
+    Email в счёт не идёт: он у отзыва уникален, а повторные попытки с того же адреса
+    отсекает ограничение частоты ещё в запросе (landing/ratelimit.py).
+    """
+    from .models import Review
+
+    text = review.review or ''
+    score = 0.0
+    score += LINK_WEIGHT * min(len(LINK_RE.findall(f"{review.name} {text}")), 3)
+    if REPEATED_CHAR_RE.search(text):
+        score += REPEATED_CHARS_WEIGHT
+
+    words = WORD_RE.findall(text.lower())
+    if len(words) >= 8 and len(set(words)) / len(words) < 0.4:
+        score += REPEATED_WORDS_WEIGHT
+    letters = [ch for ch in text if ch.isalpha()]
+    if len(letters) >= 20 and sum(ch.isupper() for ch in letters) / len(letters) > 0.6:
+        score += CAPS_WEIGHT
+
+    # Окно отсчитывается от времени отзыва, чтобы пересчёт старых отзывов давал тот же результат
+    until = review.created_at or timezone.now()
+    if is_public_ip(review.ip_address):
+        recent = Review.objects.filter(created_at__range=(until - RATE_WINDOW, until)).exclude(pk=review.pk)
+        score += min(RATE_WEIGHT * recent.filter(ip_address=review.ip_address).count(), MAX_RATE_BONUS)
+    return score
+
+
+def is_public_ip(value):
+    """
+    Внутренний адрес (127.0.0.1, 10.x и т. п.) — это прокси перед приложением, а не клиент:
+    по нему отзывы всех посетителей выглядели бы как отправленные с одного IP.
+    """
+    try:
+        return bool(value) and ipaddress.ip_address(value).is_global
+    except ValueError:
+        return False
+
+
+def spam_probability(review, model=None):
+    model = model or load_model()
+    log_odds = model.log_odds(f"{review.name} {review.review}") + heuristic_log_odds(review)
+    # Ограничиваем, чтобы exp не переполнился на очень длинных текстах
+    log_odds = max(min(log_odds, 50.0), -50.0)
+    return 1 / (1 + math.exp(-log_odds))
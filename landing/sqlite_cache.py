@@ -0,0 +1,353 @@
+"""
+Общий для всех процессов кеш в файле SQLite (режим WAL): воркеры gunicorn, воркер задач и manage.py
+видят одни и те же значения, поэтому версии моделей (landing/cache.py) сбрасывают кеш сразу во всех процессах,
+а прогрев одного процесса достаётся остальным. Ни Memcached, ни Redis не нужны.
+
+Кроме стандартного API кеша Django:
+- incr/decr атомарны между процессами: целые числа хранятся как INTEGER и увеличиваются одним UPDATE;
+- размер ограничен: при превышении MAX_ENTRIES записей или MAX_SIZE байт вытесняются давно не читанные
+  записи (LRU, время чтения обновляется не чаще раза в ACCESS_RESOLUTION секунд);
+- get_or_compute(): значение пересчитывает только один процесс (блокировка в той же БД), остальные в это
+  время получают предыдущее значение (stale-while-revalidate) или, если его нет, ждут результат.
+
+Пример:
+    CACHES = {'default': {
+        'BACKEND': 'landing.sqlite_cache.SQLiteCache',
+        'LOCATION': '/var/cache/barbershop/landing.sqlite3',
+        'OPTIONS': {'MAX_ENTRIES': 5000, 'MAX_SIZE': 64 * 1024 * 1024, 'STALE_TIMEOUT': 24 * 60 * 60},
+    }}
+"""
+import os
+import pickle
+import sqlite3
+import threading
+import time
+import uuid
+
+from django.core.cache.backends.base import DEFAULT_TIMEOUT, BaseCache
+
+# Ожидание блокировки записи SQLite другим процессом, секунды
+BUSY_TIMEOUT = 5
+# Время последнего чтения (для LRU) обновляется не чаще, чем раз в столько секунд
+ACCESS_RESOLUTION = 10
+# Проверка размера кеша — раз в столько записей одного процесса
+CULL_CHECK_EVERY = 20
+# При превышении MAX_SIZE вытесняется столько, чтобы осталось не больше этой доли
+CULL_SIZE_TARGET = 0.9
+# Пауза между проверками, пока другой процесс пересчитывает значение, секунды
+WAIT_INTERVAL = 0.01
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS cache (
+    key TEXT PRIMARY KEY,
+    value BLOB NOT NULL,
+    stamp TEXT,
+    expires REAL,
+    keep_until REAL,
+    accessed REAL NOT NULL,
+    size INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS cache_accessed ON cache (accessed);
+CREATE INDEX IF NOT EXISTS cache_keep_until ON cache (keep_until);
+CREATE TABLE IF NOT EXISTS cache_lock (
+    key TEXT PRIMARY KEY,
+    token TEXT NOT NULL,
+    expires REAL NOT NULL
+);
+"""
+
+UPSERT = """
+INSERT INTO cache (key, value, stamp, expires, keep_until, accessed, size) VALUES (?, ?, ?, ?, ?, ?, ?)
+ON CONFLICT (key) DO UPDATE SET
+    value = excluded.value, stamp = excluded.stamp, expires = excluded.expires,
+    keep_until = excluded.keep_until, accessed = excluded.accessed, size = excluded.size
+"""
+
+# Соединения, унаследованные от родителя при fork. Их нельзя ни использовать, ни закрывать в дочернем
+# процессе (закрытие сбросило бы блокировки SQLite родителя), поэтому они просто остаются в памяти.
+_inherited_connections = []
+
+
+def encode(value):
+    """ Целые числа хранятся как есть (для атомарного incr), остальное — pickle. """
+    if type(value) is int and -2 ** 63 <= value < 2 ** 63:
+        return value, 8
+    data = pickle.dumps(value, pickle.HIGHEST_PROTOCOL)
+    return data, len(data)
+
+
+def decode(raw):
+    return raw if isinstance(raw, int) else pickle.loads(raw)
+
+
+class SQLiteCache(BaseCache):
+    """
+    Бэкенд кеша Django в файле SQLite. LOCATION — путь к файлу БД, каталог создаётся автоматически.
+    OPTIONS: MAX_ENTRIES и CULL_FREQUENCY (как у встроенных бэкендов), MAX_SIZE — предел суммарного
+    размера значений в байтах, STALE_TIMEOUT — сколько секунд после устаревания значение get_or_compute
+    ещё можно отдавать, пока его пересчитывают, LOCK_TIMEOUT — предельное время пересчёта.
+    """
+
+    def __init__(self, location, params):
+        super().__init__(params)
+        options = params.get('OPTIONS', {})
+        self.path = location
+        self._max_size = options.get('MAX_SIZE')
+        self._stale_timeout = options.get('STALE_TIMEOUT', 24 * 60 * 60)
+        self._lock_timeout = options.get('LOCK_TIMEOUT', 30)
+        self._local = threading.local()
+
+    @property
+    def _connection(self):
+        local = self._local
+        connection = getattr(local, 'connection', None)
+        if connection is not None and local.pid == os.getpid():
+            return connection
+        if connection is not None:
+            _inherited_connections.append(connection)
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        # isolation_level=None — автокоммит: каждый запрос сам по себе транзакция,
+        # многошаговые изменения явно оборачиваются в BEGIN IMMEDIATE
+        connection = sqlite3.connect(self.path, timeout=BUSY_TIMEOUT, isolation_level=None, check_same_thread=False)
+        connection.execute('PRAGMA journal_mode=WAL')
+        connection.execute('PRAGMA synchronous=NORMAL')
+        connection.executescript(SCHEMA)
+        local.connection, local.pid, local.writes = connection, os.getpid(), 0
+        return connection
+
+    def _transaction(self):
+        return _ImmediateTransaction(self._connection)
+
+    def _expiry(self, timeout):
+        """ (до какого момента значение свежее, до какого хранится) — абсолютное время или None. """
+        expires = self.get_backend_timeout(timeout)
+        return expires, expires
+
+    def _write(self, key, value, expires, keep_until, stamp=None, connection=None):
+        data, size = encode(value)
+        (connection or self._connection).execute(UPSERT, (key, data, stamp, expires, keep_until, time.time(), size))
+
+    def _touch_accessed(self, keys, now):
+        self._connection.execute(
+            f"UPDATE cache SET accessed = ? WHERE key IN ({', '.join('?' * len(keys))})", (now, *keys),
+        )
+
+    def _after_write(self):
+        self._local.writes += 1
+        if self._local.writes % CULL_CHECK_EVERY == 0:
+            self.cull()
+
+    def get(self, key, default=None, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        now = time.time()
+        row = self._connection.execute(
+            "SELECT value, accessed FROM cache WHERE key = ? AND (expires IS NULL OR expires > ?)", (key, now),
+        ).fetchone()
+        if row is None:
+            return default
+        if row[1] < now - ACCESS_RESOLUTION:
+            self._touch_accessed([key], now)
+        return decode(row[0])
+
+    def get_many(self, keys, version=None):
+        if not keys:
+            return {}
+        key_map = {self.make_and_validate_key(key, version=version): key for key in keys}
+        now = time.time()
+        rows = self._connection.execute(
+            f"SELECT key, value, accessed FROM cache WHERE key IN ({', '.join('?' * len(key_map))}) "
+            "AND (expires IS NULL OR expires > ?)",
+            (*key_map, now),
+        ).fetchall()
+        old = [key for key, _, accessed in rows if accessed < now - ACCESS_RESOLUTION]
+        if old:
+            self._touch_accessed(old, now)
+        return {key_map[key]: decode(value) for key, value, _ in rows}
+
+    def has_key(self, key, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        return self._connection.execute(
+            "SELECT 1 FROM cache WHERE key = ? AND (expires IS NULL OR expires > ?)", (key, time.time()),
+        ).fetchone() is not None
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        expires, keep_until = self._expiry(timeout)
+        self._write(key, value, expires, keep_until)
+        self._after_write()
+
+    def set_many(self, data, timeout=DEFAULT_TIMEOUT, version=None):
+        expires, keep_until = self._expiry(timeout)
+        with self._transaction() as connection:
+            for key, value in data.items():
+                key = self.make_and_validate_key(key, version=version)
+                self._write(key, value, expires, keep_until, connection=connection)
+        self._after_write()
+        return []
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        expires, keep_until = self._expiry(timeout)
+        data, size = encode(value)
+        now = time.time()
+        # Заменяется только устаревшая запись: проверка и вставка — один атомарный запрос
+        cursor = self._connection.execute(
+            UPSERT + " WHERE cache.expires IS NOT NULL AND cache.expires <= ?",
+            (key, data, None, expires, keep_until, now, size, now),
+        )
+        if cursor.rowcount:
+            self._after_write()
+        return cursor.rowcount == 1
+
+    def touch(self, key, timeout=DEFAULT_TIMEOUT, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        expires, keep_until = self._expiry(timeout)
+        now = time.time()
+        cursor = self._connection.execute(
+            "UPDATE cache SET expires = ?, keep_until = ?, accessed = ? "
+            "WHERE key = ? AND (expires IS NULL OR expires > ?)",
+            (expires, keep_until, now, key, now),
+        )
+        return cursor.rowcount == 1
+
+    def incr(self, key, delta=1, version=None):
+        validated = self.make_and_validate_key(key, version=version)
+        now = time.time()
+        row = self._connection.execute(
+            "UPDATE cache SET value = value + ?, accessed = ? "
+            "WHERE key = ? AND typeof(value) = 'integer' AND (expires IS NULL OR expires > ?) RETURNING value",
+            (delta, now, validated, now),
+        ).fetchone()
+        if row is not None:
+            return row[0]
+        # Не целое число (например, большое или сохранённое pickle) — читаем и пишем в одной транзакции
+        with self._transaction() as connection:
+            row = connection.execute(
+                "SELECT value, expires, keep_until, stamp FROM cache "
+                "WHERE key = ? AND (expires IS NULL OR expires > ?)",
+                (validated, now),
+            ).fetchone()
+            if row is None:
+                raise ValueError(f"Key '{key}' not found.")
+            value = decode(row[0]) + delta
+            self._write(validated, value, row[1], row[2], stamp=row[3], connection=connection)
+        return value
+
+    def delete(self, key, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        return self._connection.execute("DELETE FROM cache WHERE key = ?", (key,)).rowcount == 1
+
+    def delete_many(self, keys, version=None):
+        keys = [self.make_and_validate_key(key, version=version) for key in keys]
+        if keys:
+            self._connection.execute(f"DELETE FROM cache WHERE key IN ({', '.join('?' * len(keys))})", keys)
+
+    def clear(self):
+        with self._transaction() as connection:
+            connection.execute("DELETE FROM cache")
+            connection.execute("DELETE FROM cache_lock")
+
+    def cull(self):
+        """
+        Удаляет записи с истёкшим сроком хранения, затем давно не читанные — пока записей больше MAX_ENTRIES
+        (удаляется 1/CULL_FREQUENCY от числа записей) или их размер больше MAX_SIZE.
+        """
+        now = time.time()
+        with self._transaction() as connection:
+            connection.execute("DELETE FROM cache WHERE keep_until <= ?", (now,))
+            connection.execute("DELETE FROM cache_lock WHERE expires <= ?", (now,))
+            count, total = connection.execute("SELECT count(*), total(size) FROM cache").fetchone()
+            if count > self._max_entries:
+                if self._cull_frequency == 0:
+                    connection.execute("DELETE FROM cache")
+                    return
+                removed = connection.execute(
+                    "DELETE FROM cache WHERE key IN (SELECT key FROM cache ORDER BY accessed LIMIT ?) RETURNING size",
+                    (count // self._cull_frequency,),
+                ).fetchall()
+                total -= sum(size for size, in removed)
+            if self._max_size and total > self._max_size:
+                excess = total - self._max_size * CULL_SIZE_TARGET
+                connection.execute(
+                    "DELETE FROM cache WHERE key IN ("
+                    " SELECT key FROM (SELECT key, size, sum(size) OVER (ORDER BY accessed) AS running FROM cache)"
+                    " WHERE running - size < ?)",
+                    (excess,),
+                )
+
+    def _acquire(self, key):
+        token = uuid.uuid4().hex
+        now = time.time()
+        cursor = self._connection.execute(
+            "INSERT INTO cache_lock (key, token, expires) VALUES (?, ?, ?) "
+            "ON CONFLICT (key) DO UPDATE SET token = excluded.token, expires = excluded.expires "
+            "WHERE cache_lock.expires <= ?",
+            (key, token, now + self._lock_timeout, now),
+        )
+        return token if cursor.rowcount == 1 else None
+
+    def _release(self, key, token):
+        self._connection.execute("DELETE FROM cache_lock WHERE key = ? AND token = ?", (key, token))
+
+    def _lookup(self, key, stamp):
+        """ (свежее ли значение, сырое значение или None, если записи нет) """
+        now = time.time()
+        row = self._connection.execute(
+            "SELECT value, stamp, expires, accessed FROM cache "
+            "WHERE key = ? AND (keep_until IS NULL OR keep_until > ?)",
+            (key, now),
+        ).fetchone()
+        if row is None:
+            return False, None
+        fresh = row[1] == stamp and (row[2] is None or row[2] > now)
+        if fresh and row[3] < now - ACCESS_RESOLUTION:
+            self._touch_accessed([key], now)
+        return fresh, row[0]
+
+    def get_or_compute(self, key, compute, timeout=DEFAULT_TIMEOUT, stamp=None, stale=True, version=None):
+        """
+        Значение key, посчитанное для версии данных stamp (например, строки версий моделей).
+        Если значения нет, оно устарело по timeout или посчитано для другой версии, compute() вызывает
+        ровно один процесс; остальные сразу получают прежнее значение, а если его нет или stale=False —
+        ждут результата.
+        """
+        key = self.make_and_validate_key(key, version=version)
+        stamp = None if stamp is None else str(stamp)
+        fresh, raw = self._lookup(key, stamp)
+        if fresh:
+            return decode(raw)
+        if not stale:
+            raw = None
+        while True:
+            token = self._acquire(key)
+            if token is not None:
+                try:
+                    value = compute()
+                    expires = self.get_backend_timeout(timeout)
+                    keep_until = None if expires is None else expires + self._stale_timeout
+                    self._write(key, value, expires, keep_until, stamp=stamp)
+                finally:
+                    self._release(key, token)
+                self._after_write()
+                return value
+            if raw is not None:
+                # stale-while-revalidate: пока другой процесс пересчитывает, отдаём прежнее значение
+                return decode(raw)
+            time.sleep(WAIT_INTERVAL)
+            fresh, fresh_raw = self._lookup(key, stamp)
+            if fresh:
+                return decode(fresh_raw)
+
+
+class _ImmediateTransaction:
+    """ BEGIN IMMEDIATE ... COMMIT: блокировка записи берётся сразу, а не при первом изменении. """
+
+    def __init__(self, connection):
+        self.connection = connection
+
+    def __enter__(self):
+        self.connection.execute('BEGIN IMMEDIATE')
+        return self.connection
+
+    def __exit__(self, exc_type, exc, tb):
+        self.connection.execute('ROLLBACK' if exc_type else 'COMMIT')
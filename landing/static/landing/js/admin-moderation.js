@@ -0,0 +1,86 @@
+// Клавиатурное управление очередью модерации отзывов в админке
+document.addEventListener('DOMContentLoaded', () => {
+    const form = document.getElementById('moderation-form');
+    if (!form) return;
+
+    const rows = Array.from(form.querySelectorAll('.moderation-row'));
+    const toggleAll = document.getElementById('moderation-toggle-all');
+    let current = 0;
+
+    const checkbox = (row) => row.querySelector('input[name="ids"]');
+
+    const setCurrent = (index) => {
+        if (!rows.length) return;
+        rows[current].classList.remove('current');
+        current = Math.max(0, Math.min(index, rows.length - 1));
+        rows[current].classList.add('current');
+        rows[current].scrollIntoView({ block: 'nearest' });
+    };
+
+    // Без отмеченных отзывов действие применяется к текущему
+    const submit = (action) => {
+        if (!rows.length) return;
+        if (!rows.some(row => checkbox(row).checked)) {
+            checkbox(rows[current]).checked = true;
+        }
+        form.elements.action.value = action;
+        form.submit();
+    };
+
+    form.querySelectorAll('button[data-action]').forEach(button => {
+        button.addEventListener('click', (e) => {
+            e.preventDefault();
+            submit(button.dataset.action);
+        });
+    });
+
+    rows.forEach((row, index) => row.addEventListener('click', () => setCurrent(index)));
+
+    if (toggleAll) {
+        toggleAll.addEventListener('change', () => {
+            rows.forEach(row => { checkbox(row).checked = toggleAll.checked; });
+        });
+    }
+
+    document.addEventListener('keydown', (e) => {
+        if (e.ctrlKey || e.metaKey || e.altKey) return;
+        if (['INPUT', 'TEXTAREA', 'SELECT'].includes(e.target.tagName) && e.target.type !== 'checkbox') return;
+
+        switch (e.key) {
+            case 'j':
+            case 'ArrowDown':
+                setCurrent(current + 1);
+                break;
+            case 'k':
+            case 'ArrowUp':
+                setCurrent(current - 1);
+                break;
+            case 'x':
+            case ' ': {
+                const box = checkbox(rows[current]);
+                box.checked = !box.checked;
+                break;
+            }
+            case 'a': {
+                const allChecked = rows.every(row => checkbox(row).checked);
+                rows.forEach(row => { checkbox(row).checked = !allChecked; });
+                if (toggleAll) toggleAll.checked = !allChecked;
+                break;
+            }
+            case 'p':
+                submit('publish');
+                break;
+            case 'r':
+                submit('reject');
+                break;
+            case 'n': {
+                const next = document.getElementById('moderation-next');
+                if (next) window.location.href = next.href;
+                break;
+            }
+            default:
+                return;
+        }
+        e.preventDefault();
+    });
+});
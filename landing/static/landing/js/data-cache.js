@@ -0,0 +1,71 @@
+/**
+ * Клиентский кеш данных секций (услуги, мастера).
+ *
+ * Секция на странице содержит только адрес и версию данных:
+ *   <section data-payload="services" data-payload-url="/data/services.<версия>.json" data-payload-version="...">
+ * Ответ хранится в localStorage вместе с версией; запрос на сервер уходит, только если версия на странице
+ * другая (данные поменяли в админке) или в localStorage ничего нет. Сам ответ по адресу с версией
+ * кешируется браузером навсегда, так что и без localStorage повторной загрузки по сети не будет.
+ */
+window.landingData = (() => {
+  const STORAGE_PREFIX = 'landing:data:';
+  const loading = {};
+
+  /**
+   * Разворачивает компактный формат {fields: [...], rows: [[...], ...]} в массивы объектов, рекурсивно.
+   */
+  function unpack(value) {
+    if (Array.isArray(value)) return value.map(unpack);
+    if (!value || typeof value !== 'object') return value;
+    const keys = Object.keys(value);
+    if (keys.length === 2 && Array.isArray(value.fields) && Array.isArray(value.rows)) {
+      return value.rows.map(row => Object.fromEntries(value.fields.map((field, i) => [field, unpack(row[i])])));
+    }
+    return Object.fromEntries(keys.map(key => [key, unpack(value[key])]));
+  }
+
+  function readStored(name, version) {
+    try {
+      const stored = localStorage.getItem(STORAGE_PREFIX + name);
+      if (!stored) return null;
+      const separator = stored.indexOf('\n');
+      if (stored.slice(0, separator) !== version) return null;
+      return JSON.parse(stored.slice(separator + 1));
+    } catch (e) {
+      // localStorage недоступен (приватный режим) или запись повреждена
+      return null;
+    }
+  }
+
+  function store(name, version, text) {
+    try {
+      localStorage.setItem(STORAGE_PREFIX + name, `${version}\n${text}`);
+    } catch (e) {
+      // переполнение или запрет localStorage: данные просто будут запрошены снова (из HTTP-кеша)
+    }
+  }
+
+  async function fetchPayload(name, url, version) {
+    const response = await fetch(url, { credentials: 'same-origin' });
+    if (!response.ok) throw new Error(`Не удалось загрузить данные ${name}: ${response.status}`);
+    const text = await response.text();
+    store(name, version, text);
+    return JSON.parse(text);
+  }
+
+  /**
+   * Данные секции name (массив объектов); один запрос на страницу, сколько бы скриптов их ни ждали.
+   */
+  function load(name) {
+    if (!loading[name]) {
+      const element = document.querySelector(`[data-payload="${name}"]`);
+      if (!element) return Promise.resolve([]);
+      const { payloadUrl: url, payloadVersion: version } = element.dataset;
+      const stored = readStored(name, version);
+      loading[name] = (stored !== null ? Promise.resolve(stored) : fetchPayload(name, url, version)).then(unpack);
+    }
+    return loading[name];
+  }
+
+  return { load, unpack };
+})();
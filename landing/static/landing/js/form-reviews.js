@@ -43,6 +43,22 @@ document.addEventListener('DOMContentLoaded', () => {
 
   if (!form) return;
 
+  /**
+   * Возвращает CSRF-токен для отправки формы.
+   * Обычно его генерит {% csrf_token %} в скрытом input, но в статической (пререндеренной)
+   * версии страницы токена нет — тогда запрашиваем его у сервера.
+   *
+   * @returns {Promise<string>} CSRF-токен
+   */
+  async function getCsrfToken() {
+    const csrfInput = form.querySelector('input[name="csrfmiddlewaretoken"]');
+    if (csrfInput && csrfInput.value) return csrfInput.value;
+
+    const resp = await fetch(form.dataset.csrfUrl, { credentials: 'same-origin' });
+    const data = await resp.json();
+    return data.csrfToken;
+  }
+
   form.addEventListener('submit', async function (e) {
     e.preventDefault();
 
@@ -51,11 +67,9 @@ document.addEventListener('DOMContentLoaded', () => {
     errorEl.classList.add('visually-hidden');
 
     const formData = new FormData(form);
-    // берем CSRF из скрытого input, который генерит {% csrf_token %}
-    const csrfInput = form.querySelector('input[name="csrfmiddlewaretoken"]');
-    const csrftoken = csrfInput ? csrfInput.value : '';
     
     try {
+      const csrftoken = await getCsrfToken();
       const resp = await fetch(form.action || window.location.href, {
         method: 'POST',
         headers: {
@@ -1,4 +1,13 @@
 const address = JSON.parse(document.getElementById('address-data').textContent);
+const branchesData = document.getElementById('branches-data');
+
+/**
+ * Разворачивает компактный список филиалов {fields: [...], rows: [[...], ...]} в массив объектов.
+ */
+function parseBranches(payload) {
+  if (!payload || !payload.rows) return [];
+  return payload.rows.map(row => Object.fromEntries(payload.fields.map((field, i) => [field, row[i]])));
+}
 
 document.addEventListener('DOMContentLoaded', () => {
   const mapEl = document.getElementById('map');
@@ -10,15 +19,16 @@ document.addEventListener('DOMContentLoaded', () => {
     return;
   }
 
-  // Координаты и подпись
-  const lat = address.latitude;
-  const lon = address.longitude;
+  // Все филиалы одним компактным списком; если его нет — только основной адрес
+  let branches = parseBranches(branchesData ? JSON.parse(branchesData.textContent) : null);
+  if (!branches.length) {
+    branches = [{ id: null, name: address.name, address: address.address, lat: address.latitude, lon: address.longitude }];
+  }
   const zoom = 16;
-  const label = address.name;
 
   // Инициализация карты
   const map = L.map(mapEl, {
-    center: [lat, lon],
+    center: [branches[0].lat, branches[0].lon],
     zoom,
     scrollWheelZoom: false
   });
@@ -29,18 +39,59 @@ document.addEventListener('DOMContentLoaded', () => {
     attribution: '&copy; <a href="https://www.openstreetmap.org">OpenStreetMap</a> contributors'
   }).addTo(map);
 
-  // Маркер и popup
-  const marker = L.marker([lat, lon]).addTo(map);
-  marker.bindPopup(`<strong>${label}</strong><br>${address.address}`).openPopup();
-
-  // Доступность: делаем элемент маркера фокусируемым (если доступен)
-  const markerEl = (marker.getElement?.());
-  if (markerEl) {
-    markerEl.setAttribute('tabindex', '0');
-    markerEl.addEventListener('keydown', (e) => {
-      if (e.key === 'Enter' || e.key === ' ') {
-        marker.openPopup();
-      }
+  // Маркеры и popup
+  const markers = new Map();
+  for (const branch of branches) {
+    const marker = L.marker([branch.lat, branch.lon]).addTo(map);
+    const popup = document.createElement('div');
+    const title = document.createElement('strong');
+    title.textContent = branch.name;
+    popup.append(title, document.createElement('br'), branch.address);
+    marker.bindPopup(popup);
+    markers.set(branch.id, marker);
+
+    // Доступность: делаем элемент маркера фокусируемым (если доступен)
+    const markerEl = (marker.getElement?.());
+    if (markerEl) {
+      markerEl.setAttribute('tabindex', '0');
+      markerEl.addEventListener('keydown', (e) => {
+        if (e.key === 'Enter' || e.key === ' ') {
+          marker.openPopup();
+        }
+      });
+    }
+  }
+
+  if (branches.length > 1) {
+    map.fitBounds(L.latLngBounds(branches.map(b => [b.lat, b.lon])), { padding: [30, 30] });
+  } else {
+    markers.values().next().value.openPopup();
+  }
+
+  // Кнопка «Найти ближайший филиал»: координаты клиента -> /branches/nearest/
+  const nearestButton = document.querySelector('.nearest-branch');
+  if (nearestButton && navigator.geolocation) {
+    nearestButton.addEventListener('click', () => {
+      navigator.geolocation.getCurrentPosition((position) => {
+        const { latitude, longitude } = position.coords;
+        fetch(`${nearestButton.dataset.nearestUrl}?lat=${latitude}&lon=${longitude}`)
+          .then(response => response.json())
+          .then(data => {
+            const nearest = data.branches && data.branches[0];
+            if (!nearest) return;
+            document.querySelectorAll('.branches-list li').forEach(li => {
+              li.classList.toggle('nearest', li.dataset.branchId === String(nearest.id));
+            });
+            const marker = markers.get(nearest.id);
+            if (marker) {
+              map.setView(marker.getLatLng(), zoom);
+              marker.openPopup();
+            }
+          })
+          .catch(error => console.error('Не удалось найти ближайший филиал:', error));
+      }, (error) => console.warn('Геолокация недоступна:', error.message));
     });
+  } else if (nearestButton) {
+    nearestButton.hidden = true;
   }
 });
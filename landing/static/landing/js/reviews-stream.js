@@ -0,0 +1,97 @@
+(function () {
+  const section = document.getElementById('reviews');
+  const url = section && section.dataset.streamUrl;
+  if (!url || !window.EventSource || !window.jQuery) return;
+
+  const $slider = jQuery('.multiple-items-reviews');
+  if (!$slider.length || !$slider.hasClass('slick-initialized')) return;
+
+  // Столько же отзывов выводит секция на сервере
+  const MAX_SLIDES = 20;
+
+  /**
+   * Текст отзыва как у фильтра linebreaks: абзацы по пустым строкам, внутри — переносы <br>.
+   *
+   * @param {string} text - текст отзыва
+   * @returns {HTMLDivElement} блок с абзацами
+   */
+  function renderText(text) {
+    const wrapper = document.createElement('div');
+    text.replace(/\r\n?/g, '\n').split(/\n{2,}/).forEach((paragraph) => {
+      const p = document.createElement('p');
+      paragraph.split('\n').forEach((line, i) => {
+        if (i) p.appendChild(document.createElement('br'));
+        p.appendChild(document.createTextNode(line));
+      });
+      wrapper.appendChild(p);
+    });
+    return wrapper;
+  }
+
+  /**
+   * Слайд отзыва с той же разметкой, что в шаблоне sections/reviews.html.
+   *
+   * @param {{id: number, name: string, review: string, rating: number, date: ?string}} review
+   * @returns {HTMLDivElement} слайд
+   */
+  function renderSlide(review) {
+    const slide = document.createElement('div');
+    slide.dataset.reviewId = review.id;
+
+    const header = document.createElement('div');
+    header.className = 'slide-reviews-name';
+    const name = document.createElement('strong');
+    name.textContent = review.name;
+    header.appendChild(name);
+    if (review.date) {
+      const date = document.createElement('span');
+      date.textContent = review.date;
+      header.appendChild(date);
+    }
+    slide.appendChild(header);
+    slide.appendChild(renderText(review.review));
+
+    if (review.rating) {
+      const rating = document.createElement('div');
+      rating.className = 'slide-reviews-rating';
+      rating.setAttribute('aria-label', `Оценка: ${review.rating} из 5`);
+      const stars = document.createElement('span');
+      stars.className = 'rating-stars';
+      stars.setAttribute('aria-hidden', 'true');
+      for (let i = 1; i <= 5; i++) {
+        const star = document.createElement('span');
+        star.className = i <= review.rating ? 'star filled' : 'star';
+        star.textContent = i <= review.rating ? '★' : '☆';
+        stars.appendChild(star);
+      }
+      rating.appendChild(stars);
+      slide.appendChild(rating);
+    }
+    return slide;
+  }
+
+  function addReview(review) {
+    // слайд мог уже попасть на страницу при рендере (или клон slick)
+    if ($slider.find(`[data-review-id="${review.id}"]`).length) return;
+
+    const slick = $slider.slick('getSlick');
+    const emptyIndex = slick.$slides.index(slick.$slides.filter('.slide-reviews-empty'));
+    if (emptyIndex >= 0) $slider.slick('slickRemove', emptyIndex);
+
+    // новый отзыв — первым, самый старый уходит, чтобы слайдов было не больше, чем на сервере
+    $slider.slick('slickAdd', renderSlide(review), 0, true);
+    if ($slider.slick('getSlick').slideCount > MAX_SLIDES) {
+      $slider.slick('slickRemove', $slider.slick('getSlick').slideCount - 1);
+    }
+  }
+
+  // EventSource сам переподключается после обрыва и передаёт Last-Event-ID
+  const source = new EventSource(url);
+  source.addEventListener('review', (e) => {
+    try {
+      addReview(JSON.parse(e.data));
+    } catch (err) {
+      console.error(err);
+    }
+  });
+})();
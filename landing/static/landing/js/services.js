@@ -1,14 +1,18 @@
-const services = JSON.parse(document.getElementById('services-data').textContent);
-
 document.addEventListener('DOMContentLoaded', () => {
     const servicesContainer = document.querySelector('.services-container');
 
+    // Прайс приходит из клиентского кеша (data-cache.js); до его загрузки клики по услугам ничего не делают
+    let services = [];
+    landingData.load('services')
+        .then(data => { services = data; })
+        .catch(error => console.error(error));
+
     // Получаем объект service по id (строка/число)
     const getServiceById = (id) => services.find(s => String(s.id) === String(id));
 
     // Показывает цены и картинку
-    const showPrices = (name, prices, img) => {
-        getPrices(name, prices, img);
+    const showPrices = (name, prices, img, meta) => {
+        getPrices(name, prices, img, meta);
     };
 
     // Разворачивает/сворачивает .service-item
@@ -38,7 +42,7 @@ document.addEventListener('DOMContentLoaded', () => {
 
         // Если есть <i>, то показываем цены подпунктов, если нет <i>, то показываем общий прайс
         if (!header.querySelector('i')) { // Если header не содержит <i>
-            showPrices(service.name, service.price_list, service.title_image);
+            showPrices(service.name, service.price_list, service.title_image, service);
         }
         // Если есть <i>, то цены подпунктов показываются в обработчике для h4
     });
@@ -59,7 +63,7 @@ document.addEventListener('DOMContentLoaded', () => {
         const subsectionData = service.subsections.find(el => el.name === name);
         if (!subsectionData) return;
 
-        showPrices(subsectionData.name, subsectionData.price_items, subsectionData.title_image);
+        showPrices(subsectionData.name, subsectionData.price_items, subsectionData.title_image, subsectionData);
     });
 
     // Инициализация: показать данные по умолчанию (первый сервис/первая подсекция)
@@ -74,21 +78,93 @@ document.addEventListener('DOMContentLoaded', () => {
         
         if (service.subsections && service.subsections.length > 0) {
             const firstSub = service.subsections[0];
-            showPrices(firstSub.name, firstSub.price_items, firstSub.title_image);
+            showPrices(firstSub.name, firstSub.price_items, firstSub.title_image, firstSub);
             // Разворачиваем элемент, только если у него есть подразделы
             if (serviceItem && !serviceItem.classList.contains('expanded')) {
                 serviceItem.classList.add('expanded');
             }
         } else {
             // Если подразделов нет, показываем общий прайс сервиса
-            showPrices(service.name, service.price_list, service.title_image);
+            showPrices(service.name, service.price_list, service.title_image, service);
         }
     };
 
     // Запускаем инициализацию
     initDefault();
+
+    // Поиск по услугам и прайсу: запрос отправляется, когда пользователь перестал печатать
+    const searchInput = document.getElementById('services-search');
+    if (searchInput) {
+        let timer = null;
+        let controller = null;
+
+        searchInput.addEventListener('input', () => {
+            clearTimeout(timer);
+            const query = searchInput.value.trim();
+            if (query.length < 2) {
+                if (controller) controller.abort();
+                initDefault();
+                return;
+            }
+            timer = setTimeout(() => {
+                // Отменяем предыдущий запрос, чтобы старый ответ не перерисовал новый
+                if (controller) controller.abort();
+                controller = new AbortController();
+                const url = `${searchInput.dataset.searchUrl}?q=${encodeURIComponent(query)}`;
+                fetch(url, { signal: controller.signal })
+                    .then(response => response.json())
+                    .then(data => showSearchResults(data.results))
+                    .catch(error => {
+                        if (error.name !== 'AbortError') console.error('Ошибка поиска:', error);
+                    });
+            }, 150);
+        });
+    }
 });
 
+/**
+ * Рисует результаты поиска, сгруппированные по услугам, на месте прайса.
+ *
+ * @param {object[]} results - группы {service: {id, name}, items: [...]}
+ */
+function showSearchResults(results) {
+    const pricesContainer = document.querySelector('.prices');
+    clear(pricesContainer);
+    clear(document.querySelector('.title-img'));
+
+    if (!results.length) {
+        const empty = document.createElement('p');
+        empty.classList.add('search-empty');
+        empty.textContent = 'Ничего не найдено';
+        pricesContainer.appendChild(empty);
+        return;
+    }
+
+    for (const group of results) {
+        const title = document.createElement('p');
+        title.classList.add('search-group-title');
+        title.textContent = group.service.name;
+        pricesContainer.appendChild(title);
+
+        const elementUl = document.createElement('ul');
+        elementUl.classList.add('prices-list');
+        for (const item of group.items) {
+            const elementLi = document.createElement('li');
+            const elementPTitle = document.createElement('p');
+            elementPTitle.textContent = item.subsection ? `${item.title} — ${item.subsection}` : item.title;
+            elementLi.appendChild(elementPTitle);
+
+            if (item.price !== undefined) {
+                const elementPPrice = document.createElement('p');
+                elementPPrice.textContent = `${item.price} руб.`;
+                elementLi.appendChild(elementPPrice);
+            }
+            elementUl.appendChild(elementLi);
+        }
+        pricesContainer.appendChild(elementUl);
+    }
+}
+
 /**
  * Очищает контейнер от всех дочерних элементов.
  * 
@@ -111,8 +187,9 @@ function clear(container) {
  * @param {string} name - имя услуги
  * @param {object[]} prices - массив объектов с информацией о ценах
  * @param {string} img - URL фотографии услуги
+ * @param {object} [meta] - метаданные обложки (title_image_width, title_image_height, title_image_color, title_image_placeholder)
  */
-function getPrices(name, prices, img) {
+function getPrices(name, prices, img, meta = {}) {
     const pricesContainer = document.querySelector('.prices');
     const titleImg = document.querySelector('.title-img');
 
@@ -144,6 +221,15 @@ function getPrices(name, prices, img) {
     const elementImg = document.createElement('img');
     elementImg.alt = `Фото обложка услуги ${name}`;
     elementImg.src = img;
+    if (meta.title_image_width && meta.title_image_height) {
+        elementImg.width = meta.title_image_width;
+        elementImg.height = meta.title_image_height;
+    }
+    if (meta.title_image_color) elementImg.style.backgroundColor = meta.title_image_color;
+    if (meta.title_image_placeholder) {
+        elementImg.style.backgroundImage = `url("${meta.title_image_placeholder}")`;
+        elementImg.style.backgroundSize = 'cover';
+    }
     titleImg.appendChild(elementImg);
 }
 
@@ -1,5 +1,12 @@
-document.addEventListener('DOMContentLoaded', () => {
-  const masters = JSON.parse(document.getElementById('masters-data').textContent);
+document.addEventListener('DOMContentLoaded', async () => {
+  // Мастера приходят из клиентского кеша (data-cache.js)
+  let masters;
+  try {
+    masters = await landingData.load('masters');
+  } catch (error) {
+    console.error(error);
+    return;
+  }
 
   const slider = document.querySelector('.slider');
   if (!slider) return;
@@ -43,6 +50,16 @@ document.addEventListener('DOMContentLoaded', () => {
     const img = document.createElement('img');
     img.alt = `Фото ${profile.name}`;
     img.src = profile.photo;
+    // Размеры и заглушка известны заранее — карточка не «прыгает» при загрузке фото
+    if (profile.photo_width && profile.photo_height) {
+      img.width = profile.photo_width;
+      img.height = profile.photo_height;
+    }
+    if (profile.photo_color) img.style.backgroundColor = profile.photo_color;
+    if (profile.photo_placeholder) {
+      img.style.backgroundImage = `url("${profile.photo_placeholder}")`;
+      img.style.backgroundSize = 'cover';
+    }
     // fallback при ошибке загрузки
     img.onerror = () => { img.src = 'data:image/svg+xml,%3Csvg xmlns=%22http://www.w3.org/2000/svg%22 width=%22150%22 height=%22210%22%3E%3Crect width=%22100%25%22 height=%22100%25%22 fill=%22%23ddd%22/%3E%3Ctext x=%2250%25%22 y=%2250%25%22 dominant-baseline=%22middle%22 text-anchor=%22middle%22 fill=%22%23666%22 font-size=%2216%22%3Eno image%3C/text%3E%3C/svg%3E'; };
     divImg.appendChild(img);
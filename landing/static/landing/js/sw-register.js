@@ -0,0 +1,11 @@
+/**
+ * Регистрирует service worker лендинга (адрес — в data-sw-url тега script).
+ * Регистрация после load, чтобы установка (precache статики) не конкурировала с первой загрузкой страницы.
+ */
+(() => {
+  const url = document.currentScript && document.currentScript.dataset.swUrl;
+  if (!url || !('serviceWorker' in navigator)) return;
+  window.addEventListener('load', () => {
+    navigator.serviceWorker.register(url).catch(error => console.error('Service worker не зарегистрирован', error));
+  });
+})();
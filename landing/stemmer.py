@@ -0,0 +1,116 @@
+"""
+Стеммер для русского языка (алгоритм Snowball/Портера).
+
+Отрезает окончания и суффиксы, чтобы «стрижка», «стрижки» и «стрижку» давали одну основу «стрижк».
+Используется поисковым индексом (landing/search.py) одинаково для документов и запросов,
+поэтому не зависит от словарей СУБД.
+"""
+import re
+
+VOWELS = 'аеиоуыэюя'
+
+PERFECTIVE_GERUND = (
+    # (окончания, требуется ли перед окончанием «а» или «я»)
+    (('в', 'вши', 'вшись'), True),
+    (('ив', 'ивши', 'ившись', 'ыв', 'ывши', 'ывшись'), False),
+)
+REFLEXIVE = ((('ся', 'сь'), False),)
+ADJECTIVE = ((
+    ('ее', 'ие', 'ые', 'ое', 'ими', 'ыми', 'ей', 'ий', 'ый', 'ой', 'ем', 'им', 'ым', 'ом',
+     'его', 'ого', 'ему', 'ому', 'их', 'ых', 'ую', 'юю', 'ая', 'яя', 'ою', 'ею'),
+    False,
+),)
+PARTICIPLE = (
+    (('ем', 'нн', 'вш', 'ющ', 'щ'), True),
+    (('ивш', 'ывш', 'ующ'), False),
+)
+VERB = (
+    (('ла', 'на', 'ете', 'йте', 'ли', 'й', 'л', 'ем', 'н', 'ло', 'но', 'ет', 'ют', 'ны', 'ть', 'ешь', 'нно'), True),
+    (('ила', 'ыла', 'ена', 'ейте', 'уйте', 'ите', 'или', 'ыли', 'ей', 'уй', 'ил', 'ыл', 'им', 'ым', 'ен',
+      'ило', 'ыло', 'ено', 'ят', 'ует', 'уют', 'ит', 'ыт', 'ены', 'ить', 'ыть', 'ишь', 'ую', 'ю'), False),
+)
+NOUN = ((
+    ('а', 'ев', 'ов', 'ие', 'ье', 'е', 'иями', 'ями', 'ами', 'еи', 'ии', 'и', 'ией', 'ей', 'ой', 'ий', 'й',
+     'иям', 'ям', 'ием', 'ем', 'ам', 'ом', 'о', 'у', 'ах', 'иях', 'ях', 'ы', 'ь', 'ию', 'ью', 'ю', 'ия', 'ья', 'я'),
+    False,
+),)
+SUPERLATIVE = ((('ейше', 'ейш'), False),)
+DERIVATIONAL = ((('ость', 'ост'), False),)
+
+WORD_RE = re.compile(r'\w+')
+
+
+def _region_start(word, start=0):
+    """
+    Позиция начала региона: после первой согласной, следующей за гласной (R1/R2 в терминах Snowball).
+    """
+    for i in range(start + 1, len(word)):
+        if word[i] not in VOWELS and word[i - 1] in VOWELS:
+            return i + 1
+    return len(word)
+
+
+def _remove(word, groups, start):
+    """
+    Удаляет самое длинное подходящее окончание из groups, если оно целиком лежит правее start.
+    Возвращает новое слово или None, если ни одно окончание не подошло.
+    """
+    best = None
+    for suffixes, needs_a in groups:
+        for suffix in suffixes:
+            if not word.endswith(suffix) or len(word) - len(suffix) < start:
+                continue
+            if needs_a:
+                prev = len(word) - len(suffix) - 1
+                if prev < start or word[prev] not in 'ая':
+                    continue
+            if best is None or len(suffix) > len(best):
+                best = suffix
+    if best is None:
+        return None
+    return word[:-len(best)]
+
+
+def stem(word):
+    word = word.lower().replace('ё', 'е')
+    rv = next((i + 1 for i, ch in enumerate(word) if ch in VOWELS), len(word))
+    r2 = _region_start(word, _region_start(word))
+
+    # Шаг 1: деепричастие; иначе возвратная частица, затем прилагательное/причастие, глагол или существительное
+    result = _remove(word, PERFECTIVE_GERUND, rv)
+    if result is None:
+        word = _remove(word, REFLEXIVE, rv) or word
+        result = _remove(word, ADJECTIVE, rv)
+        if result is not None:
+            result = _remove(result, PARTICIPLE, rv) or result
+        else:
+            result = _remove(word, VERB, rv)
+            if result is None:
+                result = _remove(word, NOUN, rv)
+    if result is not None:
+        word = result
+
+    # Шаг 2: «и» на конце
+    if word.endswith('и') and len(word) - 1 >= rv:
+        word = word[:-1]
+
+    # Шаг 3: словообразовательный суффикс «ост(ь)» в R2
+    word = _remove(word, DERIVATIONAL, r2) or word
+
+    # Шаг 4: превосходная степень, двойное «н», мягкий знак
+    word = _remove(word, SUPERLATIVE, rv) or word
+    if word.endswith('нн') and len(word) - 2 >= rv:
+        word = word[:-1]
+    elif word.endswith('ь') and len(word) - 1 >= rv:
+        word = word[:-1]
+    return word
+
+
+def tokenize(text):
+    """ Слова текста в нижнем регистре (ё заменяется на е). """
+    return WORD_RE.findall((text or '').lower().replace('ё', 'е'))
+
+
+def stem_text(text):
+    """ Строка из основ всех слов текста — в таком виде тексты хранятся в поисковом индексе. """
+    return ' '.join(stem(token) for token in tokenize(text))
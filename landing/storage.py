@@ -0,0 +1,205 @@
+import hashlib
+import json
+import os
+import posixpath
+import re
+import tempfile
+
+from django.apps import apps
+from django.conf import settings
+from django.contrib.staticfiles.storage import ManifestStaticFilesStorage
+from django.core.exceptions import SuspiciousFileOperation
+from django.core.files.base import ContentFile
+from django.core.files.storage import FileSystemStorage
+from django.db import models
+
+from .imaging import check_image_limits, normalize_image
+
+# Имя файла в контентно-адресуемом хранилище: <каталог>/<ab>/<sha256>.<расширение>
+HASHED_NAME_RE = re.compile(r'(^|/)[0-9a-f]{2}/[0-9a-f]{64}(\.[0-9a-z]+)?$')
+
+CHUNK_SIZE = 64 * 1024
+
+# Список статики для service worker, записывается при collectstatic (LandingStaticFilesStorage)
+PRECACHE_MANIFEST_NAME = 'precache.json'
+
+
+def hash_file(fileobj, algorithm='sha256'):
+    """
+    Считает хеш содержимого файла потоково, не загружая его в память целиком.
+    """
+    hasher = hashlib.new(algorithm)
+    if hasattr(fileobj, 'seek'):
+        fileobj.seek(0)
+    if hasattr(fileobj, 'chunks'):
+        chunks = fileobj.chunks(CHUNK_SIZE)
+    else:
+        chunks = iter(lambda: fileobj.read(CHUNK_SIZE), b'')
+    for chunk in chunks:
+        hasher.update(chunk)
+    return hasher.hexdigest()
+
+
+def hashed_name(directory, digest, extension):
+    """
+    Строит имя файла по хешу содержимого.
+    Первые два символа хеша — подкаталог, чтобы в одной папке не копились сотни тысяч файлов.
+    """
+    return posixpath.join(directory, digest[:2], f"{digest}{extension.lower()}")
+
+
+def is_hashed_name(name):
+    """
+    Проверяет, что имя файла уже построено по хешу (такие URL неизменяемы и кешируются навсегда).
+    """
+    return bool(HASHED_NAME_RE.search(name))
+
+
+class ContentAddressedStorage(FileSystemStorage):
+    """
+    Файловое хранилище, которое сохраняет каждый уникальный файл ровно один раз.
+
+    Во время записи загрузки считается sha256 содержимого, итоговое имя строится по хешу.
+    Если такой файл уже есть — временная копия удаляется, а модель получает ссылку на существующий.
+    """
+    hash_algorithm = 'sha256'
+
+    def get_available_name(self, name, max_length=None):
+        # Имя всё равно будет заменено на хеш в _save, поэтому случайный суффикс Django не нужен
+        if max_length is not None and len(name) > max_length:
+            raise SuspiciousFileOperation(
+                f"Имя файла '{name}' длиннее допустимых {max_length} символов."
+            )
+        return name
+
+    def _save(self, name, content):
+        directory, filename = posixpath.split(name.replace('\\', '/'))
+        extension = os.path.splitext(filename)[1]
+
+        full_directory = self.path(directory)
+        self._makedirs(full_directory)
+
+        # Пишем во временный файл в той же папке и одновременно считаем хеш
+        hasher = hashlib.new(self.hash_algorithm)
+        fd, tmp_path = tempfile.mkstemp(dir=full_directory, prefix='.upload-', suffix='.part')
+        try:
+            with os.fdopen(fd, 'wb') as tmp_file:
+                if hasattr(content, 'seek'):
+                    content.seek(0)
+                for chunk in content.chunks(CHUNK_SIZE):
+                    hasher.update(chunk)
+                    tmp_file.write(chunk)
+
+            final_name = hashed_name(directory, hasher.hexdigest(), extension)
+            full_path = self.path(final_name)
+
+            if os.path.exists(full_path):
+                # Такой файл уже хранится — повторно не сохраняем
+                os.remove(tmp_path)
+            else:
+                self._makedirs(os.path.dirname(full_path))
+                if self.file_permissions_mode is not None:
+                    os.chmod(tmp_path, self.file_permissions_mode)
+                os.replace(tmp_path, full_path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+        return final_name
+
+    def _makedirs(self, directory):
+        if self.directory_permissions_mode is not None:
+            old_umask = os.umask(0o777 & ~self.directory_permissions_mode)
+            try:
+                os.makedirs(directory, self.directory_permissions_mode, exist_ok=True)
+            finally:
+                os.umask(old_umask)
+        else:
+            os.makedirs(directory, exist_ok=True)
+
+
+class ImageMediaStorage(ContentAddressedStorage):
+    """
+    Хранилище изображений landing: перед сохранением каждое изображение нормализуется
+    (EXIF-ориентация, удаление метаданных, уменьшение до LANDING_IMAGE_MAX_EDGE).
+    Хеш считается уже от нормализованного файла, поэтому повторная загрузка того же оригинала
+    попадает в тот же блоб.
+    """
+
+    def _save(self, name, content):
+        check_image_limits(content, settings.LANDING_IMAGE_MAX_BYTES, settings.LANDING_IMAGE_MAX_PIXELS)
+        normalized = normalize_image(
+            content,
+            settings.LANDING_IMAGE_MAX_EDGE,
+            quality=settings.LANDING_IMAGE_QUALITY,
+        )
+        if normalized is not None:
+            data, extension = normalized
+            name = os.path.splitext(name)[0] + extension
+            content = ContentFile(data)
+        return super()._save(name, content)
+
+
+media_storage = ImageMediaStorage()
+
+
+def get_media_storage():
+    """
+    Хранилище для ImageField приложения landing.
+    Передаётся в поля как callable, чтобы миграции не зависели от настроек хранилища.
+    """
+    return media_storage
+
+
+def image_fields():
+    """
+    Возвращает список пар (модель, поле) для всех ImageField приложения landing.
+    """
+    result = []
+    for model in apps.get_app_config('landing').get_models():
+        for field in model._meta.get_fields():
+            if isinstance(field, models.ImageField):
+                result.append((model, field))
+    return result
+
+
+class LandingStaticFilesStorage(ManifestStaticFilesStorage):
+    """
+    Статика с хешем содержимого в имени (как ManifestStaticFilesStorage) и списком файлов для service worker.
+
+    При collectstatic рядом с staticfiles.json записывается PRECACHE_MANIFEST_NAME: имена с хешем
+    файлов landing/ подходящих типов, которые service worker (landing/service_worker.py) загружает при установке.
+    До collectstatic (разработка, тесты) манифеста нет, и {% static %} отдаёт исходные имена.
+    """
+    precache_extensions = ('.css', '.js', '.woff2', '.png', '.jpg', '.jpeg', '.webp', '.svg', '.ico')
+    precache_prefix = 'landing/'
+
+    def stored_name(self, name):
+        try:
+            return super().stored_name(name)
+        except ValueError:
+            if self.hashed_files:
+                raise
+            return name
+
+    def precache_names(self):
+        max_size = getattr(settings, 'LANDING_SW_PRECACHE_MAX_SIZE', 1024 * 1024)
+        names = []
+        for name, hashed in sorted(self.hashed_files.items()):
+            if not name.startswith(self.precache_prefix) or not name.lower().endswith(self.precache_extensions):
+                continue
+            if self.size(hashed) > max_size:
+                # крупные файлы попадут в кеш service worker при первом использовании
+                continue
+            names.append(hashed)
+        return names
+
+    def save_manifest(self):
+        super().save_manifest()
+        names = self.precache_names()
+        version = hashlib.md5('\n'.join(names).encode('utf-8')).hexdigest()[:12]
+        content = json.dumps({'version': version, 'names': names}).encode('utf-8')
+        if self.exists(PRECACHE_MANIFEST_NAME):
+            self.delete(PRECACHE_MANIFEST_NAME)
+        self._save(PRECACHE_MANIFEST_NAME, ContentFile(content))
@@ -0,0 +1,78 @@
+"""
+Потоковая отдача главной страницы.
+
+Обычный render() собирает страницу целиком, и браузер не видит ни одного байта, пока не отрендерены
+все секции. В потоковом режиме (LANDING_STREAM_INDEX) сразу уходит <head> и шапка с логотипом и картинками
+первого экрана — браузер начинает загружать CSS и изображения, а секции отправляются по мере рендера.
+В заголовке Link перечислены те же ресурсы с rel=preload: CDN и прокси с поддержкой 103 Early Hints
+(Cloudflare, h2o, nginx с early_hints) отправляют их браузеру ещё до ответа Django.
+
+Оболочка страницы (landing/index_shell.html) — это index.html, в котором вместо секций стоит метка;
+секции рендерятся тем же шаблоном landing/section.html и берутся из того же кеша фрагментов,
+что и при обычном рендере.
+"""
+from asgiref.sync import sync_to_async
+from django.core.handlers.asgi import ASGIRequest
+from django.http import StreamingHttpResponse
+from django.middleware.csrf import get_token
+from django.template.loader import get_template
+from django.templatetags.static import static
+
+from .cache import SECTION_DEPENDENCIES
+
+SECTIONS_PLACEHOLDER = '<!--landing:sections-->'
+
+# Ресурсы первого экрана (base.html): (путь в static, тип для rel=preload)
+PRELOAD = (
+    ('landing/css/normalize.css', 'style'),
+    ('landing/css/styles.css', 'style'),
+    ('landing/images/logo.png', 'image'),
+    ('landing/images/3.png', 'image'),
+    ('landing/images/2.png', 'image'),
+)
+
+
+def preload_links():
+    """ Значение заголовка Link с rel=preload для ресурсов первого экрана. """
+    return ', '.join(f"<{static(path)}>; rel=preload; as={kind}" for path, kind in PRELOAD)
+
+
+def render_chunks(request, context):
+    """
+    Части страницы по порядку: <head> и шапка, затем каждая секция, затем подвал и скрипты.
+    Ошибка рендера секции здесь уже не превратится в ответ 500 — заголовки к этому моменту отправлены.
+    """
+    shell = get_template('landing/index_shell.html').render(
+        {**context, 'sections_placeholder': SECTIONS_PLACEHOLDER}, request,
+    )
+    head, tail = shell.split(SECTIONS_PLACEHOLDER)
+    yield head
+    section = get_template('landing/section.html')
+    versions = context['section_versions']
+    for name in SECTION_DEPENDENCIES:
+        yield section.render({**context, 'section_name': name, 'section_version': versions[name]}, request)
+    yield tail
+
+
+async def _async_chunks(chunks):
+    # Под ASGI синхронный итератор Django прочитал бы целиком до отправки; рендер каждой части — в потоке
+    iterator = iter(chunks)
+    next_chunk = sync_to_async(lambda: next(iterator, None), thread_sensitive=True)
+    while (chunk := await next_chunk()) is not None:
+        yield chunk
+
+
+def stream_index(request, context):
+    """
+    StreamingHttpResponse главной страницы с заголовком Link для предзагрузки ресурсов первого экрана.
+    """
+    # CSRF-токен формы отзывов создаётся до отправки заголовков, иначе cookie с ним не попадёт в ответ
+    get_token(request)
+    chunks = render_chunks(request, context)
+    if isinstance(request, ASGIRequest):
+        chunks = _async_chunks(chunks)
+    response = StreamingHttpResponse(chunks, content_type='text/html; charset=utf-8')
+    response['Link'] = preload_links()
+    # nginx не должен копить ответ в буфере до конца
+    response['X-Accel-Buffering'] = 'no'
+    return response
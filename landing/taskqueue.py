@@ -0,0 +1,240 @@
+"""
+Небольшая очередь фоновых задач поверх таблицы Task — без Redis и Celery.
+
+Объявление задачи:
+
+    @task(max_attempts=3)
+    def notify_new_review(review_id):
+        ...
+
+Постановка в очередь (в той же транзакции, что и основное изменение):
+
+    notify_new_review.delay(review_id=review.id)
+
+Выполнение: `python manage.py run_tasks`.
+"""
+import hashlib
+import json
+import logging
+import os
+import random
+import socket
+import traceback
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import IntegrityError, close_old_connections, connection, transaction
+from django.db.models import F
+from django.utils import timezone
+from django.utils.module_loading import autodiscover_modules
+
+from .models import Task
+
+logger = logging.getLogger(__name__)
+
+_registry = {}
+
+
+class TaskFunction:
+    """
+    Обёртка над функцией-задачей: вызов напрямую выполняет её синхронно,
+    delay() ставит её в очередь.
+    """
+
+    def __init__(self, func, name, max_attempts, backoff, unique):
+        self.func = func
+        self.name = name
+        self.max_attempts = max_attempts
+        self.backoff = backoff
+        self.unique = unique
+        self.__doc__ = func.__doc__
+
+    def __call__(self, **kwargs):
+        return self.func(**kwargs)
+
+    def delay(self, **kwargs):
+        return enqueue(self, kwargs)
+
+
+def task(func=None, *, name=None, max_attempts=5, backoff=None, unique=False):
+    """
+    Регистрирует функцию как фоновую задачу.
+
+    max_attempts — сколько раз пытаться выполнить задачу до статуса «Ошибка»;
+    backoff — базовая задержка повтора в секундах (удваивается с каждой попыткой);
+    unique — не ставить задачу, если такая же (с теми же аргументами) уже ожидает выполнения.
+    Аргументы задачи передаются только именованными и должны сериализоваться в JSON.
+    """
+    def decorator(func):
+        task_name = name or f"{func.__module__}.{func.__name__}"
+        wrapper = TaskFunction(func, task_name, max_attempts, backoff, unique)
+        _registry[task_name] = wrapper
+        return wrapper
+
+    if func is not None:
+        return decorator(func)
+    return decorator
+
+
+def get_task(name):
+    if name not in _registry:
+        autodiscover_modules('tasks')
+    return _registry[name]
+
+
+def enqueue(task_function, payload):
+    """
+    Ставит задачу в очередь. Строка Task создаётся в текущей транзакции, поэтому воркер
+    увидит задачу только после коммита, а при откате она исчезнет вместе с изменениями.
+
+    При LANDING_TASKS_EAGER задача выполняется сразу после коммита в текущем процессе
+    (удобно для разработки без запущенного воркера).
+    """
+    if settings.LANDING_TASKS_EAGER:
+        transaction.on_commit(lambda: task_function(**payload))
+        return None
+
+    task_row = Task(name=task_function.name, payload=payload, max_attempts=task_function.max_attempts)
+    if not task_function.unique:
+        task_row.save()
+        return task_row
+    # Уникальность гарантирует ограничение landing_task_unique_pending, а не проверка перед вставкой:
+    # два процесса не могут одновременно поставить одну и ту же задачу
+    task_row.unique_key = unique_key(task_function.name, payload)
+    try:
+        with transaction.atomic():
+            task_row.save()
+    except IntegrityError:
+        return None
+    return task_row
+
+
+def unique_key(name, payload):
+    raw = json.dumps([name, payload], sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.md5(raw.encode('utf-8')).hexdigest()
+
+
+def requeue_tasks(queryset, **fields):
+    """
+    Возвращает задачи в очередь (status=pending) с дополнительными полями fields.
+    Задача с unique=True, такая же копия которой уже ждёт в очереди, не возвращается, а помечается выполненной:
+    работу сделает ожидающая копия. Возвращает число задач, вернувшихся в очередь.
+    """
+    # update() не обновляет auto_now, а по updated_at purge_finished_tasks отсчитывает срок хранения
+    update = {'status': Task.STATUS_PENDING, 'locked_at': None, 'locked_by': '', 'updated_at': timezone.now(), **fields}
+    requeued = queryset.filter(unique_key='').update(**update)
+    for pk in queryset.exclude(unique_key='').values_list('pk', flat=True):
+        try:
+            with transaction.atomic():
+                requeued += Task.objects.filter(pk=pk).update(**update)
+        except IntegrityError:
+            Task.objects.filter(pk=pk).update(
+                status=Task.STATUS_DONE, locked_at=None, locked_by='', updated_at=timezone.now(),
+            )
+    return requeued
+
+
+def worker_id():
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+def claim_tasks(limit, worker):
+    """
+    Забирает до limit готовых к выполнению задач и помечает их как выполняемые.
+
+    На PostgreSQL используется SELECT … FOR UPDATE SKIP LOCKED: параллельные воркеры
+    пропускают строки, уже заблокированные другими. На SQLite такой конструкции нет,
+    поэтому каждая задача захватывается условным UPDATE … WHERE status = 'pending':
+    запись в SQLite сериализуется, и обновить строку успевает только один воркер.
+    """
+    if limit <= 0:
+        return []
+    now = timezone.now()
+    ready = Task.objects.filter(status=Task.STATUS_PENDING, run_at__lte=now).order_by('run_at', 'pk')
+    claim = {
+        'status': Task.STATUS_RUNNING,
+        'locked_at': now,
+        'locked_by': worker,
+        'attempts': F('attempts') + 1,
+        'updated_at': now,
+    }
+
+    if connection.features.has_select_for_update_skip_locked:
+        with transaction.atomic():
+            ids = list(ready.select_for_update(skip_locked=True).values_list('pk', flat=True)[:limit])
+            Task.objects.filter(pk__in=ids).update(**claim)
+        return ids
+
+    claimed = []
+    for pk in ready.values_list('pk', flat=True)[:limit * 2]:
+        if Task.objects.filter(pk=pk, status=Task.STATUS_PENDING).update(**claim):
+            claimed.append(pk)
+            if len(claimed) >= limit:
+                break
+    return claimed
+
+
+def retry_delay(task_function, attempts):
+    """
+    Экспоненциальная задержка перед повтором со случайным разбросом,
+    чтобы упавшие разом задачи не повторялись тоже разом.
+    """
+    base = task_function.backoff or settings.LANDING_TASKS_BACKOFF
+    delay = base * (2 ** max(attempts - 1, 0))
+    return timedelta(seconds=delay * random.uniform(0.8, 1.2))
+
+
+def execute_task(task_id):
+    """
+    Выполняет одну захваченную задачу и записывает результат.
+    Вызывается в потоке или процессе пула воркера.
+    """
+    close_old_connections()
+    try:
+        task_row = Task.objects.filter(pk=task_id).first()
+        if task_row is None:
+            # строку удалили (например, из админки), пока задача ждала в пуле
+            logger.warning("Задача #%s не найдена и пропущена", task_id)
+            return False
+        try:
+            task_function = get_task(task_row.name)
+            task_function(**task_row.payload)
+        except Exception:
+            error = traceback.format_exc()
+            logger.warning("Задача %s #%s завершилась ошибкой (попытка %s)", task_row.name, task_id, task_row.attempts)
+            if task_row.attempts >= task_row.max_attempts or task_row.name not in _registry:
+                Task.objects.filter(pk=task_id).update(
+                    status=Task.STATUS_FAILED, last_error=error, locked_at=None, locked_by='',
+                    updated_at=timezone.now(),
+                )
+            else:
+                requeue_tasks(
+                    Task.objects.filter(pk=task_id), last_error=error,
+                    run_at=timezone.now() + retry_delay(_registry[task_row.name], task_row.attempts),
+                )
+            return False
+
+        Task.objects.filter(pk=task_id).update(
+            status=Task.STATUS_DONE, locked_at=None, last_error='', updated_at=timezone.now(),
+        )
+        return True
+    finally:
+        connection.close()
+
+
+def release_stale_tasks():
+    """
+    Возвращает в очередь задачи, «зависшие» в статусе выполнения (например, воркер был убит).
+    """
+    deadline = timezone.now() - timedelta(seconds=settings.LANDING_TASKS_LOCK_TIMEOUT)
+    return requeue_tasks(Task.objects.filter(status=Task.STATUS_RUNNING, locked_at__lt=deadline))
+
+
+def purge_finished_tasks():
+    """
+    Удаляет выполненные задачи старше LANDING_TASKS_KEEP_DONE_HOURS, чтобы таблица не росла.
+    Срок считается от updated_at — времени последней смены статуса (все UPDATE очереди его выставляют).
+    """
+    deadline = timezone.now() - timedelta(hours=settings.LANDING_TASKS_KEEP_DONE_HOURS)
+    deleted, _ = Task.objects.filter(status=Task.STATUS_DONE, updated_at__lt=deadline).delete()
+    return deleted
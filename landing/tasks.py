@@ -0,0 +1,90 @@
+"""
+Фоновые задачи landing. Выполняются воркером `manage.py run_tasks` (см. landing/taskqueue.py).
+"""
+from django.apps import apps
+from django.conf import settings
+from django.core.mail import mail_managers
+from django.urls import reverse
+from django.utils import timezone
+
+from .cache import bump_model_version
+from .imaging import extract_metadata, meta_field_names
+from .taskqueue import task
+
+
+@task(max_attempts=3, unique=True)
+def fill_image_metadata(model, pk, field_name):
+    """
+    Считает метаданные изображения (размер файла, преобладающий цвет, LQIP) после загрузки.
+    """
+    model_class = apps.get_model(model)
+    instance = model_class.objects.filter(pk=pk).only(field_name).first()
+    if instance is None:
+        return
+    field_file = getattr(instance, field_name)
+    if not field_file:
+        return
+    with field_file.storage.open(field_file.name, 'rb') as fh:
+        metadata = extract_metadata(fh)
+    # update(), а не save(): сигналы моделей здесь не нужны, версию для кеша поднимаем сами
+    model_class.objects.filter(pk=pk, **{field_name: field_file.name}).update(
+        **{attname: metadata[key] for key, attname in meta_field_names(field_name).items()}
+    )
+    bump_model_version(model_class)
+
+
+@task(max_attempts=3, unique=True)
+def prerender_landing():
+    """
+    Перегенерирует статическую главную страницу. Благодаря unique=True серия изменений
+    в админке ставит в очередь только одну задачу.
+    """
+    from .prerender import prerender_landing as render
+
+    render()
+
+
+@task(max_attempts=5)
+def notify_new_review(review_id):
+    """
+    Сообщает менеджерам (settings.MANAGERS) о новом отзыве, ожидающем модерации.
+    """
+    Review = apps.get_model('landing', 'Review')
+    review = Review.objects.filter(pk=review_id).first()
+    if review is None:
+        return
+    admin_url = reverse('admin:landing_review_change', args=[review.pk])
+    mail_managers(
+        f"Новый отзыв от {review.name}",
+        f"Оценка: {review.rating}\n\n{review.review}\n\nМодерация: {admin_url}",
+    )
+
+
+@task(max_attempts=3, unique=True)
+def score_review_spam(review_id, notify=False):
+    """
+    Оценивает отзыв спам-фильтром (landing/spam.py) и сохраняет вероятность в spam_score.
+    Непроверенный отзыв с оценкой не ниже LANDING_SPAM_AUTO_REJECT сразу отклоняется — но только
+    при обученной модели: одни эвристики дают ложные срабатывания (например, на отзыв со ссылками);
+    об остальных при notify=True сообщается менеджерам.
+    """
+    from .spam import load_model, spam_probability
+
+    Review = apps.get_model('landing', 'Review')
+    review = Review.objects.filter(pk=review_id).first()
+    if review is None:
+        return
+    model = load_model()
+    score = spam_probability(review, model)
+
+    threshold = settings.LANDING_SPAM_AUTO_REJECT if model.trained else None
+    if threshold is not None and score >= threshold and review.moderated_at is None:
+        # Непроверенный отзыв не опубликован и на странице не виден, поэтому кеши сбрасывать не нужно
+        rejected = Review.objects.filter(pk=review_id, moderated_at__isnull=True).update(
+            spam_score=score, is_public=False, moderated_at=timezone.now()
+        )
+        if rejected:
+            return
+    Review.objects.filter(pk=review_id).update(spam_score=score)
+    if notify and review.moderated_at is None:
+        notify_new_review.delay(review_id=review_id)
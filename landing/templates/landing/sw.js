@@ -0,0 +1,129 @@
+/* Service worker лендинга, генерируется landing/service_worker.py */
+const CONFIG = {{ config|safe }};
+
+const PREFIX = 'landing-';
+const PRECACHE = `${PREFIX}static-${CONFIG.version}`;
+const RUNTIME = `${PREFIX}runtime-${CONFIG.version}`;
+const MEDIA = `${PREFIX}media`;
+const PAGES = `${PREFIX}pages`;
+const DATA = `${PREFIX}data`;
+const KEEP = [PRECACHE, RUNTIME, MEDIA, PAGES, DATA];
+
+// Статика с хешем содержимого в имени (ManifestStaticFilesStorage: name.0123456789ab.ext) не меняется
+const HASHED_STATIC_RE = /\.[0-9a-f]{12}\.[0-9a-z]+$/;
+// Имя media по хешу содержимого (landing/storage.py): <каталог>/<ab>/<sha256>.<ext>
+const HASHED_MEDIA_RE = /\/[0-9a-f]{2}\/[0-9a-f]{64}(\.[0-9a-z]+)?$/;
+const PAYLOAD_URL_RE = /data-payload-url="([^"]+)"/g;
+
+self.addEventListener('install', (event) => {
+  event.waitUntil((async () => {
+    const cache = await caches.open(PRECACHE);
+    await cache.addAll(CONFIG.precache);
+    // главная страница и текущие версии данных секций — чтобы первый же офлайн-заход работал
+    await Promise.all(CONFIG.pages.map(path => refreshPage(new Request(path)).catch(() => null)));
+    await self.skipWaiting();
+  })());
+});
+
+self.addEventListener('activate', (event) => {
+  event.waitUntil((async () => {
+    const names = await caches.keys();
+    await Promise.all(names.filter(name => name.startsWith(PREFIX) && !KEEP.includes(name)).map(name => caches.delete(name)));
+    await self.clients.claim();
+  })());
+});
+
+self.addEventListener('fetch', (event) => {
+  const { request } = event;
+  if (request.method !== 'GET') return;
+  const url = new URL(request.url);
+
+  if (url.origin !== self.location.origin) {
+    if (CONFIG.cdnHosts.includes(url.hostname)) event.respondWith(staleWhileRevalidate(request, RUNTIME));
+    return;
+  }
+  if (request.mode === 'navigate') {
+    if (CONFIG.pages.includes(url.pathname)) event.respondWith(navigation(event));
+    return;
+  }
+  if (url.pathname.startsWith(CONFIG.staticUrl)) {
+    event.respondWith(HASHED_STATIC_RE.test(url.pathname)
+      ? cacheFirst(request, RUNTIME)
+      : staleWhileRevalidate(request, RUNTIME));
+  } else if (url.pathname.startsWith(CONFIG.mediaUrl)) {
+    event.respondWith(HASHED_MEDIA_RE.test(url.pathname)
+      ? cacheFirst(request, MEDIA, CONFIG.mediaEntries)
+      : staleWhileRevalidate(request, MEDIA, CONFIG.mediaEntries));
+  } else if (url.pathname.startsWith(CONFIG.dataUrl)) {
+    // адрес содержит версию данных — ответ по нему не меняется
+    event.respondWith(cacheFirst(request, DATA));
+  }
+});
+
+async function cached(request) {
+  return caches.match(request, { ignoreVary: true });
+}
+
+async function put(cacheName, request, response, maxEntries) {
+  // opaque-ответы CDN (status 0) тоже кешируются: без них страница без сети теряет стили библиотек
+  if (!response || !(response.ok || response.type === 'opaque')) return;
+  const cache = await caches.open(cacheName);
+  await cache.put(request, response);
+  if (maxEntries) {
+    const keys = await cache.keys();
+    await Promise.all(keys.slice(0, Math.max(keys.length - maxEntries, 0)).map(key => cache.delete(key)));
+  }
+}
+
+async function cacheFirst(request, cacheName, maxEntries) {
+  const hit = await cached(request);
+  if (hit) return hit;
+  const response = await fetch(request);
+  await put(cacheName, request, response.clone(), maxEntries);
+  return response;
+}
+
+async function staleWhileRevalidate(request, cacheName, maxEntries) {
+  const hit = await cached(request);
+  const update = fetch(request).then(async (response) => {
+    await put(cacheName, request, response.clone(), maxEntries);
+    return response;
+  });
+  if (hit) {
+    update.catch(() => null);
+    return hit;
+  }
+  return update;
+}
+
+/**
+ * Загружает страницу, кладёт её в кеш и догружает данные секций, на которые она ссылается.
+ */
+async function refreshPage(request) {
+  const response = await fetch(request.url, { credentials: 'same-origin' });
+  if (!response.ok) return response;
+  const html = await response.clone().text();
+  const key = new URL(request.url).pathname;
+  await put(PAGES, key, response.clone());
+  const dataCache = await caches.open(DATA);
+  const urls = [...html.matchAll(PAYLOAD_URL_RE)].map(match => match[1]);
+  await Promise.all(urls.map(async (url) => {
+    if (!(await dataCache.match(url))) await dataCache.add(url).catch(() => null);
+  }));
+  // прежние версии данных больше не нужны
+  const current = new Set(urls.map(url => new URL(url, self.location.origin).pathname));
+  const keys = await dataCache.keys();
+  await Promise.all(keys.filter(key => !current.has(new URL(key.url).pathname)).map(key => dataCache.delete(key)));
+  return response;
+}
+
+async function navigation(event) {
+  const key = new URL(event.request.url).pathname;
+  const hit = await caches.match(key, { cacheName: PAGES });
+  const update = refreshPage(event.request);
+  if (hit) {
+    event.waitUntil(update.catch(() => null));
+    return hit;
+  }
+  return update;
+}
@@ -0,0 +1,47 @@
+"""
+{% section_cache %} — кеш фрагмента секции лендинга по версии её данных.
+
+    {% load landing_cache %}
+    {% section_cache section_cache_timeout 'reviews' section_versions.reviews %}
+        ...
+    {% endsection_cache %}
+
+В отличие от {% cache %}, ключ фрагмента постоянный, а версия хранится вместе с ним (landing.cache.get_or_compute):
+после правки в админке секцию перерисовывает один процесс, остальные до этого отдают прежний фрагмент.
+Пререндер (section_cache_fresh в контексте) прежний фрагмент не берёт: он ждёт или сам считает новый,
+иначе устаревшая секция осталась бы в статическом index.html до следующей правки.
+"""
+from django import template
+
+from ..cache import get_or_compute
+
+register = template.Library()
+
+KEY_PREFIX = 'landing:section:'
+
+
+class SectionCacheNode(template.Node):
+    def __init__(self, nodelist, timeout, name, stamp):
+        self.nodelist = nodelist
+        self.timeout = timeout
+        self.name = name
+        self.stamp = stamp
+
+    def render(self, context):
+        timeout = self.timeout.resolve(context)
+        name = self.name.resolve(context)
+        stamp = self.stamp.resolve(context)
+        return get_or_compute(
+            f"{KEY_PREFIX}{name}", stamp, lambda: self.nodelist.render(context), timeout=timeout,
+            stale=not context.get('section_cache_fresh', False),
+        )
+
+
+@register.tag('section_cache')
+def do_section_cache(parser, token):
+    bits = token.split_contents()
+    if len(bits) != 4:
+        raise template.TemplateSyntaxError(f"'{bits[0]}' принимает три аргумента: время жизни, имя секции и версию.")
+    nodelist = parser.parse(('endsection_cache',))
+    parser.delete_first_token()
+    return SectionCacheNode(nodelist, *(parser.compile_filter(bit) for bit in bits[1:]))
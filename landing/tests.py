@@ -1,3 +1,1328 @@
-from django.test import TestCase
+import asyncio
+import csv
+import json
+import math
+import os
+import re
+import tempfile
+import time
+import tracemalloc
+from datetime import timedelta
+from io import BytesIO, StringIO
+from unittest import mock
 
-# Create your tests here.
+from django.core.cache import caches
+from django.core.exceptions import ValidationError
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import CommandError, call_command
+from django.http import HttpResponse
+from django.db import connection
+from django.test import RequestFactory, SimpleTestCase, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from .cache import bump_model_version, model_version, release_stamp, section_versions
+from .exports import REVIEW_FIELDS, review_rows, streaming_response
+from .geo import KDTree, chord_to_km, to_unit_vector
+from .models import Address, ArchivedReviewBatch, GalleryImage, Master, Review, Service, Task
+from .live import Broadcaster, LogReader, append_events, event_stream
+from .media_gc import collect_garbage
+from .moderation import publish_reviews, queue_page, reject_reviews
+from .memory import recycle_gunicorn_worker
+from .payloads import pack
+from .querylog import QueryLogWorker, QueryWatcher, normalize_sql
+from .prerender import prerender_landing, render_index
+from .spam import NaiveBayes, heuristic_log_odds, save_model, spam_probability
+from .service_worker import service_worker_script
+from .ratelimit import client_ip, get_cache, normalize_email
+from .retention import archive_reviews, restore_reviews
+from .sqlite_cache import SQLiteCache
+from .storage import PRECACHE_MANIFEST_NAME, is_hashed_name, media_storage
+from .templatetags.landing_cache import KEY_PREFIX as SECTION_KEY_PREFIX
+from .taskqueue import claim_tasks, execute_task, purge_finished_tasks, release_stale_tasks, task
+from .tasks import fill_image_metadata, score_review_spam
+from .warmup import STEPS, warm_index
+
+TEST_CACHES = {
+    'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'tests-default'},
+    'ratelimit': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'tests-ratelimit'},
+}
+
+
+def image_bytes(color='red', size=(8, 8), image_format='PNG'):
+    from PIL import Image
+
+    buffer = BytesIO()
+    Image.new('RGB', size, color).save(buffer, image_format)
+    return buffer.getvalue()
+
+
+def temp_media_root(test):
+    """ Временный MEDIA_ROOT на время теста; возвращает путь к нему. """
+    root = tempfile.TemporaryDirectory()
+    test.addCleanup(root.cleanup)
+    override = override_settings(MEDIA_ROOT=root.name)
+    override.enable()
+    test.addCleanup(override.disable)
+    return root.name
+
+
+def write_media(root, name, data):
+    path = os.path.join(root, name)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'wb') as f:
+        f.write(data)
+    return path
+
+
+@override_settings(
+    CACHES=TEST_CACHES,
+    LANDING_REVIEW_RATE_CACHE='ratelimit',
+    LANDING_REVIEW_RATE_IP=(5, 600),
+    LANDING_REVIEW_RATE_EMAIL=(2, 3600),
+    LANDING_REVIEW_DUPLICATE_WINDOW=3600,
+)
+class ReviewFloodTests(TestCase):
+    """
+    Флуд формы отзывов: число записей в БД ограничено лимитами, отклонённые запросы не обращаются к БД.
+    """
+    FLOOD = 50
+
+    def setUp(self):
+        get_cache().clear()
+        self.url = reverse('reviews:create')
+
+    def post(self, n, ip='203.0.113.1', email=None, text=None):
+        data = {
+            'name': f'Гость {n}',
+            'email': email or f'guest{n}@example.com',
+            'review': text or f'Отзыв номер {n}: стрижка понравилась, мастер внимательный.',
+            'rating': 5,
+        }
+        return self.client.post(self.url, data, REMOTE_ADDR=ip, HTTP_X_REQUESTED_WITH='XMLHttpRequest')
+
+    def flood(self, **make_kwargs):
+        """ Отправляет FLOOD отзывов, возвращает (коды ответов, число INSERT, число запросов отклонённых ответов). """
+        statuses, inserts, rejected_queries = [], 0, 0
+        for n in range(self.FLOOD):
+            with CaptureQueriesContext(connection) as queries:
+                response = self.post(n, **{key: make(n) for key, make in make_kwargs.items()})
+            statuses.append(response.status_code)
+            inserts += sum(query['sql'].lstrip().upper().startswith('INSERT') for query in queries)
+            if response.status_code != 200:
+                rejected_queries += len(queries)
+        return statuses, inserts, rejected_queries
+
+    def test_flood_from_one_ip(self):
+        statuses, inserts, rejected_queries = self.flood()
+        self.assertEqual(statuses.count(200), 5)
+        self.assertEqual(statuses.count(429), self.FLOOD - 5)
+        self.assertEqual(Review.objects.count(), 5)
+        # отзыв и задача спам-фильтра на каждый принятый отзыв
+        self.assertLessEqual(inserts, 2 * 5)
+        self.assertEqual(rejected_queries, 0)
+        self.assertGreater(int(self.post(self.FLOOD)['Retry-After']), 0)
+
+    def test_flood_with_one_email_variants(self):
+        variants = ['Guest@Gmail.com', 'g.u.e.s.t@gmail.com', 'guest+1@googlemail.com', ' GUEST+x@gmail.com ']
+        statuses, inserts, rejected_queries = self.flood(
+            ip=lambda n: f'198.51.100.{n}',
+            email=lambda n: variants[n % len(variants)].replace('@', f'+{n}@', 1),
+        )
+        self.assertEqual(statuses.count(200), 2)
+        self.assertEqual(Review.objects.count(), 2)
+        self.assertLessEqual(inserts, 2 * 2)
+        self.assertEqual(rejected_queries, 0)
+
+    def test_duplicate_text_from_many_clients(self):
+        text = 'Лучший барбершоп в городе!!! Переходите по ссылке и получите скидку.'
+        statuses, inserts, rejected_queries = self.flood(ip=lambda n: f'192.0.2.{n}', text=lambda n: text)
+        self.assertEqual(statuses.count(200), 1)
+        self.assertEqual(statuses.count(409), self.FLOOD - 1)
+        self.assertEqual(Review.objects.count(), 1)
+        self.assertEqual(Task.objects.count(), 1)
+        self.assertEqual(rejected_queries, 0)
+
+    def test_short_texts_from_different_people_are_not_duplicates(self):
+        self.assertEqual(self.post(1, text='Всё отлично!').status_code, 200)
+        self.assertEqual(self.post(2, ip='203.0.113.2', text='Всё отлично!').status_code, 200)
+
+    @override_settings(LANDING_TRUSTED_PROXY_HOPS=1)
+    def test_clients_behind_proxy(self):
+        # за nginx у всех запросов один REMOTE_ADDR, а клиенты различаются по X-Forwarded-For
+        for n in range(10):
+            response = self.client.post(self.url, {
+                'name': f'Гость {n}', 'email': f'guest{n}@example.com', 'rating': 5,
+                'review': f'Отзыв номер {n}: стрижка понравилась, мастер внимательный.',
+            }, REMOTE_ADDR='127.0.0.1', HTTP_X_FORWARDED_FOR=f'10.0.0.1, 198.51.100.{n}',
+                HTTP_X_REQUESTED_WITH='XMLHttpRequest')
+            self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            list(Review.objects.order_by('pk').values_list('ip_address', flat=True)),
+            [f'198.51.100.{n}' for n in range(10)],
+        )
+
+    def test_client_ip(self):
+        def ip(remote_addr='127.0.0.1', forwarded=None):
+            request = RequestFactory().get('/', REMOTE_ADDR=remote_addr)
+            if forwarded is not None:
+                request.META['HTTP_X_FORWARDED_FOR'] = forwarded
+            return client_ip(request)
+
+        self.assertEqual(ip(forwarded='198.51.100.1'), '127.0.0.1')
+        with override_settings(LANDING_TRUSTED_PROXY_HOPS=1):
+            # подделанное клиентом начало заголовка не используется
+            self.assertEqual(ip(forwarded='1.2.3.4, 198.51.100.1'), '198.51.100.1')
+            self.assertEqual(ip(forwarded=' 2001:DB8::1 '), '2001:db8::1')
+            self.assertEqual(ip(forwarded=''), '127.0.0.1')
+            self.assertIsNone(ip(forwarded='unknown'))
+        with override_settings(LANDING_TRUSTED_PROXY_HOPS=2):
+            self.assertEqual(ip(forwarded='1.2.3.4, 198.51.100.1, 10.0.0.5'), '198.51.100.1')
+            self.assertEqual(ip(forwarded='198.51.100.1'), '198.51.100.1')
+
+    def test_normalize_email(self):
+        self.assertEqual(normalize_email(' J.Doe+spam@GoogleMail.com '), 'jdoe@gmail.com')
+        self.assertEqual(normalize_email('a.b+c@example.com'), 'a.b@example.com')
+        self.assertEqual(normalize_email(''), '')
+
+
+
+@override_settings(CACHES=TEST_CACHES)
+class StreamingIndexTests(TestCase):
+    """
+    Потоковая главная страница: тот же HTML, что и у render(), cookie CSRF и заголовок Link.
+    """
+
+    def test_stream_matches_render(self):
+        with override_settings(LANDING_STREAM_INDEX=False):
+            rendered = self.client.get('/').content.decode()
+        with override_settings(LANDING_STREAM_INDEX=True):
+            response = self.client.get('/')
+        self.assertTrue(response.streaming)
+        self.assertIn('rel=preload', response['Link'])
+        self.assertIn('csrftoken', response.cookies)
+        streamed = b''.join(response.streaming_content).decode()
+        self.assertEqual(self.normalize(streamed), self.normalize(rendered))
+
+    @staticmethod
+    def normalize(html):
+        # CSRF-токены в формах разные, комментарии и пробелы между секциями не важны
+        html = re.sub(r'<!--.*?-->', '', html)
+        return re.sub(r'\s+', ' ', re.sub(r'value="[^"]*"', '', html))
+
+@override_settings(CACHES=TEST_CACHES)
+class SectionPayloadTests(TestCase):
+    """
+    Данные услуг и мастеров для клиентского кеша: адрес с версией неизменяем, HTML их не содержит.
+    """
+
+    def test_index_links_versioned_payloads(self):
+        html = self.render_index()
+        self.assertNotIn('services-data', html)
+        url = re.search(r'data-payload-url="(/data/services\.\w+\.json)"', html).group(1)
+
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('immutable', response['Cache-Control'])
+        self.assertEqual(response.json(), [])
+        with CaptureQueriesContext(connection) as queries:
+            cached = self.client.get(url, HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(cached.status_code, 304)
+        self.assertEqual(len(queries), 0)
+
+        bump_model_version(Service)
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 302)
+        self.assertNotEqual(response['Location'], url)
+        self.assertEqual(self.client.get('/data/unknown.abc.json').status_code, 404)
+
+    def render_index(self):
+        response = self.client.get('/')
+        return b''.join(response.streaming_content).decode() if response.streaming else response.content.decode()
+
+    def test_pack_deduplicates_keys(self):
+        packed = pack([{'id': 1, 'socials': [{'name': 'vk'}]}, {'id': 2, 'socials': []}])
+        self.assertEqual(packed, {'fields': ['id', 'socials'], 'rows': [[1, {'fields': ['name'], 'rows': [['vk']]}], [2, []]]})
+        self.assertEqual(pack([{'a': 1}, {'b': 2}]), [{'a': 1}, {'b': 2}])
+
+
+@override_settings(CACHES=TEST_CACHES, LANDING_REVIEW_ARCHIVE_REJECTED_DAYS=90, LANDING_REVIEW_ARCHIVE_PUBLIC_DAYS=365)
+class ReviewRetentionTests(TestCase):
+    """
+    Старые отзывы переносятся в архив пачками и возвращаются без потерь; очередь модерации не трогается.
+    """
+
+    def setUp(self):
+        now = timezone.now()
+        ages = {'old-rejected': (400, False, now), 'old-public': (400, True, now), 'old-pending': (400, False, None),
+                'new-rejected': (10, False, now)}
+        for name, (days, is_public, moderated_at) in ages.items():
+            review = Review.objects.create(
+                name=name, email=f'{name}@example.com', review='Текст', rating=5,
+                is_public=is_public, moderated_at=moderated_at,
+            )
+            Review.objects.filter(pk=review.pk).update(created_at=now - timedelta(days=days, microseconds=7))
+        self.original = {review.name: review for review in Review.objects.all()}
+
+    def test_archive_and_restore(self):
+        report = archive_reviews(batch_size=1)
+        self.assertEqual(report.counts, {'rejected': 1, 'public': 1})
+        self.assertEqual(ArchivedReviewBatch.objects.count(), 2)
+        self.assertEqual(set(Review.objects.values_list('name', flat=True)), {'old-pending', 'new-rejected'})
+
+        # автор отклонённого отзыва уже оставил новый: архивный остаётся в архиве
+        Review.objects.create(name='again', email='old-rejected@example.com', review='Снова')
+        report = restore_reviews(since=timezone.now() - timedelta(days=500))
+        self.assertEqual((report.counts['restored'], report.skipped), (1, 1))
+        restored = Review.objects.get(name='old-public')
+        original = self.original['old-public']
+        self.assertEqual((restored.pk, restored.created_at, restored.is_public),
+                         (original.pk, original.created_at, True))
+        self.assertEqual(ArchivedReviewBatch.objects.get().count, 1)
+
+
+class ServiceWorkerTests(SimpleTestCase):
+    """
+    collectstatic записывает список precache из имён с хешем, /sw.js загружает его при установке.
+    """
+
+    def setUp(self):
+        self.root = tempfile.TemporaryDirectory()
+        self.addCleanup(self.root.cleanup)
+        service_worker_script.cache_clear()
+        self.addCleanup(service_worker_script.cache_clear)
+
+    def test_precache_from_collectstatic(self):
+        with override_settings(STATIC_ROOT=self.root.name, LANDING_SW_PRECACHE_MAX_SIZE=200 * 1024):
+            call_command('collectstatic', interactive=False, verbosity=0)
+            with open(os.path.join(self.root.name, PRECACHE_MANIFEST_NAME)) as f:
+                names = json.load(f)['names']
+            response = self.client.get('/sw.js')
+
+        self.assertIn('no-cache', response['Cache-Control'])
+        styles = [name for name in names if name.startswith('landing/css/styles.')]
+        self.assertEqual(len(styles), 1)
+        self.assertRegex(styles[0], r'\.[0-9a-f]{12}\.css$')
+        self.assertIn(f'/static/{styles[0]}', response.content.decode())
+        # крупные изображения и файлы админки не загружаются заранее
+        self.assertFalse([name for name in names if '/1.' in name or name.startswith('admin/')])
+
+
+class MemoryProfilingTests(SimpleTestCase):
+    """
+    tracemalloc включается только на выборочные запросы, сводка по вьюхам уходит в лог; воркер сверх бюджета RSS
+    перезапускается.
+    """
+
+    @override_settings(LANDING_TRACEMALLOC=True, LANDING_TRACEMALLOC_EVERY=2, LANDING_MEMORY_REPORT_INTERVAL=0)
+    def test_sampled_requests_reported(self):
+        with self.assertLogs('landing.memory', 'INFO') as logs:
+            for _ in range(3):
+                self.client.get('/sw.js')
+                self.assertFalse(tracemalloc.is_tracing())
+        # замерены первый и третий запросы, второй в сводку не попал
+        self.assertEqual(len(logs.output), 2)
+        self.assertIn('service-worker: замерено запросов 1', logs.output[0])
+
+    @override_settings(LANDING_TRACEMALLOC=True, LANDING_TRACEMALLOC_EVERY=1000, LANDING_MEMORY_REPORT_INTERVAL=3600)
+    def test_sampling_counters_bounded_by_views(self):
+        from .middleware import MemoryProfileMiddleware
+
+        middleware = MemoryProfileMiddleware(lambda request: HttpResponse())
+        for n in range(50):
+            middleware(RequestFactory().get(f'/media/photos/{n}.jpg'))
+            middleware(RequestFactory().get(f'/no-such-page-{n}/'))
+        self.assertEqual(set(middleware.profiler.counts), {'media', '-'})
+
+    def test_worker_over_budget_recycled(self):
+        worker = mock.Mock(alive=True)
+        with override_settings(LANDING_WORKER_MAX_RSS_MB=100_000):
+            recycle_gunicorn_worker(worker)
+        self.assertTrue(worker.alive)
+        with override_settings(LANDING_WORKER_MAX_RSS_MB=1), self.assertLogs('landing.memory', 'WARNING'):
+            recycle_gunicorn_worker(worker)
+        self.assertFalse(worker.alive)
+
+
+class MediaServingTests(SimpleTestCase):
+    """
+    Отдача media без DEBUG: диапазоны и условные запросы в FileResponse, заголовки для прокси.
+    """
+    HASHED = 'gallery_images/ab/' + 'ab' * 32 + '.jpg'
+
+    def setUp(self):
+        self.root = tempfile.TemporaryDirectory()
+        self.addCleanup(self.root.cleanup)
+        self.data = bytes(range(256)) * 4
+        for name in (self.HASHED, 'photos/master.jpg'):
+            path = os.path.join(self.root.name, name)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path, 'wb') as f:
+                f.write(self.data)
+        override = override_settings(MEDIA_ROOT=self.root.name, LANDING_MEDIA_ACCEL=None)
+        override.enable()
+        self.addCleanup(override.disable)
+
+    def test_full_and_conditional(self):
+        response = self.client.get('/media/' + self.HASHED)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(b''.join(response.streaming_content), self.data)
+        self.assertIn('immutable', response['Cache-Control'])
+        self.assertEqual(self.client.get('/media/' + self.HASHED, HTTP_IF_NONE_MATCH=response['ETag']).status_code, 304)
+        plain = self.client.get('/media/photos/master.jpg')
+        self.assertNotIn('immutable', plain['Cache-Control'])
+        self.assertEqual(
+            self.client.get('/media/photos/master.jpg', HTTP_IF_MODIFIED_SINCE=plain['Last-Modified']).status_code, 304,
+        )
+
+    def test_range(self):
+        response = self.client.get('/media/photos/master.jpg', HTTP_RANGE='bytes=100-199')
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(response['Content-Range'], f'bytes 100-199/{len(self.data)}')
+        self.assertEqual(b''.join(response.streaming_content), self.data[100:200])
+        response = self.client.get('/media/photos/master.jpg', HTTP_RANGE='bytes=-10')
+        self.assertEqual(b''.join(response.streaming_content), self.data[-10:])
+        response = self.client.get('/media/photos/master.jpg', HTTP_RANGE=f'bytes={len(self.data)}-')
+        self.assertEqual(response.status_code, 416)
+        response = self.client.get('/media/photos/master.jpg', HTTP_RANGE='bytes=0-9', HTTP_IF_RANGE='"stale"')
+        self.assertEqual(response.status_code, 200)
+
+    def test_accel_redirect(self):
+        with override_settings(LANDING_MEDIA_ACCEL='nginx', LANDING_MEDIA_ACCEL_PREFIX='/protected-media/'):
+            response = self.client.get('/media/' + self.HASHED)
+        self.assertEqual(response['X-Accel-Redirect'], '/protected-media/' + self.HASHED)
+        self.assertEqual(response.content, b'')
+
+    def test_outside_media_root(self):
+        for url in ('/media/../db.sqlite3', '/media/%2e%2e/manage.py', '/media/photos/.upload-x.part', '/media/photos'):
+            self.assertEqual(self.client.get(url).status_code, 404)
+
+
+class SQLiteCacheTests(SimpleTestCase):
+    """
+    Общий кеш в SQLite: атомарные счётчики между процессами, вытеснение и пересчёт в одном процессе.
+    """
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+        self.location = os.path.join(self.directory.name, 'cache.sqlite3')
+        self.cache = SQLiteCache(self.location, {'OPTIONS': {'MAX_ENTRIES': 50, 'CULL_FREQUENCY': 2}})
+
+    def test_incr_across_processes(self):
+        self.cache.set('counter', 0)
+        pids = []
+        for _ in range(4):
+            pid = os.fork()
+            if pid == 0:
+                for _ in range(100):
+                    SQLiteCache(self.location, {}).incr('counter')
+                os._exit(0)
+            pids.append(pid)
+        for pid in pids:
+            os.waitpid(pid, 0)
+        self.assertEqual(self.cache.get('counter'), 400)
+        with self.assertRaises(ValueError):
+            self.cache.incr('missing')
+
+    @mock.patch('landing.sqlite_cache.ACCESS_RESOLUTION', 0)
+    def test_cull_keeps_recently_read(self):
+        self.cache.set('hot', 'value')
+        for n in range(200):
+            self.cache.set(f'key{n}', n)
+            self.cache.get('hot')
+        self.cache.cull()
+        self.assertEqual(self.cache.get('hot'), 'value')
+        self.assertIsNone(self.cache.get('key0'))
+
+    def test_get_or_compute_serves_stale_while_locked(self):
+        self.assertEqual(self.cache.get_or_compute('section', lambda: 'v1', stamp=1), 'v1')
+        self.assertEqual(self.cache.get_or_compute('section', lambda: 'other', stamp=1), 'v1')
+        # другой процесс пересчитывает новую версию — прежняя отдаётся без ожидания
+        token = self.cache._acquire(self.cache.make_key('section'))
+        self.assertEqual(self.cache.get_or_compute('section', lambda: 'v2', stamp=2), 'v1')
+        self.cache._release(self.cache.make_key('section'), token)
+        self.assertEqual(self.cache.get_or_compute('section', lambda: 'v2', stamp=2), 'v2')
+
+
+@override_settings(CACHES=TEST_CACHES)
+class ContentAddressedStorageTests(TestCase):
+    """
+    Одинаковые изображения хранятся одним файлом с именем по хешу; dedupe_media переводит на такие имена
+    уже загруженные файлы и сбрасывает кеш секций до удаления исходников.
+    """
+
+    def setUp(self):
+        self.root = temp_media_root(self)
+
+    def test_identical_uploads_share_one_file(self):
+        data = image_bytes()
+        first = GalleryImage.objects.create(title='1', image=SimpleUploadedFile('one.png', data))
+        second = GalleryImage.objects.create(title='2', image=SimpleUploadedFile('two.png', data))
+        other = GalleryImage.objects.create(title='3', image=SimpleUploadedFile('one.png', image_bytes('blue')))
+
+        self.assertTrue(is_hashed_name(first.image.name))
+        self.assertEqual(first.image.name, second.image.name)
+        self.assertNotEqual(first.image.name, other.image.name)
+        files = [name for _, _, names in os.walk(self.root) for name in names]
+        self.assertEqual(len(files), 2)
+
+    def test_dedupe_rewrites_references_and_invalidates_cache(self):
+        data = image_bytes()
+        for name in ('gallery_images/a.png', 'gallery_images/b.png'):
+            write_media(self.root, name, data)
+        GalleryImage.objects.bulk_create([
+            GalleryImage(title='a', image='gallery_images/a.png'),
+            GalleryImage(title='b', image='gallery_images/b.png'),
+        ])
+        version = model_version(GalleryImage)
+
+        call_command('dedupe_media', stdout=StringIO())
+
+        names = set(GalleryImage.objects.values_list('image', flat=True))
+        self.assertEqual(len(names), 1)
+        self.assertTrue(is_hashed_name(names.pop()))
+        self.assertFalse(os.path.exists(os.path.join(self.root, 'gallery_images/a.png')))
+        self.assertNotEqual(model_version(GalleryImage), version)
+
+
+class MediaGarbageCollectorTests(TestCase):
+    """
+    Файлы без ссылок из БД попадают в карантин и удаляются после grace-периода,
+    файл, на который снова сослались, возвращается; свежие файлы и незавершённые загрузки не трогаются.
+    """
+    GRACE = 3600
+
+    def setUp(self):
+        self.root = temp_media_root(self)
+        quarantine = tempfile.TemporaryDirectory()
+        self.addCleanup(quarantine.cleanup)
+        self.quarantine = quarantine.name
+        override = override_settings(LANDING_MEDIA_QUARANTINE_ROOT=self.quarantine)
+        override.enable()
+        self.addCleanup(override.disable)
+        self.now = time.time()
+
+    def collect(self, hours_later):
+        return collect_garbage(grace_seconds=self.GRACE, now=self.now + hours_later * self.GRACE)
+
+    def test_quarantine_then_delete(self):
+        write_media(self.root, 'gallery_images/orphan.png', b'orphan')
+        write_media(self.root, 'gallery_images/used.png', b'used')
+        upload = write_media(self.root, 'gallery_images/.upload-x.part', b'partial')
+        GalleryImage.objects.bulk_create([GalleryImage(title='used', image='gallery_images/used.png')])
+
+        # загрузка всё ещё пишется
+        os.utime(upload, (self.now + 2 * self.GRACE, self.now + 2 * self.GRACE))
+
+        self.assertEqual(collect_garbage(grace_seconds=self.GRACE, now=self.now).quarantined, 0)
+        report = self.collect(2)
+        self.assertEqual((report.quarantined, report.referenced, report.deleted), (1, 1, 0))
+        self.assertTrue(os.path.exists(os.path.join(self.quarantine, 'gallery_images/orphan.png')))
+        self.assertTrue(os.path.exists(os.path.join(self.root, 'gallery_images/used.png')))
+        self.assertTrue(os.path.exists(upload))
+
+        # в карантине файл лежит grace-период с момента переноса
+        self.assertEqual(self.collect(2.5).deleted, 0)
+        report = self.collect(4)
+        self.assertEqual(report.deleted, 2)
+        self.assertFalse(os.path.exists(os.path.join(self.quarantine, 'gallery_images/orphan.png')))
+        self.assertFalse(os.path.exists(upload))
+
+    def test_restore_referenced_again(self):
+        write_media(self.root, 'photos/master.png', b'photo')
+        self.collect(2)
+        GalleryImage.objects.bulk_create([GalleryImage(title='back', image='photos/master.png')])
+        report = self.collect(2.5)
+        self.assertEqual(report.restored, 1)
+        self.assertTrue(os.path.exists(os.path.join(self.root, 'photos/master.png')))
+        self.assertFalse(os.path.exists(os.path.join(self.quarantine, 'photos/master.png')))
+
+
+@override_settings(CACHES=TEST_CACHES)
+class ImageMetadataTests(TestCase):
+    """
+    Размеры нового изображения записываются при сохранении, остальные метаданные — фоновой задачей;
+    загрузка модели из БД файлы не открывает.
+    """
+
+    def setUp(self):
+        self.root = temp_media_root(self)
+
+    def test_upload_fills_dimensions_then_task_fills_the_rest(self):
+        image = GalleryImage.objects.create(title='wide', image=SimpleUploadedFile('w.png', image_bytes(size=(40, 20))))
+        image.refresh_from_db()
+        self.assertEqual((image.image_width, image.image_height), (40, 20))
+        self.assertEqual(image.image_placeholder, '')
+        self.assertTrue(Task.objects.filter(name=fill_image_metadata.name).exists())
+
+        fill_image_metadata(model='landing.GalleryImage', pk=image.pk, field_name='image')
+        image.refresh_from_db()
+        self.assertEqual(image.image_color, '#ff0000')
+        self.assertTrue(image.image_placeholder.startswith('data:image/'))
+        self.assertGreater(image.image_bytes, 0)
+
+    def test_loading_rows_does_not_open_files(self):
+        GalleryImage.objects.bulk_create([GalleryImage(title='missing', image='gallery_images/missing.png')])
+        with mock.patch.object(media_storage, 'open') as storage_open:
+            self.assertEqual(len(list(GalleryImage.objects.all())), 1)
+        storage_open.assert_not_called()
+
+    def test_backfill_invalidates_cache(self):
+        write_media(self.root, 'gallery_images/old.png', image_bytes(size=(30, 10)))
+        GalleryImage.objects.bulk_create([GalleryImage(title='old', image='gallery_images/old.png')])
+        version = model_version(GalleryImage)
+
+        call_command('backfill_image_metadata', workers=1, stdout=StringIO())
+
+        image = GalleryImage.objects.get()
+        self.assertEqual((image.image_width, image.image_height), (30, 10))
+        self.assertNotEqual(image.image_placeholder, '')
+        self.assertNotEqual(model_version(GalleryImage), version)
+
+
+@override_settings(CACHES=TEST_CACHES, LANDING_IMAGE_MAX_EDGE=16)
+class ImageNormalizationTests(TestCase):
+    """
+    Загруженные изображения уменьшаются до LANDING_IMAGE_MAX_EDGE и поворачиваются по EXIF;
+    слишком большие файлы отклоняются валидацией до декодирования.
+    """
+
+    def setUp(self):
+        temp_media_root(self)
+
+    def upload(self, data, name='photo.jpg'):
+        image = GalleryImage.objects.create(title=name, image=SimpleUploadedFile(name, data))
+        image.refresh_from_db()
+        return image
+
+    def test_downscaled_to_max_edge(self):
+        image = self.upload(image_bytes(size=(64, 32), image_format='JPEG'))
+        self.assertEqual((image.image_width, image.image_height), (16, 8))
+        self.assertTrue(image.image.name.endswith('.jpg'))
+
+    def test_exif_orientation_applied_and_stripped(self):
+        from PIL import Image
+
+        buffer = BytesIO()
+        exif = Image.Exif()
+        exif[0x0112] = 6  # повернуть на 90° по часовой стрелке
+        Image.new('RGB', (12, 6), 'green').save(buffer, 'JPEG', exif=exif)
+        image = self.upload(buffer.getvalue())
+        self.assertEqual((image.image_width, image.image_height), (6, 12))
+        with image.image.open('rb') as fh, Image.open(fh) as stored:
+            self.assertNotIn(0x0112, stored.getexif())
+
+    @override_settings(LANDING_IMAGE_MAX_PIXELS=100)
+    def test_too_many_pixels_rejected(self):
+        image = GalleryImage(title='big', image=SimpleUploadedFile('big.png', image_bytes(size=(20, 20))))
+        with self.assertRaises(ValidationError):
+            image.full_clean()
+
+
+@override_settings(CACHES=TEST_CACHES)
+class SectionCacheTests(TestCase):
+    """
+    Фрагменты секций берутся из кеша, пока не изменились их модели или релиз;
+    версия модели увеличивается только после коммита изменения.
+    """
+
+    def render_index(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get('/')
+            html = b''.join(response.streaming_content) if response.streaming else response.content
+        return html.decode(), len(queries)
+
+    def test_cached_until_data_changes(self):
+        _, cold = self.render_index()
+        _, warm = self.render_index()
+        self.assertLess(warm, cold)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Review.objects.create(name='Анна', email='anna@example.com', review='Отличная стрижка', is_public=True)
+        html, _ = self.render_index()
+        self.assertIn('Отличная стрижка', html)
+
+    def test_version_bumped_after_commit(self):
+        version = model_version(Service)
+        with self.captureOnCommitCallbacks() as callbacks:
+            Service.objects.create(name='Бритьё')
+            self.assertEqual(model_version(Service), version)
+        for callback in callbacks:
+            callback()
+        self.assertNotEqual(model_version(Service), version)
+
+    def test_release_in_section_versions(self):
+        release_stamp.cache_clear()
+        self.addCleanup(release_stamp.cache_clear)
+        with override_settings(LANDING_RELEASE='r1'):
+            first = section_versions()
+        release_stamp.cache_clear()
+        with override_settings(LANDING_RELEASE='r2'):
+            second = section_versions()
+        self.assertTrue(first['partners'].startswith('r1'))
+        self.assertNotEqual(first['services'], second['services'])
+
+
+@override_settings(CACHES=TEST_CACHES)
+class PrerenderTests(TestCase):
+    """
+    Пререндер пишет главную без CSRF-токена и JSON секций; изменения в админке ставят одну задачу перегенерации.
+    """
+
+    def setUp(self):
+        root = tempfile.TemporaryDirectory()
+        self.addCleanup(root.cleanup)
+        self.root = root.name
+
+    def test_writes_index_and_sections(self):
+        Service.objects.create(name='Стрижка')
+        written = prerender_landing(self.root)
+        self.assertEqual(
+            sorted(os.path.basename(path) for path in written),
+            ['address.json', 'branches.json', 'index.html', 'masters.json', 'reviews.json', 'services.json'],
+        )
+        with open(os.path.join(self.root, 'index.html'), encoding='utf-8') as f:
+            html = f.read()
+        self.assertNotIn('csrfmiddlewaretoken" value="', html)
+        with open(os.path.join(self.root, 'services.json'), encoding='utf-8') as f:
+            self.assertEqual(json.load(f)[0]['name'], 'Стрижка')
+        self.assertFalse([name for name in os.listdir(self.root) if name.startswith('.prerender-')])
+
+    def sqlite_caches(self):
+        location = os.path.join(self.root, 'cache.sqlite3')
+        backend = {'BACKEND': 'landing.sqlite_cache.SQLiteCache', 'LOCATION': location,
+                   'OPTIONS': {'LOCK_TIMEOUT': 0.2}}
+        return override_settings(CACHES={'default': backend, 'ratelimit': backend})
+
+    def test_section_locked_by_another_process(self):
+        with self.sqlite_caches():
+            with self.captureOnCommitCallbacks(execute=True):
+                service = Service.objects.create(name='Стрижка')
+            self.assertIn('Стрижка', render_index())
+            with self.captureOnCommitCallbacks(execute=True):
+                service.name = 'Королевское бритьё'
+                service.save()
+            # воркер сайта пересчитывает секцию услуг и держит блокировку — пререндер ждёт нового фрагмента
+            default = caches['default']
+            default._acquire(default.make_key(f'{SECTION_KEY_PREFIX}services'))
+            html = render_index()
+        self.assertIn('Королевское бритьё', html)
+        self.assertNotIn('<h3>Стрижка</h3>', html)
+
+    def test_changes_schedule_one_task(self):
+        with override_settings(LANDING_PRERENDER_ROOT=self.root), self.captureOnCommitCallbacks(execute=True):
+            Service.objects.create(name='Стрижка')
+            Service.objects.create(name='Бритьё')
+            # задача ставится только после коммита
+            self.assertFalse(Task.objects.exists())
+        self.assertEqual(Task.objects.filter(name='landing.tasks.prerender_landing').count(), 1)
+
+    def run_prerender_task(self):
+        with mock.patch.object(connection, 'close'):
+            for pk in claim_tasks(10, 'w'):
+                self.assertTrue(execute_task(pk))
+
+    def test_task_writes_content_of_new_version(self):
+        with self.sqlite_caches(), override_settings(LANDING_PRERENDER_ROOT=self.root):
+            with self.captureOnCommitCallbacks(execute=True):
+                service = Service.objects.create(name='Стрижка')
+            self.run_prerender_task()
+
+            version = model_version(Service)
+            with self.captureOnCommitCallbacks(execute=True):
+                service.name = 'Королевское бритьё'
+                service.save()
+            # к моменту, когда задачу можно взять, версия уже новая
+            self.assertNotEqual(model_version(Service), version)
+            default = caches['default']
+            default._acquire(default.make_key(f'{SECTION_KEY_PREFIX}services'))
+            self.run_prerender_task()
+
+        with open(os.path.join(self.root, 'index.html'), encoding='utf-8') as f:
+            html = f.read()
+        self.assertTrue('<h3>Королевское бритьё</h3>' in html and '<h3>Стрижка</h3>' not in html)
+
+
+@task(name='landing.tests.failing', max_attempts=2)
+def failing_task(n):
+    raise RuntimeError(f'сбой {n}')
+
+
+@task(name='landing.tests.unique', unique=True)
+def unique_task(n):
+    raise RuntimeError('повтор')
+
+
+@task(name='landing.tests.ok')
+def ok_task(n):
+    return n
+
+
+class TaskQueueTests(TestCase):
+    """
+    Захват задач воркером, повтор с задержкой, уникальность ожидающих задач и удалённые строки.
+    """
+
+    def setUp(self):
+        # execute_task закрывает соединение потока пула; в тесте это соединение транзакции теста
+        patcher = mock.patch.object(connection, 'close')
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_claim(self):
+        first, second = failing_task.delay(n=1), failing_task.delay(n=2)
+        Task.objects.filter(pk=second.pk).update(run_at=timezone.now() + timedelta(hours=1))
+        self.assertEqual(claim_tasks(10, 'w1'), [first.pk])
+        self.assertEqual(claim_tasks(10, 'w2'), [])
+        first.refresh_from_db()
+        self.assertEqual((first.status, first.attempts, first.locked_by), (Task.STATUS_RUNNING, 1, 'w1'))
+
+    def test_retry_then_fail(self):
+        row = failing_task.delay(n=1)
+        claim_tasks(1, 'w')
+        with self.assertLogs('landing.taskqueue', 'WARNING'):
+            self.assertFalse(execute_task(row.pk))
+        row.refresh_from_db()
+        self.assertEqual(row.status, Task.STATUS_PENDING)
+        self.assertGreater(row.run_at, timezone.now())
+        self.assertIn('сбой 1', row.last_error)
+
+        Task.objects.filter(pk=row.pk).update(run_at=timezone.now())
+        claim_tasks(1, 'w')
+        with self.assertLogs('landing.taskqueue', 'WARNING'):
+            execute_task(row.pk)
+        row.refresh_from_db()
+        self.assertEqual((row.status, row.attempts), (Task.STATUS_FAILED, 2))
+
+    def test_unique_pending(self):
+        row = unique_task.delay(n=1)
+        self.assertIsNone(unique_task.delay(n=1))
+        self.assertIsNotNone(unique_task.delay(n=2))
+        # выполняющаяся задача не мешает поставить новую: данные могли измениться после её старта
+        Task.objects.filter(pk=row.pk).update(status=Task.STATUS_RUNNING, attempts=1, locked_at=timezone.now())
+        self.assertIsNotNone(unique_task.delay(n=1))
+        self.assertEqual(Task.objects.filter(status=Task.STATUS_PENDING).count(), 2)
+
+        # повтор упавшей копии не дублирует ожидающую
+        with self.assertLogs('landing.taskqueue', 'WARNING'):
+            execute_task(row.pk)
+        row.refresh_from_db()
+        self.assertEqual(row.status, Task.STATUS_DONE)
+        self.assertEqual(Task.objects.filter(status=Task.STATUS_PENDING).count(), 2)
+
+    @override_settings(LANDING_TASKS_KEEP_DONE_HOURS=24)
+    def test_purge_counts_from_completion(self):
+        # задача ждала в очереди дольше срока хранения, но выполнена только что
+        row = ok_task.delay(n=1)
+        Task.objects.filter(pk=row.pk).update(updated_at=timezone.now() - timedelta(days=2))
+        claim_tasks(1, 'w')
+        self.assertTrue(execute_task(row.pk))
+        self.assertEqual(purge_finished_tasks(), 0)
+
+        Task.objects.filter(pk=row.pk).update(updated_at=timezone.now() - timedelta(hours=25))
+        self.assertEqual(purge_finished_tasks(), 1)
+
+    @override_settings(LANDING_TASKS_LOCK_TIMEOUT=0)
+    def test_release_stale_and_deleted_rows(self):
+        row = unique_task.delay(n=1)
+        claim_tasks(1, 'w')
+        self.assertEqual(release_stale_tasks(), 1)
+        self.assertEqual(Task.objects.get(pk=row.pk).status, Task.STATUS_PENDING)
+
+        Task.objects.filter(pk=row.pk).delete()
+        with self.assertLogs('landing.taskqueue', 'WARNING'):
+            self.assertFalse(execute_task(row.pk))
+
+
+@override_settings(CACHES=TEST_CACHES)
+class WarmupTests(TestCase):
+    """
+    После прогрева главная страница не обращается к БД за секциями; команда сообщает об ошибке шага
+    и создаёт файл готовности только после успешного прогрева.
+    """
+
+    def test_index_served_from_warm_cache(self):
+        Service.objects.create(name='Стрижка')
+        warm_index()
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get('/')
+            b''.join(response.streaming_content) if response.streaming else response.content
+        self.assertFalse([query for query in queries if 'landing_service' in query['sql']])
+
+    def test_ready_file(self):
+        root = tempfile.TemporaryDirectory()
+        self.addCleanup(root.cleanup)
+        ready = os.path.join(root.name, 'ready')
+
+        call_command('warm_landing', steps=['versions'], ready_file=ready, stdout=StringIO())
+        self.assertTrue(os.path.exists(ready))
+
+        def broken():
+            raise OSError('диск недоступен')
+
+        with mock.patch.dict(STEPS, {'broken': broken}), self.assertRaises(CommandError):
+            call_command('warm_landing', steps=['versions', 'broken'], ready_file=ready,
+                         stdout=StringIO(), stderr=StringIO())
+        self.assertFalse(os.path.exists(ready))
+
+    def test_missing_media_is_a_warning(self):
+        root = temp_media_root(self)
+        write_media(root, 'gallery_images/a.png', image_bytes())
+        ready = os.path.join(root, 'ready')
+        # шаги идут в потоках со своими соединениями, которым не видны данные транзакции теста
+        names = mock.patch('landing.media_gc.referenced_names',
+                           return_value={'gallery_images/a.png', 'gallery_images/missing.png'})
+
+        stderr = StringIO()
+        with names:
+            call_command('warm_landing', steps=['media'], ready_file=ready, stdout=StringIO(), stderr=stderr)
+        self.assertTrue(os.path.exists(ready))
+        self.assertIn('не найдено файлов: 1 из 2 (gallery_images/missing.png)', stderr.getvalue())
+
+        with names, self.assertRaises(CommandError):
+            call_command('warm_landing', steps=['media'], ready_file=ready, strict=True,
+                         stdout=StringIO(), stderr=StringIO())
+        self.assertFalse(os.path.exists(ready))
+
+
+@override_settings(CACHES=TEST_CACHES)
+class SearchTests(TestCase):
+    """
+    Поиск находит другие формы слова и недописанные слова, а запрос с синтаксисом FTS не приводит к ошибке.
+    """
+
+    def setUp(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            haircut = Service.objects.create(name='Стрижка', description='Мужские и детские стрижки')
+            Service.objects.create(name='Оформление бороды')
+            haircut.price_items.create(operation_name='Стрижка машинкой', price=900)
+
+    def titles(self, query):
+        response = self.client.get(reverse('search'), {'q': query})
+        self.assertEqual(response.status_code, 200)
+        return [item['title'] for group in response.json()['results'] for item in group['items']]
+
+    def test_word_forms_and_prefix(self):
+        self.assertIn('Стрижка', self.titles('стрижки'))
+        self.assertIn('Стрижка машинкой', self.titles('стриж машинк'))
+        self.assertEqual(self.titles('бород'), ['Оформление бороды'])
+        self.assertEqual(self.titles('детской'), ['Стрижка'])
+
+    def test_index_backend_matches_fallback(self):
+        from .search import _backend
+
+        self.assertEqual(_backend(), 'sqlite')
+        with mock.patch('landing.search._backend', return_value='like'):
+            self.assertEqual(self.titles('бороды'), ['Оформление бороды'])
+
+    def test_query_syntax_is_not_interpreted(self):
+        for query in ['"стрижка', 'NEAR(', '-', 'AND OR', 'стрижка*)', "бороды' OR 1=1 --", 'title_terms:стриж']:
+            with self.subTest(query=query):
+                self.titles(query)
+        self.assertEqual(self.titles('"бороды" NOT'), [])
+
+
+@override_settings(CACHES=TEST_CACHES)
+class NearestBranchTests(TestCase):
+    """
+    Ближайшие филиалы совпадают с перебором по расстоянию (в том числе у 180-го меридиана),
+    а дерево пересобирается после изменения адресов.
+    """
+
+    def test_tree_matches_brute_force(self):
+        points = [(lat, lon) for lat in range(-80, 90, 20) for lon in range(-175, 180, 25)]
+        tree = KDTree([(to_unit_vector(lat, lon), (lat, lon)) for lat, lon in points])
+        for query in [(55.75, 37.61), (0.0, 179.9), (-33.9, -179.0), (89.0, 0.0)]:
+            origin = to_unit_vector(*query)
+            expected = sorted(points, key=lambda point: math.dist(origin, to_unit_vector(*point)))[:3]
+            self.assertEqual([value for _, value in tree.nearest(origin, k=3)], expected)
+        self.assertAlmostEqual(chord_to_km(math.dist(to_unit_vector(0, 179.5), to_unit_vector(0, -179.5))),
+                               111.2, places=1)
+
+    def test_endpoint(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            moscow = Address.objects.create(name='Москва', address='Тверская, 1', latitude=55.76, longitude=37.61)
+            Address.objects.create(name='Казань', address='Баумана, 1', latitude=55.79, longitude=49.12)
+            Master.objects.create(name='Иван', branch=moscow)
+        url = reverse('nearest-branch')
+
+        response = self.client.get(url, {'lat': 55.75, 'lon': 37.6, 'limit': 5})
+        branches = response.json()['branches']
+        self.assertEqual([branch['name'] for branch in branches], ['Москва', 'Казань'])
+        self.assertLess(branches[0]['distance_km'], 2)
+        self.assertEqual([master['name'] for master in branches[0]['masters']], ['Иван'])
+        self.assertEqual(branches[1]['masters'], [])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Address.objects.create(name='Химки', address='Ленинградская, 1', latitude=55.75, longitude=37.6)
+        self.assertEqual(self.client.get(url, {'lat': 55.75, 'lon': 37.6}).json()['branches'][0]['name'], 'Химки')
+
+        for params in [{}, {'lat': 91, 'lon': 0}, {'lat': 'nan', 'lon': 0}, {'lat': 0, 'lon': 'inf'}]:
+            with self.subTest(params=params):
+                self.assertEqual(self.client.get(url, params).status_code, 400)
+
+
+class ExportTests(TestCase):
+    """
+    Выгрузка отзывов: ячейки-формулы экранируются в CSV (но не в JSON Lines), BOM есть только в CSV для браузера.
+    """
+
+    def setUp(self):
+        Review.objects.create(name='=HYPERLINK("http://evil.example")', email='a@example.com',
+                              review='-1+1', rating=5, is_public=True)
+        Review.objects.create(name='@Иван', email='b@example.com', review='Отличная стрижка', rating=4)
+
+    def export(self, *args):
+        stdout = StringIO()
+        call_command('export_reviews', *args, stdout=stdout)
+        return stdout.getvalue()
+
+    def test_csv_escapes_formulas(self):
+        rows = list(csv.reader(StringIO(self.export())))
+        self.assertEqual(rows[0], list(REVIEW_FIELDS))
+        self.assertEqual([(row[1], row[6]) for row in rows[1:]], [
+            ('\'=HYPERLINK("http://evil.example")', "'-1+1"),
+            ("'@Иван", 'Отличная стрижка'),
+        ])
+        self.assertEqual([row[3] for row in rows[1:]], ['5', '4'])
+
+        rows = list(csv.reader(StringIO(self.export('--public', '--rating', '5'))))
+        self.assertEqual(len(rows), 2)
+
+    def test_jsonl_keeps_values(self):
+        lines = [json.loads(line) for line in self.export('--format', 'jsonl').splitlines()]
+        self.assertEqual([line['name'] for line in lines], ['=HYPERLINK("http://evil.example")', '@Иван'])
+
+    def test_streaming_response(self):
+        response = streaming_response('reviews', 'csv', REVIEW_FIELDS, review_rows())
+        body = b''.join(response.streaming_content).decode('utf-8')
+        self.assertTrue(body.startswith('\ufeffid,name'))
+        self.assertEqual(response['Content-Disposition'], 'attachment; filename="reviews.csv"')
+
+        response = streaming_response('reviews', 'jsonl', REVIEW_FIELDS, review_rows())
+        body = b''.join(response.streaming_content).decode('utf-8')
+        self.assertEqual(len(body.splitlines()), 2)
+        self.assertTrue(body.startswith('{"id":'))
+
+
+@override_settings(CACHES=TEST_CACHES)
+class ModerationTests(TestCase):
+    """
+    Очередь модерации листается курсором без пропусков и повторов, даже когда отзывы уходят из неё;
+    публикация и отклонение сбрасывают версию отзывов после коммита.
+    """
+
+    def setUp(self):
+        self.reviews = [
+            Review.objects.create(name=f'Клиент {i}', email=f'client{i}@example.com', review='Хорошо', rating=5)
+            for i in range(7)
+        ]
+        # одинаковое время создания у части отзывов — порядок внутри него задаёт id
+        Review.objects.filter(pk__in=[r.pk for r in self.reviews[2:5]]).update(created_at=self.reviews[2].created_at)
+
+    def test_cursor_pages(self):
+        seen, after = [], None
+        while True:
+            page, after = queue_page(after, limit=2)
+            seen.extend(review.pk for review in page)
+            # модератор публикует страницу — она уходит из очереди, курсор при этом не сбивается
+            publish_reviews(Review.objects.filter(pk__in=[review.pk for review in page]))
+            if after is None:
+                break
+        self.assertEqual(seen, [review.pk for review in self.reviews])
+
+    @mock.patch('landing.moderation.BROADCAST_BATCH_SIZE', 3)
+    def test_publish_whole_queue(self):
+        already = self.reviews[0]
+        Review.objects.filter(pk=already.pk).update(is_public=True)
+        with mock.patch('landing.moderation.broadcast_reviews') as broadcast:
+            with CaptureQueriesContext(connection) as queries, self.captureOnCommitCallbacks(execute=True):
+                self.assertEqual(publish_reviews(Review.objects.all()), 6)
+        update = [query['sql'] for query in queries if query['sql'].startswith('UPDATE')]
+        self.assertEqual(len(update), 1)
+        self.assertNotIn(' IN (', update[0])
+        self.assertEqual([call.args[0] for call in broadcast.call_args_list],
+                         [[r.pk for r in self.reviews[1:4]], [r.pk for r in self.reviews[4:7]]])
+
+    def test_broken_cursor_starts_from_beginning(self):
+        self.assertEqual(queue_page('испорченный_курсор', limit=3), queue_page(None, limit=3))
+
+    def test_publish_and_reject_bump_version_on_commit(self):
+        version = model_version(Review)
+        with mock.patch('landing.moderation.broadcast_reviews') as broadcast:
+            with self.captureOnCommitCallbacks() as callbacks:
+                self.assertEqual(publish_reviews(Review.objects.filter(pk__in=[self.reviews[0].pk])), 1)
+            self.assertEqual(model_version(Review), version)
+            for callback in callbacks:
+                callback()
+        broadcast.assert_called_once_with([self.reviews[0].pk])
+        self.assertNotEqual(model_version(Review), version)
+
+        version = model_version(Review)
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            self.assertEqual(reject_reviews(Review.objects.filter(pk=self.reviews[1].pk)), 1)
+        self.assertEqual(callbacks, [])
+        with self.captureOnCommitCallbacks(execute=True):
+            self.assertEqual(reject_reviews(Review.objects.filter(pk=self.reviews[0].pk)), 1)
+        self.assertNotEqual(model_version(Review), version)
+        self.assertEqual(len(queue_page(limit=100)[0]), 5)
+
+
+class SpamFilterTests(TestCase):
+    """
+    Без обученной модели отзывы не отклоняются автоматически; частота с одного IP учитывается
+    только для внешних адресов, а email на оценку не влияет.
+    """
+
+    def setUp(self):
+        root = tempfile.TemporaryDirectory()
+        self.addCleanup(root.cleanup)
+        self.model_path = os.path.join(root.name, 'spam_model.json')
+        settings = override_settings(LANDING_SPAM_MODEL_PATH=self.model_path, LANDING_SPAM_AUTO_REJECT=0.98)
+        settings.enable()
+        self.addCleanup(settings.disable)
+
+    def review(self, text='Отличная стрижка, спасибо мастеру!', ip_address='95.165.10.20', **fields):
+        return Review.objects.create(name='Клиент', email=f'client{Review.objects.count()}@example.com',
+                                     review=text, rating=5, ip_address=ip_address, **fields)
+
+    def test_untrained_model_does_not_reject(self):
+        review = self.review('Скидки: http://a.example.ru http://b.example.ru http://c.example.ru')
+        self.assertGreater(spam_probability(review), 0.98)
+        with mock.patch('landing.tasks.notify_new_review') as notify:
+            score_review_spam(review_id=review.pk, notify=True)
+        review.refresh_from_db()
+        self.assertIsNone(review.moderated_at)
+        self.assertGreater(review.spam_score, 0.98)
+        notify.delay.assert_called_once_with(review_id=review.pk)
+
+        save_model(NaiveBayes.train(
+            ['купить дешево http://spam.example.ru', 'казино бонус www.spam.example.com',
+             'отличная стрижка', 'хороший мастер, спасибо'] * 3,
+            [True, True, False, False] * 3,
+        ), self.model_path)
+        score_review_spam(review_id=review.pk, notify=True)
+        review.refresh_from_db()
+        self.assertIsNotNone(review.moderated_at)
+        self.assertFalse(review.is_public)
+
+    def test_rate_heuristic(self):
+        first = self.review()
+        self.assertEqual(heuristic_log_odds(first), 0)
+        self.assertGreater(heuristic_log_odds(self.review()), 0)
+        # за прокси все клиенты приходят с одного внутреннего адреса — он не считается
+        self.review(ip_address='127.0.0.1')
+        self.assertEqual(heuristic_log_odds(self.review(ip_address='127.0.0.1')), 0)
+        self.assertEqual(heuristic_log_odds(self.review(ip_address='10.0.0.2')), 0)
+        self.assertEqual(heuristic_log_odds(self.review(ip_address=None)), 0)
+
+
+@override_settings(CACHES=TEST_CACHES)
+class PublicApiTests(TestCase):
+    """
+    Публичное API: ETag и 304 без обращений к ORM, новый ETag после правки, курсорная пагинация,
+    фильтры и только опубликованные отзывы без email.
+    """
+
+    def setUp(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.moscow = Address.objects.create(name='Москва', address='Тверская, 1', latitude=55.76, longitude=37.61)
+            self.kazan = Address.objects.create(name='Казань', address='Баумана, 1', latitude=55.79, longitude=49.12)
+            Master.objects.create(name='Иван', branch=self.moscow)
+            Master.objects.create(name='Пётр', branch=self.kazan)
+            Master.objects.create(name='Анна')
+            for n in range(25):
+                Review.objects.create(name=f'Клиент {n}', email=f'client{n}@example.com', review='Отлично',
+                                      rating=n % 5 + 1, is_public=n % 4 != 0)
+
+    def test_etag_and_not_modified(self):
+        url = reverse('api:master-list')
+        response = self.client.get(url)
+        etag = response['ETag']
+        self.assertEqual(response.status_code, 200)
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(len(queries), 0)
+        self.assertEqual(response['ETag'], etag)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Master.objects.create(name='Олег')
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+        self.assertIn('Олег', [master['name'] for master in response.json()['results']])
+
+    def test_reviews_cursor_pages(self):
+        url, ids = reverse('api:review-list') + '?page_size=7', []
+        while url:
+            page = self.client.get(url).json()
+            for review in page['results']:
+                self.assertNotIn('email', review)
+                ids.append(review['id'])
+            url = page['next']
+        public = Review.objects.filter(is_public=True).order_by('-created_at', '-pk')
+        self.assertEqual(ids, list(public.values_list('pk', flat=True)))
+
+        hidden = Review.objects.filter(is_public=False).first()
+        self.assertEqual(self.client.get(reverse('api:review-detail', args=[hidden.pk])).status_code, 404)
+
+    def test_filters(self):
+        def names(url, **params):
+            return sorted(item['name'] for item in self.client.get(url, params).json()['results'])
+
+        self.assertEqual(names(reverse('api:master-list'), branch=self.moscow.pk), ['Анна', 'Иван'])
+        with self.captureOnCommitCallbacks(execute=True):
+            Service.objects.create(name='Стрижка').branches.add(self.kazan)
+            Service.objects.create(name='Бритьё')
+        self.assertEqual(names(reverse('api:service-list'), branch=self.moscow.pk), ['Бритьё'])
+        self.assertEqual(names(reverse('api:service-list'), branch=self.kazan.pk), ['Бритьё', 'Стрижка'])
+
+        reviews = self.client.get(reverse('api:review-list'), {'rating': 5}).json()['results']
+        self.assertEqual({review['rating'] for review in reviews}, {5})
+        self.assertEqual(len(reviews), Review.objects.filter(is_public=True, rating=5).count())
+        reviews = self.client.get(reverse('api:review-list'), {'min_rating': 4}).json()['results']
+        self.assertEqual(len(reviews), Review.objects.filter(is_public=True, rating__gte=4).count())
+
+
+class LiveFeedTests(SimpleTestCase):
+    """
+    Живая лента: журнал читается с места остановки и через ротацию, события раздаются всем подписчикам,
+    переподключившийся клиент получает пропущенное по Last-Event-ID; под WSGI лента отключена.
+    """
+
+    def setUp(self):
+        root = tempfile.TemporaryDirectory()
+        self.addCleanup(root.cleanup)
+        self.path = os.path.join(root.name, 'events', 'review-events.log')
+
+    def test_reader_across_rotation(self):
+        reader = LogReader(self.path)
+        self.addCleanup(reader.close)
+        self.assertEqual(reader.read(), [])
+        # журнал появился после запуска — читается с начала
+        append_events([{'id': 1}], self.path)
+        self.assertEqual([event['id'] for event in reader.read()], [1])
+
+        with mock.patch('landing.live.LOG_MAX_BYTES', 60):
+            # второе событие ещё дописывается в старый файл, третье — уже в новый
+            append_events([{'id': 2}], self.path)
+            append_events([{'id': 3}], self.path)
+        self.assertTrue(os.path.exists(f'{self.path}.1'))
+        self.assertEqual([event['id'] for event in reader.read()], [2, 3])
+        self.assertEqual(reader.read(), [])
+
+        # недописанная строка ждёт своего конца
+        with open(self.path, 'ab') as log:
+            log.write(b'{"event_id": "x", "id": 4')
+        self.assertEqual(reader.read(), [])
+        with open(self.path, 'ab') as log:
+            log.write(b'}\n')
+        self.assertEqual([event['id'] for event in reader.read()], [4])
+
+    def test_fan_out_and_replay(self):
+        broadcaster = Broadcaster(self.path, poll_interval=0.01)
+
+        async def scenario():
+            first, second = broadcaster.subscribe(), broadcaster.subscribe()
+            await asyncio.sleep(0.05)  # опрос журнала начался, старые события пропущены
+            append_events([{'id': 1}, {'id': 2}, {'id': 3}], self.path)
+            received = [[(await asyncio.wait_for(queue.get(), 1))['id'] for _ in range(3)]
+                        for queue in (first, second)]
+            # клиент переподключился, видев только первое событие
+            replayed = broadcaster.subscribe(broadcaster.history[0]['event_id'])
+            unknown = broadcaster.subscribe('устаревший-id')
+            for queue in (first, second, replayed, unknown):
+                broadcaster.unsubscribe(queue)
+            return received, [replayed.get_nowait()['id'] for _ in range(replayed.qsize())], unknown.qsize()
+
+        received, replayed, unknown = asyncio.run(scenario())
+        self.assertEqual(received, [[1, 2, 3], [1, 2, 3]])
+        self.assertEqual(replayed, [2, 3])
+        self.assertEqual(unknown, 0)
+
+    def test_event_stream(self):
+        broadcaster = Broadcaster(self.path, poll_interval=0.01)
+        broadcaster.history.extend([{'event_id': 'a', 'id': 1}, {'event_id': 'b', 'id': 2, 'name': 'Анна'}])
+
+        async def scenario():
+            stream = event_stream('a')
+            try:
+                return [await stream.__anext__() for _ in range(2)]
+            finally:
+                await stream.aclose()
+
+        with mock.patch('landing.live._broadcaster', broadcaster):
+            chunks = asyncio.run(scenario())
+        self.assertTrue(chunks[0].startswith('retry: '))
+        self.assertEqual(chunks[1], 'id: b\nevent: review\ndata: {"id": 2, "name": "Анна"}\n\n')
+        self.assertFalse(broadcaster.subscribers)
+
+    def test_stream_disabled_under_wsgi(self):
+        self.assertEqual(self.client.get(reverse('reviews:stream')).status_code, 204)
+
+
+@override_settings(CACHES=TEST_CACHES, LANDING_QUERY_REPEAT_THRESHOLD=5)
+class QueryLogTests(TestCase):
+    """
+    Журнал запросов: порог медленного запроса, место вызова в коде landing, план запроса
+    и сводка повторяющихся форм (N+1).
+    """
+
+    def setUp(self):
+        self.worker = QueryLogWorker()
+        # фоновый поток не запускается: очередь разбирается в тесте
+        for patcher in (mock.patch('landing.querylog._worker', self.worker),
+                        mock.patch.object(self.worker, 'start')):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def watch(self, function, slow_seconds):
+        watcher = QueryWatcher(RequestFactory().get('/'), 'default', slow_seconds)
+        with connection.execute_wrapper(watcher):
+            function()
+        watcher.finish()
+        return [self.worker.queue.get_nowait() for _ in range(self.worker.queue.qsize())]
+
+    def test_normalize_sql(self):
+        self.assertEqual(
+            normalize_sql("SELECT * FROM t WHERE id IN (1, 2, 3) AND name = 'O''Brien'"),
+            normalize_sql('SELECT *  FROM t WHERE id IN (%s, %s) AND name = %s'),
+        )
+
+    def test_slow_query_threshold_and_call_site(self):
+        from .views import get_public_reviews
+
+        self.assertEqual(self.watch(get_public_reviews, slow_seconds=10), [])
+        items = self.watch(get_public_reviews, slow_seconds=0)
+        self.assertEqual(len(items), 1)
+        self.assertRegex(items[0]['site'], r'^landing/views\.py:\d+ in get_public_reviews$')
+        with self.assertLogs('landing.queries', 'WARNING') as logs:
+            self.worker.log_slow_query(items[0])
+        self.assertIn('landing_review', logs.output[0])
+        self.assertIn('план:', logs.output[0])
+
+    def test_repeated_shapes_reported(self):
+        def n_plus_one():
+            for n in range(6):
+                Review.objects.filter(pk=n).first()
+            Service.objects.first()
+
+        self.watch(n_plus_one, slow_seconds=None)
+        self.watch(n_plus_one, slow_seconds=None)
+        with self.assertLogs('landing.queries', 'WARNING') as logs:
+            self.worker.report()
+        self.assertIn('форм: 1', logs.output[0])
+        self.assertIn('12 запросов в 2 HTTP-запросах (до 6 за раз)', logs.output[0])
+        self.assertNotIn('landing_service', logs.output[0])
+
+    @override_settings(LANDING_SLOW_QUERY_MS=0)
+    def test_middleware_attributes_view(self):
+        Review.objects.create(name='Клиент', email='client@example.com', review='Отлично', rating=5, is_public=True)
+        self.client.get(reverse('api:review-list'))
+        items = [self.worker.queue.get_nowait() for _ in range(self.worker.queue.qsize())]
+        self.assertTrue(items)
+        self.assertEqual({item['view'] for item in items}, {'api:review-list'})
+        self.assertTrue(all(item['site'].startswith('landing/api.py:') for item in items))
@@ -1,8 +1,10 @@
 from django.urls import path
-from landing.views import reviews_create
+from landing.views import csrf_token, review_stream, reviews_create
 
 app_name = 'reviews'
 
 urlpatterns = [
     path('create/', reviews_create, name='create'),   # страница с слайдером отзывов
+    path('csrf/', csrf_token, name='csrf'),   # CSRF-токен для статической версии главной страницы
+    path('stream/', review_stream, name='stream'),   # живая лента опубликованных отзывов (SSE)
 ]
@@ -1,56 +1,130 @@
-from django.http import JsonResponse
+import math
+
+from django.conf import settings
+from django.core.handlers.asgi import ASGIRequest
+from django.http import Http404, HttpResponse, JsonResponse, StreamingHttpResponse
+from django.middleware.csrf import get_token
 from django.shortcuts import redirect, render
+from django.utils.cache import patch_cache_control
+from django.views.decorators.cache import never_cache
+from django.views.decorators.http import require_GET, require_safe
+from django.views.decorators.csrf import ensure_csrf_cookie
 from django.contrib import messages
+from django.db.models import Q
 from .models import Address, GalleryImage, Master, PriceItem, Review, Service, ServiceSubsection
+from .cache import section_versions
+from .geo import nearest_branches
+from .live import event_stream
+from .payloads import PAYLOAD_SECTIONS, encoded_payload, payload_links, payload_version
+from .ratelimit import client_ip, is_duplicate, take_review_token
+from .search import search
+from .service_worker import service_worker_url
 from .serializers import AddressSerializer, MasterSerializer, ServiceSerializer
+from .streaming import stream_index
+from .tasks import score_review_spam
 
 
-def get_common_context():
-    
+class LazyValue:
     """
-    Функция для сбора общего контекста для страниц index.html
-
-    Возвращает контекст в виде словаря с ключами:
-    - masters: все мастера
-    - images: первые 20 изображений из галереи
-    - reviews: последние 20 публичных отзывов
-    - services: все услуги
-    - address: контактные данные (адрес, телефон, email, ...)
+    Значение контекста, которое вычисляется при первом обращении из шаблона и затем запоминается.
+    Шаблоны Django сами вызывают callable-переменные, поэтому если фрагмент секции
+    взят из кеша, запросы к БД для него не выполняются вовсе.
     """
 
-    # masters_data: все мастера
+    def __init__(self, func):
+        self._func = func
+        self._evaluated = False
+        self._value = None
+
+    def __call__(self):
+        if not self._evaluated:
+            self._value = self._func()
+            self._evaluated = True
+        return self._value
+
+
+def get_masters_data():
+    """ Все мастера вместе с соцсетями """
     masters_queryset = Master.objects.prefetch_related('socials').all()
     master_serializer = MasterSerializer(masters_queryset, many=True, context={'request': None})
-    masters_data = master_serializer.data
+    return master_serializer.data
+
 
-    # images: все изображения галереи (с ограничением для производительности)
-    images = GalleryImage.objects.all()[:20]  # например, первые 20
+def get_gallery_images():
+    """ Изображения галереи (с ограничением для производительности) """
+    return list(GalleryImage.objects.all()[:20])  # например, первые 20
 
-    # reviews: показываем только публичные и последние (например 20)
-    reviews = Review.objects.filter(is_public=True).order_by('-created_at')[:20]
 
-    # Получаем все услуги. ОЧЕНЬ ВАЖНО использовать prefetch_related для оптимизации запросов и избегания проблемы N+1.
+def get_public_reviews():
+    """ Только публичные и последние (например 20) отзывы """
+    return list(Review.objects.filter(is_public=True).order_by('-created_at')[:20])
+
+
+def get_services_data():
+    """ Все услуги с подразделами и прайсами """
+    # ОЧЕНЬ ВАЖНО использовать prefetch_related для оптимизации запросов и избегания проблемы N+1.
     # 'subsections__price_items' - для прайсов, привязанных к подразделам
     # 'price_items' - для прайсов, привязанных напрямую к услуге
     services_queryset = Service.objects.all().prefetch_related(
         'subsections__price_items',
-        'price_items'
+        'price_items',
+        'branches',
     )
     service_serializer = ServiceSerializer(services_queryset, many=True)
-    services_data = service_serializer.data
+    return service_serializer.data
 
-    # Контакты для раздела "Контакты" и карты
+
+def get_address_data():
+    """ Контакты основного (первого) филиала для раздела "Контакты" """
     address_queryset = Address.objects.first()
     address_serializer = AddressSerializer(address_queryset)
-    address_data = address_serializer.data
+    return address_serializer.data
+
 
-    # Собираем контекст в словарь
+# Поля филиала в компактном представлении для карты: один список полей и строки значений без повторения ключей
+BRANCH_FIELDS = ('id', 'name', 'address', 'phone', 'opening_hours', 'lat', 'lon')
+
+
+def get_branches_data():
+    """ Все филиалы для карты в компактном виде: {"fields": [...], "rows": [[...], ...]} """
+    rows = [
+        [branch.id, branch.name, branch.address, branch.phone, branch.opening_hours,
+         round(branch.latitude, 6), round(branch.longitude, 6)]
+        for branch in Address.objects.order_by('pk')
+    ]
+    return {"fields": BRANCH_FIELDS, "rows": rows}
+
+
+def get_common_context():
+    
+    """
+    Функция для сбора общего контекста для страниц index.html
+
+    Возвращает контекст в виде словаря с ключами:
+    - masters: все мастера
+    - images: первые 20 изображений из галереи
+    - reviews: последние 20 публичных отзывов
+    - services: все услуги
+    - address: контактные данные основного филиала (адрес, телефон, email, ...)
+    - branches: все филиалы для карты (компактный формат, см. get_branches_data)
+    - section_versions: версии данных секций для ключей кеша фрагментов
+    - payloads: адреса и версии данных услуг и мастеров для клиентского кеша (landing/payloads.py)
+    - service_worker_url: адрес service worker или пустая строка (LANDING_SERVICE_WORKER)
+
+    Данные секций вычисляются лениво (LazyValue): только если фрагмент секции не найден в кеше.
+    """
+    versions = section_versions()
     context = {
-        'masters': masters_data,
-        'images': images,
-        'reviews': reviews,
-        'services': services_data,
-        'address': address_data
+        'masters': LazyValue(get_masters_data),
+        'images': LazyValue(get_gallery_images),
+        'reviews': LazyValue(get_public_reviews),
+        'services': LazyValue(get_services_data),
+        'address': LazyValue(get_address_data),
+        'branches': LazyValue(get_branches_data),
+        'section_versions': versions,
+        'payloads': payload_links(versions),
+        'service_worker_url': service_worker_url(),
+        'section_cache_timeout': settings.LANDING_SECTION_CACHE_TIMEOUT,
     }
 
     return context
@@ -59,11 +133,52 @@ def index(request):
     
     """
     Возвращает главную страницу index.html с контекстом, полученным из функции get_common_context.
+    При LANDING_STREAM_INDEX страница отдаётся потоком: сначала <head> и шапка, затем секции (landing/streaming.py).
     """
     context = get_common_context()
 
+    if getattr(settings, 'LANDING_STREAM_INDEX', False):
+        return stream_index(request, context)
     return render(request, 'landing/index.html', context)
 
+@require_safe
+def section_payload(request, name, version):
+    """
+    Данные секции для клиентского кеша: /data/services.<версия>.json.
+    Ответ по адресу с текущей версией не меняется никогда и кешируется навсегда;
+    устаревшая версия перенаправляется на текущую.
+    """
+    if name not in PAYLOAD_SECTIONS:
+        raise Http404
+    current = payload_version(name)
+    if version != current:
+        response = redirect('payload', name, current)
+        patch_cache_control(response, no_cache=True)
+        return response
+
+    etag = f'"{current}"'
+    if etag in request.headers.get('If-None-Match', ''):
+        response = HttpResponse(status=304)
+    else:
+        response = HttpResponse(encoded_payload(name, current), content_type='application/json')
+    response['ETag'] = etag
+    patch_cache_control(response, public=True, max_age=60 * 60 * 24 * 365, immutable=True)
+    return response
+
+def _review_rejected(request, error_msg, status, retry_after=None):
+    """
+    Ответ на отклонённый без записи в БД отзыв: JSON с кодом status для AJAX, PRG с сообщением — для формы.
+    """
+    if request.headers.get('x-requested-with') == 'XMLHttpRequest':
+        response = JsonResponse({"success": False, "error": error_msg}, status=status)
+    else:
+        messages.error(request, error_msg)
+        response = redirect('reviews:create')
+    if retry_after:
+        response['Retry-After'] = str(retry_after)
+    return response
+
+
 def reviews_create(request):
 
     """
@@ -72,6 +187,12 @@ def reviews_create(request):
     Если это не AJAX-запрос — возвращаем классический PRG с сообщением об успехе или ошибке.
     """
     if request.method == "POST":
+        # Лимиты и дубликаты проверяются по кешу — отклонённый запрос не обращается к БД
+        ip_address = client_ip(request)
+        retry_after = take_review_token(ip_address=ip_address)
+        if retry_after:
+            return _review_rejected(request, "Слишком много отзывов. Попробуйте позже.", 429, retry_after)
+
         name = request.POST.get('name', '').strip()
         email = request.POST.get('email', '').strip()
         review = request.POST.get('review', '').strip()
@@ -83,13 +204,22 @@ def reviews_create(request):
         is_valid = bool(name and review and 1 <= rating <= 5)
 
         if is_valid:
+            retry_after = take_review_token(email=email)
+            if retry_after:
+                return _review_rejected(request, "Слишком много отзывов. Попробуйте позже.", 429, retry_after)
+            if is_duplicate(name, email, review):
+                return _review_rejected(request, "Такой отзыв уже отправлен.", 409)
+
             # создаём запись в БД
             rev = Review.objects.create(
                 name=name,
                 email=email,
                 review=review,
                 rating=rating,
+                ip_address=ip_address,
             )
+            # спам-фильтр и уведомление менеджерам выполнит воркер фоновых задач, а не этот запрос
+            score_review_spam.delay(review_id=rev.id, notify=True)
 
             if request.headers.get('x-requested-with') == 'XMLHttpRequest':
                 return JsonResponse({
@@ -112,3 +242,100 @@ def reviews_create(request):
             messages.error(request, error_msg)
 
     return render(request, "landing/reviews.html")
+
+
+async def review_stream(request):
+
+    """
+    Живая лента опубликованных отзывов (Server-Sent Events), см. landing/live.py.
+    Работает только под ASGI-сервером; под WSGI отвечает 204, и браузер не переподключается.
+    """
+    if not isinstance(request, ASGIRequest):
+        return HttpResponse(status=204)
+    response = StreamingHttpResponse(
+        event_stream(request.headers.get('Last-Event-ID')),
+        content_type='text/event-stream; charset=utf-8',
+    )
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'
+    return response
+
+
+@never_cache
+@ensure_csrf_cookie
+def csrf_token(request):
+
+    """
+    Отдаёт CSRF-токен для формы отзыва.
+    Нужен статической (пререндеренной) главной странице, в HTML которой токена нет.
+    """
+    return JsonResponse({"csrfToken": get_token(request)})
+
+
+@require_GET
+def search_services(request):
+    """
+    Поиск по услугам и прайсу для подсказок при вводе: /search/?q=детская стриж
+    Возвращает найденные услуги, подразделы и позиции прайса, сгруппированные по услугам.
+    """
+    query = request.GET.get('q', '').strip()[:100]
+    try:
+        limit = min(max(int(request.GET.get('limit', 20)), 1), 50)
+    except (TypeError, ValueError):
+        limit = 20
+
+    response = JsonResponse({"query": query, "results": search(query, limit)})
+    patch_cache_control(response, public=True, max_age=60)
+    return response
+
+
+def _parse_coordinate(value, limit):
+    coordinate = float(value)
+    if not math.isfinite(coordinate) or abs(coordinate) > limit:
+        raise ValueError(value)
+    return coordinate
+
+
+@require_GET
+def nearest_branch(request):
+    """
+    Ближайшие к клиенту филиалы: /branches/nearest/?lat=55.75&lon=37.61&limit=3
+    Для каждого филиала возвращает расстояние, мастеров и услуги этого филиала.
+    """
+    try:
+        latitude = _parse_coordinate(request.GET.get('lat'), 90)
+        longitude = _parse_coordinate(request.GET.get('lon'), 180)
+    except (TypeError, ValueError):
+        return JsonResponse({"error": "Укажите координаты: lat от -90 до 90, lon от -180 до 180."}, status=400)
+    try:
+        limit = min(max(int(request.GET.get('limit', 1)), 1), 10)
+    except (TypeError, ValueError):
+        limit = 1
+
+    found = nearest_branches(latitude, longitude, limit)
+    ids = [pk for pk, _ in found]
+    branches = Address.objects.in_bulk(ids)
+
+    # Мастера и услуги без привязки к филиалу доступны во всех филиалах
+    masters = list(Master.objects.filter(Q(branch__in=ids) | Q(branch__isnull=True)).values('id', 'name', 'branch_id'))
+    service_branches = {}
+    for service_id, branch_id in Service.objects.values_list('id', 'branches'):
+        service_branches.setdefault(service_id, set()).add(branch_id)
+
+    result = []
+    for pk, distance in found:
+        branch = branches.get(pk)
+        if branch is None:
+            continue
+        data = AddressSerializer(branch).data
+        data['distance_km'] = round(distance, 3)
+        data['masters'] = [
+            {"id": master['id'], "name": master['name']}
+            for master in masters if master['branch_id'] in (None, pk)
+        ]
+        data['services'] = [
+            service_id for service_id, branch_ids in service_branches.items()
+            if None in branch_ids or pk in branch_ids
+        ]
+        result.append(data)
+    return JsonResponse({"branches": result})
@@ -0,0 +1,212 @@
+"""
+Прогрев лендинга после деплоя или перезапуска.
+
+Каждый шаг прогревает свой уровень: кеш версий и фрагментов секций, страницы таблиц в БД
+и медиафайлы в page cache ОС. Шаги независимы и выполняются параллельно.
+
+Шаблоны и модули в памяти процесса прогревает не команда warm_landing (её процесс запросы не обслуживает),
+а preload_application в мастер-процессе gunicorn, от которого их получают воркеры.
+"""
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.db import DatabaseError, connection, transaction
+from django.template.loader import get_template
+
+from .cache import SECTION_DEPENDENCIES, section_versions
+from .models import Master, PriceItem, Review, Service, ServiceSubsection, Social
+from .storage import CHUNK_SIZE, media_storage
+
+# Таблицы, которые читаются при каждом рендере главной страницы
+HOT_MODELS = (Service, ServiceSubsection, PriceItem, Master, Social, Review)
+# Сколько имён недостающих медиафайлов показывать в предупреждении
+MISSING_NAMES_SHOWN = 10
+
+
+class StepWarning(Exception):
+    """
+    Шаг выполнен, но не полностью (например, часть медиафайлов не найдена). Готовность это
+    не блокирует, если прогрев не запущен со strict=True. detail — итог выполненной части.
+    """
+
+    def __init__(self, message, detail=''):
+        super().__init__(message)
+        self.detail = detail
+
+
+class StepResult:
+    def __init__(self, name, seconds, detail='', error=None, warning=None):
+        self.name = name
+        self.seconds = seconds
+        self.detail = detail
+        self.error = error
+        self.warning = warning
+
+    @property
+    def ok(self):
+        return self.error is None
+
+
+def warm_versions():
+    """ Создаёт в кеше ключи версий всех моделей (иначе их создаст первый посетитель). """
+    versions = section_versions()
+    return f"секций: {len(versions)}"
+
+
+def warm_templates():
+    """
+    Компилирует шаблоны главной страницы — кеширующий загрузчик Django сохранит их в памяти процесса.
+    Только для preload_application: в отдельном процессе команды это ничего не даёт воркерам.
+    """
+    names = ['landing/index.html', 'landing/index_shell.html', 'landing/section.html', 'landing/sw.js']
+    names += [f"landing/sections/{name}.html" for name in SECTION_DEPENDENCIES]
+    for name in names:
+        get_template(name)
+    return f"шаблонов: {len(names)}"
+
+
+def warm_index():
+    """
+    Рендерит главную страницу целиком: все данные секций вычисляются один раз,
+    а фрагменты {% section_cache %} каждой секции попадают в кеш.
+    """
+    from .prerender import render_index
+
+    html = render_index()
+    return f"{len(html.encode('utf-8'))} байт"
+
+
+def warm_payloads():
+    """
+    Вычисляет JSON-данные секций (услуги, мастера, контакты, отзывы) и кладёт в кеш
+    закодированные ответы /data/<имя>.<версия>.json для клиентского кеша.
+    """
+    from .payloads import PAYLOAD_SECTIONS, encoded_payload, payload_version
+    from .prerender import section_payloads
+
+    payloads = section_payloads()
+    for name in PAYLOAD_SECTIONS:
+        encoded_payload(name, payload_version(name))
+    return ', '.join(f"{name}: {len(data)}" for name, data in payloads.items())
+
+
+def _prewarm_table(model):
+    """
+    Читает таблицу целиком, чтобы её страницы оказались в кеше СУБД и ОС.
+    На PostgreSQL с расширением pg_prewarm загружает и таблицу, и её индексы.
+    """
+    table = model._meta.db_table
+    if connection.vendor == 'postgresql':
+        try:
+            with transaction.atomic(), connection.cursor() as cursor:
+                cursor.execute("SELECT pg_prewarm(%s)", [table])
+                for index_name in _table_indexes(cursor, table):
+                    cursor.execute("SELECT pg_prewarm(%s)", [index_name])
+            return
+        except DatabaseError:
+            pass  # расширение не установлено — читаем таблицу обычным запросом
+
+    # Полный проход по таблице без создания объектов моделей
+    for _ in model.objects.values_list(*[f.attname for f in model._meta.concrete_fields]).iterator(chunk_size=2000):
+        pass
+
+
+def _table_indexes(cursor, table):
+    cursor.execute("SELECT indexname FROM pg_indexes WHERE tablename = %s", [table])
+    return [row[0] for row in cursor.fetchall()]
+
+
+def warm_database():
+    """ Прогревает страницы «горячих» таблиц. """
+    for model in HOT_MODELS:
+        _prewarm_table(model)
+    return f"таблиц: {len(HOT_MODELS)}"
+
+
+def _read_ahead(path):
+    with open(path, 'rb') as fh:
+        if hasattr(os, 'posix_fadvise'):
+            # Просим ядро подгрузить файл в page cache асинхронно, не копируя его в Python
+            os.posix_fadvise(fh.fileno(), 0, 0, os.POSIX_FADV_WILLNEED)
+            return os.fstat(fh.fileno()).st_size
+        size = 0
+        for chunk in iter(lambda: fh.read(CHUNK_SIZE), b''):
+            size += len(chunk)
+        return size
+
+
+def warm_media():
+    """
+    Подгружает в page cache все медиафайлы, на которые ссылаются модели. Недостающие файлы
+    сайт переживает (на странице просто нет картинки), поэтому о них сообщает StepWarning.
+    """
+    from .media_gc import referenced_names
+
+    total = 0
+    missing = []
+    names = referenced_names()
+    for name in names:
+        try:
+            total += _read_ahead(media_storage.path(name))
+        except FileNotFoundError:
+            missing.append(name)
+    detail = f"файлов: {len(names) - len(missing)}, {total} байт"
+    if missing:
+        shown = ', '.join(sorted(missing)[:MISSING_NAMES_SHOWN])
+        more = f" и ещё {len(missing) - MISSING_NAMES_SHOWN}" if len(missing) > MISSING_NAMES_SHOWN else ''
+        raise StepWarning(f"не найдено файлов: {len(missing)} из {len(names)} ({shown}{more})", detail)
+    return detail
+
+
+def preload_application():
+    """
+    Загружает всё, что нужно для обработки запросов, но не обращается к БД: URL-ы со всеми вьюхами
+    и админкой, скомпилированные шаблоны и Pillow. Вызывается в мастер-процессе gunicorn
+    с preload_app (см. gunicorn.conf.py): воркеры получают готовые модули от fork и делят
+    эту память с мастером (copy-on-write), а первый запрос к воркеру не ждёт импортов.
+    """
+    from django.db import connections
+    from django.urls import reverse
+    from PIL import Image  # noqa: F401 — нужен загрузке изображений в админке
+
+    # reverse() импортирует URLconf (и с ним admin.autodiscover) и строит таблицы URL-ов
+    reverse('home')
+    warm_templates()
+    # соединение, открытое до fork, воркеры не должны унаследовать
+    connections.close_all()
+
+
+STEPS = {
+    'versions': warm_versions,
+    'index': warm_index,
+    'payloads': warm_payloads,
+    'database': warm_database,
+    'media': warm_media,
+}
+
+
+def _run_step(name, strict=False):
+    started = time.perf_counter()
+    warning = None
+    try:
+        detail = STEPS[name]()
+        error = None
+    except StepWarning as exc:
+        detail, warning = exc.detail, exc
+        error = exc if strict else None
+    except Exception as exc:  # одна неудачная часть не должна прерывать остальные
+        detail, error = '', exc
+    finally:
+        connection.close()
+    return StepResult(name, time.perf_counter() - started, detail or '', error, warning)
+
+
+def warm_landing(steps=None, workers=None, strict=False):
+    """
+    Выполняет шаги прогрева параллельно и возвращает список StepResult в порядке STEPS.
+    strict=True считает ошибкой и предупреждения шагов (StepWarning).
+    """
+    steps = list(STEPS) if steps is None else list(steps)
+    with ThreadPoolExecutor(max_workers=workers or len(steps), thread_name_prefix='landing-warm') as executor:
+        return list(executor.map(lambda name: _run_step(name, strict), steps))